@@ -0,0 +1,128 @@
+# factorization.py
+# 整数分解：小素数试除 + 素性测试 + Pollard rho（gmpy2 为可选依赖，缺失时用纯 Python 的 Miller-Rabin）
+import math
+import random
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import gmpy2
+except ImportError:
+    gmpy2 = None
+
+# 确定性 Miller-Rabin 的底数，对 3.3e24 以下的数给出确定结果，更大的数为概率性测试
+_MILLER_RABIN_BASES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)
+
+
+def small_primes(limit: int) -> List[int]:
+    """limit 以内的素数（埃氏筛）"""
+    sieve = bytearray([1]) * (limit + 1)
+    sieve[:2] = b'\0\0'
+    for p in range(2, int(limit ** 0.5) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytearray(len(range(p * p, limit + 1, p)))
+    return [p for p in range(limit + 1) if sieve[p]]
+
+
+def is_probable_prime(n: int) -> bool:
+    if n < 2:
+        return False
+    if gmpy2 is not None:
+        return bool(gmpy2.is_prime(n))
+    for p in _MILLER_RABIN_BASES:
+        if n % p == 0:
+            return n == p
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for a in _MILLER_RABIN_BASES:
+        x = pow(a, d, n)
+        if x in (1, n - 1):
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def pollard_rho(n: int, max_iterations: int, seed: int = 1) -> int:
+    """
+    Brent 版 Pollard rho，返回 n（奇合数）的一个非平凡因子；
+    max_iterations 步内没找到时返回 1。随机数由 seed 决定，结果可复现。
+    """
+    rng = random.Random(seed)
+    while max_iterations > 0:
+        y, c, m = rng.randrange(1, n), rng.randrange(1, n), 128
+        g = r = q = 1
+        x = ys = y
+        while g == 1 and max_iterations > 0:
+            x = y
+            for _ in range(r):
+                y = (y * y + c) % n
+            k = 0
+            while k < r and g == 1:
+                ys = y
+                for _ in range(min(m, r - k)):
+                    y = (y * y + c) % n
+                    q = q * abs(x - y) % n
+                g = math.gcd(q, n)
+                k += m
+            max_iterations -= r
+            r *= 2
+        if g == n:
+            # 批量乘积把因子一起吞掉了，逐步回退
+            g = 1
+            while g == 1:
+                ys = (ys * ys + c) % n
+                g = math.gcd(abs(x - ys), n)
+        if 1 < g < n:
+            return g
+    return 1
+
+
+def factorize(n: int, trial_primes: Iterable[int], rho_iterations: int = 20000) -> Tuple[Dict[int, int], int]:
+    """
+    分解 |n|：先用 trial_primes 试除，剩余部分做素性测试，合数用 Pollard rho 继续拆分。
+    返回 ({素数: 指数}, 未能分解的合数部分)，后者为 1 表示完全分解。
+    """
+    n = abs(n)
+    factors: Dict[int, int] = {}
+    for p in trial_primes:
+        if p * p > n:
+            break
+        while n % p == 0:
+            factors[p] = factors.get(p, 0) + 1
+            n //= p
+    unfactored = 1
+    pending = [n] if n > 1 else []
+    while pending:
+        part = pending.pop()
+        if is_probable_prime(part):
+            factors[part] = factors.get(part, 0) + 1
+            continue
+        divisor = pollard_rho(part, rho_iterations)
+        if divisor == 1:
+            unfactored *= part
+        else:
+            pending.extend((divisor, part // divisor))
+    return factors, unfactored
+
+
+def divisors_up_to(factors: Dict[int, int], bound: int) -> List[int]:
+    """由素因子分解生成不超过 bound 的全部因子（含 1），从小到大"""
+    divisors = [1]
+    for p, exponent in sorted(factors.items()):
+        if p > bound:
+            break
+        extended = []
+        for d in divisors:
+            for _ in range(exponent):
+                d *= p
+                if d > bound:
+                    break
+                extended.append(d)
+        divisors.extend(extended)
+    return sorted(divisors)
@@ -1,72 +1,60 @@
-# generate_combinations.py
-import itertools
-from collections import defaultdict
+# frequently_used_number_generater.py
+# 构建步骤：用精确整数运算按代价逐层枚举⑨表达式，生成主程序启动时加载的 expression_table.bin
+#   python frequently_used_number_generater.py [--limit N] [--max-cost C] [--bases digits|symbols] [--workers W] [--output 路径]
+import argparse
+import hashlib
+import os
+import time
+
+from expression_table import DEFAULT_TABLE_FILE, DIGIT_BASES, SYMBOL_BASES, ExpressionTableBuilder
+
+BASE_SETS = {'digits': DIGIT_BASES, 'symbols': SYMBOL_BASES}
+# 本目录主程序使用的基础数字：命令行版为 9/99/999，GUI 版另有 √⑨
+DEFAULT_BASES = 'digits'
 
 
 class CombinationGenerator:
-    def __init__(self):
-        self.base = [9, 99, 999]
-        self.operators = ['+', '-', '*', '/']
-        self.combinations = defaultdict(list)
-        self.special_values = {1000, 2000, 5000, 10000}
-        self.priority_ops = ['*', '+', '-', '/']  # 新增运算符优先级实例变量
+    """
+    枚举基础数字的四则组合，每个整数保留⑨个数最少的表达式（见 ExpressionTableBuilder）。
+    只做精确的整数运算：'/' 仅在整除时成立，不会出现 1.0 之类的浮点键。
+    有 NumPy 时按块批量计算，大层分给 workers 个进程。
+    """
 
-    def _generate_base_combinations(self):
-        """生成基础数字的组合"""
-        for a in self.base:
-            for b in self.base:
-                for op in self.operators:
-                    res = self._evaluate(a, b, op)
-                    if res is not None and abs(res) < 50_000:
-                        expr = f"{a}{op}{b}"
-                        self.combinations[res].append(expr)
-                        
-                        # 尝试与第三个基础数进行组合
-                        for c in self.base:
-                            for op2 in self.operators:
-                                final_res = self._evaluate(res, c, op2)
-                                if final_res is not None and abs(final_res) < 100_000:
-                                    final_expr = f"({expr}){op2}{c}"
-                                    self.combinations[final_res].append(final_expr)
+    def __init__(self, limit: int = 100_000, max_cost: int = 16, bases: str = DEFAULT_BASES, workers: int = 1):
+        self.limit = limit
+        self.max_cost = max_cost  # 枚举深度：表达式中⑨的最多个数
+        self.base_map = BASE_SETS[bases]
+        self.workers = workers
+        self._start = 0.0
 
-    def _evaluate(self, a, b, op):
-        try:
-            if op == '+': return a + b
-            if op == '-': return a - b
-            if op == '*': return a * b
-            if op == '/':
-                if b == 0:
-                    return None
-                return a / b
-            return None
-        except:
-            return None
+    def _report(self, cost: int, solved: int, size: int, combinations: int):
+        """每完成一层输出进度和吞吐量"""
+        elapsed = time.perf_counter() - self._start
+        rate = combinations / elapsed if elapsed > 0 else 0.0
+        print(f"  代价 {cost:2d}: 已求解 {solved}/{size} ({solved / size:.1%})，"
+              f"组合 {combinations:,} 次，{rate / 1e6:.2f}M 次/秒，用时 {elapsed:.1f}s", flush=True)
 
-    def generate(self):
-        # 生成基础组合
-        self._generate_base_combinations()
-        
-        # 去重并保留最短表达式
-        final = {}
-        for k in self.combinations:
-            if k == int(k):  # 只保留整数
-                sorted_exprs = sorted(set(self.combinations[k]), key=len)
-                final[int(k)] = sorted_exprs[0]
-        return final
+    def generate(self, output: str) -> str:
+        """生成表并写入 output，返回文件的 SHA-256；参数相同时输出逐字节相同"""
+        self._start = time.perf_counter()
+        builder = ExpressionTableBuilder(limit=self.limit, max_cost=self.max_cost, base_map=self.base_map,
+                                         workers=self.workers)
+        table = builder.build(progress=self._report)
+        table.save(output)
+        with open(output, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        print(f"已写入 {output}：{len(table)}/{2 * self.limit + 1} 个整数已求解，SHA-256 {digest}")
+        return digest
 
 
 if __name__ == "__main__":
-    try:
-        gen = CombinationGenerator()
-        combinations = gen.generate()
-    except Exception as e:
-        print("\n\033[91m错误详情：")
-        print(f"异常类型: {type(e).__name__}")
-        print(f"错误信息: {str(e)}")
-        print(f"发生位置: {e.__traceback__.tb_lineno}行\033[0m")
-        raise
-    print("\n完整结果已生成，请复制以下字典到主程序：")
-    print("{")
-    for k, v in combinations.items():
-        print(f"    {k}: '{v}',")
-    print("}")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="生成⑨表达式的整数复杂度表（主程序启动时映射加载）")
+    parser.add_argument('--limit', type=int, default=100_000, help="求解区间 [-limit, limit]")
+    parser.add_argument('--max-cost', type=int, default=16, help="枚举深度，即表达式中⑨的最多个数")
+    parser.add_argument('--bases', choices=sorted(BASE_SETS), default=DEFAULT_BASES,
+                        help="基础数字：digits 为 9/99/999（命令行版、Electron 后端），symbols 另加 √⑨（GUI 版）")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="构建大层时使用的进程数")
+    parser.add_argument('--output', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         DEFAULT_TABLE_FILE))
+    args = parser.parse_args()
+    CombinationGenerator(args.limit, args.max_cost, args.bases, args.workers).generate(args.output)
@@ -1,15 +1,20 @@
 from dataclasses import dataclass
-from typing import Optional, Set, List, Tuple
+from typing import Dict, Iterable, Iterator, Optional, Set, List, Tuple
+import itertools
+import heapq
 import math
 import time
 import random
 import re
+import signal
 import sys
 import wave
 import pyaudio
 import io
+import os
 import base64
 import threading
+from array import array
 from PyQt6.QtWidgets import QApplication, QWidget, QLabel, QVBoxLayout, QGraphicsOpacityEffect
 from PyQt6.QtGui import QPixmap, QImage, QScreen, QPaintEvent, QCloseEvent
 from PyQt6.QtCore import Qt, QRect, QPropertyAnimation, QEasingCurve, QSequentialAnimationGroup, pyqtSignal
@@ -17,6 +22,14 @@ from decimal import Decimal, getcontext
 sys.stdout.reconfigure(encoding='utf-8')
 getcontext().prec = 50
 from fumo import FUMO
+from expression_table import load_or_build, DIGIT_BASES
+from result_cache import make_cache
+from persistent_cache import TieredCache, default_cache_path, open_persistent_cache
+from expression_tree import BinOp, ExpressionNode, Leaf, Neg, Raw, render
+from factorization import divisors_up_to, factorize, small_primes
+from cancellation import CancellationToken, SolveCancelled
+from portfolio import PortfolioSolver, expression_cost
+from vector_search import VectorFrontierSearch, vector_search_available
 
 
 class FumoSplash(QWidget):
@@ -228,27 +241,124 @@ class Expression:
         return hash(self.value)
 
 
+class SparseFlags(dict):
+    """值域过大、无法用位图时的退化形式：与 bytearray 相同的下标读写接口，底层是哈希表"""
+
+    def __missing__(self, key):
+        return 0
+
+
+class SearchBudget:
+    """
+    一次求解请求的总预算：截止时间和可选的节点数上限，在整棵分解树中向下传递。
+    子问题只分到剩余时间的一部分，预算耗尽后分解退化为廉价的贪心拆分。
+    """
+
+    def __init__(self, timeout_ms: int, max_nodes: Optional[int] = None, clock=time.monotonic):
+        # clock 可换成带取消检查的时钟（见 ImprovedNineExpressionFinder._cancellable_clock）
+        self.clock = clock
+        self.deadline = time.monotonic() + timeout_ms / 1000
+        self.max_nodes = max_nodes
+        self.nodes = 0
+
+    def remaining_ms(self) -> int:
+        return max(0, int((self.deadline - self.clock()) * 1000))
+
+    def share(self, parts: int = 2) -> int:
+        """分给一个子问题的时间（毫秒）：剩余时间的 1/parts，给后面的子问题留出余量"""
+        return self.remaining_ms() // parts
+
+    def charge(self, nodes: int):
+        self.nodes += nodes
+
+    def exhausted(self) -> bool:
+        now = self.clock()  # 先取时钟，节点数耗尽时也检查取消
+        if self.max_nodes is not None and self.nodes >= self.max_nodes:
+            return True
+        return now >= self.deadline
+
+
 class ImprovedNineExpressionFinder:
     # 将 FUMO 常量直接赋值给类属性
     FUMO_IMAGE_DATA_BASE64 = FUMO 
+    # 链式搜索的运算符，下标用于节点的步骤编码
+    CHAIN_OPERATORS = ('+', '-', '*', '/')
+    # 进程内共享的整数复杂度表，首次查询时构建
+    _expression_table = None
+    expression_table_limit = 2000
+    _symbolized_cache = None
+    # 进程内共享的有界结果缓存（见 result_cache.py），首次创建实例时按下面的配置建立
+    _result_cache = None
+    result_cache_policy = 'lru'  # 'lru' 或 'lfu'
+    result_cache_entries = 4096
+    result_cache_bytes = 16 << 20
+    # 内存缓存之后的磁盘缓存（见 persistent_cache.py），各版本共用一个文件；默认不用，各入口加 --cache-file 时在创建实例前设置
+    persistent_cache_path = None
+    # 搜索或分解的结果会因代码改动而不同时递增，使磁盘上的旧结果失效
+    CACHE_ENGINE_VERSION = 2
+    # 组合求解（见 portfolio.py）的进程池和各策略胜率，进程内共享，进程池在第一次组合求解时创建
+    _portfolio = None
+    portfolio_workers = os.cpu_count() or 1
 
     def __init__(self): # 确保是 __init__
-        self._disable_divisions = False
         self.base_numbers = {Decimal('9'), Decimal('99'), Decimal('999')}
         from audio_data import AUDIO_DATA
         self.AUDIO_DATA = AUDIO_DATA
         self.large_number_threshold = 5000
-        from expression_cache import EXPRESSION_CACHE
-        self.expression_cache = EXPRESSION_CACHE
-        self.expression_cache = {k: v.replace('9', '⑨') for k, v in self.expression_cache.items()} # 移除了⑨后的空格
+        self.search_mode = 'best_first'  # 小目标搜索策略：'best_first'、'astar' 或 'vector'（需要 NumPy）
+        self.vector_number_threshold = 200000  # 向量化搜索可直接处理的目标上限
+        self.decomposition_bound_threshold = 2000  # 直接搜索的目标超过此值时，结果再与大数分解比较，取⑨较少者
+        self.bidirectional_number_threshold = 10 ** 7  # 超过直接搜索上限但不超过此值时先用双向搜索
+        self.decomposition_dp_limit = 10 ** 60  # 超过此值的分解只用 999 作基数
+        self.max_search_nodes = None  # 每次请求的节点预算，None 表示只限时间
+        self.horner_number_threshold = 10 ** 1000  # 超过此值时按 999 进制数位直接生成（可流式输出）
+        self._power_ladder_cache = [999]
+        self.decomposition_memo_limit = 1 << 18  # 跨请求复用的分解子问题条目上限，0 表示不复用
+        self.factor_trial_limit = 1000  # 乘法拆分：试除的素数上限，更大的素因子由 Pollard rho 寻找
+        self.factor_rho_iterations = 4096
+        self.factor_number_limit = 10 ** 60  # 超过此值不做 Pollard rho，只用小素数
+        self.factor_choice_count = 3  # 每个状态最多尝试的乘法拆分数
+        self._factor_primes = None
+        self._decomposition_memo = {}
+        self.batch_frontier_limit = 10 ** 5  # 批量求解中不超过此值的目标共用一次前沿扩展
+        self.deadline_check_interval = 64  # 每扩展多少个节点检查一次超时（同时检查取消）
+        self.astar_perimeter_states = 20000  # A* 周界启发从目标反向搜索的状态数上限
+        self.anytime_timeout_ms = 1000  # iter_improvements 的默认时限（毫秒），到时或结果达到下界即停止
+        self.cancel_token = CancellationToken()  # 每个新请求换一个新令牌，取消旧令牌即停止旧请求
+        self.last_search_expansions = 0
+        self.last_search_rate = 0.0  # 最近一次搜索每秒扩展的节点数
+        self.state_bitmap_limit = 1 << 26  # 状态位图最多 64MB，超出则退化为哈希表
+        # 手写缓存只在进程内转换一次符号，大批量结果由 mmap 表提供
+        cls = type(self)
+        if cls._symbolized_cache is None:
+            from expression_cache import EXPRESSION_CACHE
+            cls._symbolized_cache = {k: v.replace('9', '⑨') for k, v in EXPRESSION_CACHE.items()} # 移除了⑨后的空格
+        self.expression_cache = cls._symbolized_cache  # 只读，不再为每个实例复制
+        # 搜索结果的缓存可替换为任何带 get/put 的对象，如 make_cache('lfu')
+        if cls._result_cache is None:
+            cls._result_cache = make_cache(cls.result_cache_policy, cls.result_cache_entries, cls.result_cache_bytes)
+            if cls.persistent_cache_path:
+                disk = open_persistent_cache(cls.persistent_cache_path, cls.CACHE_ENGINE_VERSION)
+                if disk is not None:
+                    cls._result_cache = TieredCache(cls._result_cache, disk)
+        self.result_cache = cls._result_cache
+        self.use_portfolio = False  # 为 True 时各策略在进程池中同时求解，取截止前⑨最少的结果
+        self.restarts = 0  # 大于 0 时直接搜索改为这么多个不同 seed 的启发式搜索同时运行
+        self.last_restart_seed = None  # 最近一次多次重启中胜出的 seed
+        if cls._portfolio is None:
+            cls._portfolio = PortfolioSolver(_solve_portfolio_strategy, cls.portfolio_workers)
+        self.portfolio = cls._portfolio
         
         self.show_fumo_splash = True 
         self.fumo_pixmap = None
         self.active_fumo_splash = None
 
         # ---- 修改 Fumo 图片加载逻辑 ----
+        # 没有 QApplication 时（如组合求解的工作进程）不能创建 QPixmap，也用不到彩蛋
+        if QApplication.instance() is None:
+            self.show_fumo_splash = False
         # 检查 FUMO_IMAGE_DATA_BASE64 是否是一个非空字符串
-        if isinstance(self.FUMO_IMAGE_DATA_BASE64, str) and self.FUMO_IMAGE_DATA_BASE64:
+        elif isinstance(self.FUMO_IMAGE_DATA_BASE64, str) and self.FUMO_IMAGE_DATA_BASE64:
             try:
                 fumo_image_data = base64.b64decode(self.FUMO_IMAGE_DATA_BASE64)
                 fumo_image = QImage.fromData(fumo_image_data)
@@ -343,6 +453,15 @@ class ImprovedNineExpressionFinder:
         except Exception as e:
             print(f"音频播放失败: {e}")
 
+    def _get_expression_table(self):
+        """获取整数复杂度表（同一进程内只加载一次）"""
+        cls = type(self)
+        if cls._expression_table is None:
+            # 目录下有离线生成的 expression_table.bin 时直接 mmap，否则现场构建小表
+            cls._expression_table = load_or_build(os.path.dirname(os.path.abspath(__file__)),
+                                                  DIGIT_BASES, cls.expression_table_limit)
+        return cls._expression_table
+
     def _get_operators(self, target: int) -> list:
         """根据目标值动态生成运算符优先级列表"""
         # 可选：对特殊数字定制规则
@@ -372,30 +491,6 @@ class ImprovedNineExpressionFinder:
     def _simplify_expression(self, expr: str) -> str:
         return expr.replace('+-', '-').replace('-+', '-')
 
-    def _is_integer(self, num: float) -> bool:
-        return abs(num - round(num)) < 1e-10
-
-    def _estimate_distance(self, value: float, target: int) -> float:
-        return abs(value - target)
-
-    def _diversity_score(self, operators_used: set) -> float:
-        score = len(operators_used) * 2
-        if '*' in operators_used:
-            score += 3
-        return score
-
-    def _is_worth_exploring(self, value: float, target: int, visited: Set[float]) -> bool:
-        # 根据目标值动态调整允许的最大值
-        factor = 100 if abs(target) > 1000 else 10
-        max_allowed = max(abs(target) * factor, 10 ** 7)  # 调整倍数和基准值
-        if abs(value) > max_allowed:
-            return False
-        if math.isinf(value) or math.isnan(value):
-            return False
-        if len(visited) > 100000:
-            return False
-        return True
-
     def _format_operand(self, exp: Expression, parent_op: str, is_right_operand: bool = False) -> str:
         if exp.operator is None:
             return exp.expr
@@ -411,9 +506,8 @@ class ImprovedNineExpressionFinder:
                 need_parenthesis = True
         elif parent_op in {'-', '/'}:
             if is_right_operand:
-                if current_precedence < parent_precedence:
-                    need_parenthesis = True
-                elif current_precedence == parent_precedence and exp.operator != parent_op:
+                # 右操作数同级时也必须加括号：a-(b-c) 不等于 a-b-c
+                if current_precedence <= parent_precedence:
                     need_parenthesis = True
             else:
                 if current_precedence < parent_precedence:
@@ -423,183 +517,1046 @@ class ImprovedNineExpressionFinder:
 
         return f"({exp.expr})" if need_parenthesis else exp.expr
 
-    def _evaluate(self, exp1: Expression, exp2: Expression, operator: str) -> Optional[Expression]:
-        try:
-            if operator == '+':
-                value = exp1.value + exp2.value
-            elif operator == '-':
-                value = exp1.value - exp2.value
-            elif operator == '*':
-                value = exp1.value * exp2.value
-            elif operator == '/':
-                if abs(exp2.value) < 1e-10 or not self._is_integer(exp1.value / exp2.value):
-                    return None
-                value = exp1.value / exp2.value
-            else:
-                return None
-
-            if abs(value) > 1e6:
-                return None
-
-            exp1_str = self._format_operand(exp1, operator)
-            exp2_str = self._format_operand(exp2, operator, is_right_operand=True)
-            expr = f"{exp1_str}{operator}{exp2_str}"
-            expr = self._simplify_expression(expr)
+    def _astar_heuristic(self, value: int, target: int) -> int:
+        """
+        A* 的可采纳下界：9/99/999 都满足 b+1 = 10^(⑨个数)，
+        因此每多用一个⑨，|值| 至多放大 10 倍，由此估计至少还需要几个⑨。
+        （按距离折算 999 步数的估计在有乘法时不可采纳，这里不用）
+        """
+        if value == target:
+            return 0
+        reach = max(abs(value), 1)
+        remaining = abs(target)
+        steps = 0
+        while reach < remaining:
+            reach *= 10
+            steps += 1
+        return max(steps, 1)
+
+    def _new_state_map(self, max_allowed: int):
+        """
+        为取值范围 [-max_allowed, max_allowed] 的搜索分配按 value + offset 下标的状态表：
+        范围可控时是 bytearray（无哈希、每个状态 1 字节），否则退化为 SparseFlags。
+        """
+        size = 2 * max_allowed + 1
+        if size <= self.state_bitmap_limit:
+            return bytearray(size), max_allowed
+        return SparseFlags(), max_allowed
+
+    def _chain_value_bound(self, target: int) -> int:
+        """链式表达式（启发式搜索和 A*）中间值的绝对值上限：目标的 100 倍，但至少 10**6，使小目标也能借道较大的中间值"""
+        return max(abs(target) * 100, 10 ** 6)
+
+    def _chain_successors(self, value: int, base: int, op: str) -> list:
+        """
+        当前值与一个基础数字做 op 运算得到的后继 [(新值, 步骤编码)]。
+        步骤编码 = 运算符下标*2 + (基础数字是否在左侧)，只占一个字节。
+        """
+        if op == '+':
+            return [(value + base, 0)]
+        if op == '-':
+            return [(value - base, 2), (base - value, 3)]
+        if op == '*':
+            return [(value * base, 4)]
+        successors = []
+        if value % base == 0:
+            successors.append((value // base, 6))
+        if value != 0 and base % value == 0:
+            successors.append((base // value, 7))
+        return successors
+
+    def _new_search_nodes(self):
+        """搜索节点的并行数组：值、父节点下标、步骤编码、所用基础数字"""
+        return array('q'), array('q'), bytearray(), array('q')
+
+    def _build_path_expression(self, nodes, index: int) -> str:
+        """沿父节点下标回溯解路径，只对这一条路径做括号格式化"""
+        values, parents, steps, bases = nodes
+        chain = []
+        while parents[index] >= 0:
+            chain.append(index)
+            index = int(parents[index])
+        exp = Expression(values[index], DIGIT_BASES[values[index]][0], set(), None)
+        for index in reversed(chain):
+            op = self.CHAIN_OPERATORS[steps[index] >> 1]
+            base_exp = Expression(bases[index], DIGIT_BASES[bases[index]][0], set(), None)
+            left, right = (base_exp, exp) if steps[index] & 1 else (exp, base_exp)
+            expr = f"{self._format_operand(left, op)}{op}{self._format_operand(right, op, is_right_operand=True)}"
+            exp = Expression(values[index], self._simplify_expression(expr), set(), operator=op)
+        return exp.expr
+
+    def _astar_perimeter(self, target: int, bases: list, max_allowed: int, deadline: float) -> Tuple[dict, int]:
+        """
+        A* 的周界启发：从目标出发按逆运算（_inverse_chain_predecessors）逐层做一致代价搜索，
+        直到到达的值超过 astar_perimeter_states 个或超时。返回 ({值: 到目标的精确剩余代价}, 半径 R)：
+        剩余代价不超过 R 的值都在表中，表外的值剩余代价至少为 R+1，二者都是可采纳的下界。
+        """
+        costs = {target: 0}
+        layers = {0: [target]}
+        predecessors = self._inverse_chain_predecessors
+        radius = 0
+        while True:
+            for value in layers.pop(radius, ()):
+                if costs[value] != radius:
+                    continue  # 已有更便宜路径，跳过过期条目
+                for base, base_cost in bases:
+                    new_cost = radius + base_cost
+                    for previous, _ in predecessors(value, base):
+                        if abs(previous) > max_allowed:
+                            continue
+                        known_cost = costs.get(previous)
+                        if known_cost is None or new_cost < known_cost:
+                            costs[previous] = new_cost
+                            layers.setdefault(new_cost, []).append(previous)
+            if not layers:
+                return costs, 255  # 能到达目标的值都已求出，其余值到不了目标
+            if len(costs) >= self.astar_perimeter_states or self._cancellable_clock() > deadline:
+                break
+            radius += 1
+        # 代价大于 R 的条目只是上界，不能当作下界使用
+        return {value: cost for value, cost in costs.items() if cost <= radius}, radius
+
+    def _find_expression_astar(self, target: int, timeout_ms: int = 1000) -> Optional[str]:
+        """
+        A* 搜索：g 为已用⑨个数，h 取周界（_astar_perimeter）内的精确剩余代价，
+        周界外取 R+1 与 _astar_heuristic 中的较大者。启发函数可采纳，目标第一次出堆即为最短的链式表达式；
+        周界让中等大小的目标也能在默认时限内搜完。扩展节点数记录在 self.last_search_expansions，便于基准测试。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        max_allowed = self._chain_value_bound(target)
+        bases = sorted((value, cost) for value, (_, cost) in DIGIT_BASES.items())
+        exact, radius = self._astar_perimeter(target, bases, max_allowed, deadline)
+
+        def heuristic(value: int, target: int) -> int:
+            remaining = exact.get(value)
+            if remaining is not None:
+                return remaining
+            return max(radius + 1, self._astar_heuristic(value, target))
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        # 每个值当前的最小代价（0 表示未到达），代价超过 255 的路径直接放弃
+        best_cost, offset = self._new_state_map(max_allowed)
+        heap = []
+        for value, cost in bases:
+            best_cost[value + offset] = cost
+            # 同 f 值时优先扩展 g 更大的节点，再按节点下标，保证结果确定
+            heap.append((cost + heuristic(value, target), -cost, len(values)))
+            values.append(value)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(value)
+        heapq.heapify(heap)
+
+        # 热循环中用到的方法提前绑定为局部变量
+        successors = self._chain_successors
+        push = heapq.heappush
+        operators = self.CHAIN_OPERATORS
+        expansions = 0
+        while heap:
+            _, neg_cost, index = heapq.heappop(heap)
+            cost = -neg_cost
+            value = values[index]
+            if cost > best_cost[value + offset]:
+                continue  # 已有更便宜路径，跳过过期条目
+            if value == target:
+                self._record_search_stats(expansions, start)
+                return self._build_path_expression(nodes, index)
+
+            expansions += 1
+            if expansions % self.deadline_check_interval == 0 and self._cancellable_clock() > deadline:
+                break
+
+            for base, base_cost in bases:
+                new_cost = cost + base_cost
+                for op in operators:
+                    for new_value, step in successors(value, base, op):
+                        if abs(new_value) > max_allowed:
+                            continue
+                        known_cost = best_cost[new_value + offset]
+                        if (known_cost == 0 or new_cost < known_cost) and new_cost <= 255:
+                            best_cost[new_value + offset] = new_cost
+                            push(heap, (new_cost + heuristic(new_value, target), -new_cost, len(values)))
+                            values.append(new_value)
+                            parents.append(index)
+                            steps.append(step)
+                            node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return None
 
-            new_operators_used = exp1.operators_used | exp2.operators_used | {operator}
-            return Expression(value, expr, new_operators_used, operator=operator)
-        except:
+    def _find_expression_vector(self, target: int, timeout_ms: int = 1000) -> Optional[str]:
+        """NumPy 分层前沿搜索：整层一次性扩展，给出以⑨个数计最短的链式表达式"""
+        start = time.monotonic()
+        # 范围取目标的 10 倍即可让 x/9 之类的步骤覆盖到目标附近
+        max_allowed = min(max(abs(target) * 10, 10 ** 5), self.state_bitmap_limit // 2)
+        search = VectorFrontierSearch(DIGIT_BASES, max_allowed)
+        index = search.search(target, start + timeout_ms / 1000, self._cancellable_clock)
+        self._record_search_stats(search.expansions, start)
+        if index is None:
+            return None
+        return self._build_path_expression((search.values, search.parents, search.steps, search.node_bases), index)
+
+    def _inverse_chain_predecessors(self, value: int, base: int) -> list:
+        """
+        _chain_successors 的逆运算：哪些 v 经过一步 (v op base) 能得到 value，
+        返回 [(v, 步骤编码)]，步骤编码与正向一致。
+        """
+        predecessors = [(value - base, 0), (value + base, 2), (base - value, 3), (value * base, 6)]
+        if value % base == 0:
+            predecessors.append((value // base, 4))
+        if value != 0 and base % value == 0:
+            predecessors.append((base // value, 7))
+        return predecessors
+
+    def _find_expression_bidirectional(self, target: int, timeout_ms: int = 1000) -> Optional[str]:
+        """
+        双向（中间相遇）搜索：正向从基础数字按层扩展，反向从目标按逆运算按层扩展，
+        每次扩展较小的一侧，两侧相遇后把反向链接在正向链之后。
+        搜索量约为 2*b^(d/2) 而不是 b^d，适合直接搜索太慢、分解又太粗的中等目标。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        max_allowed = max(abs(target) * 10, 10 ** 6)
+        bases = sorted((value, cost) for value, (_, cost) in DIGIT_BASES.items())
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        # 正向：值 -> (节点下标, 代价)；反向：值 -> (下一个值, 基础数字, 步骤编码, 到目标的代价)
+        forward = {}
+        for value, cost in bases:
+            forward[value] = (len(values), cost)
+            values.append(value)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(value)
+        backward = {target: (None, 0, 0, 0)}
+        forward_layer = [value for value, _ in bases]
+        backward_layer = [target]
+
+        successors = self._chain_successors
+        predecessors = self._inverse_chain_predecessors
+        operators = self.CHAIN_OPERATORS
+        check_interval = self.deadline_check_interval
+        expansions = 0
+        meet = target if target in forward else None
+        while meet is None and forward_layer and backward_layer and self._cancellable_clock() < deadline:
+            meets = []
+            if len(forward_layer) <= len(backward_layer):
+                next_layer = []
+                for value in forward_layer:
+                    expansions += 1
+                    if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                        break
+                    index, cost = forward[value]
+                    for base, base_cost in bases:
+                        for op in operators:
+                            for new_value, step in successors(value, base, op):
+                                if abs(new_value) > max_allowed or new_value in forward:
+                                    continue
+                                forward[new_value] = (len(values), cost + base_cost)
+                                values.append(new_value)
+                                parents.append(index)
+                                steps.append(step)
+                                node_bases.append(base)
+                                next_layer.append(new_value)
+                                if new_value in backward:
+                                    meets.append(new_value)
+                forward_layer = next_layer
+            else:
+                next_layer = []
+                for value in backward_layer:
+                    expansions += 1
+                    if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                        break
+                    cost = backward[value][3]
+                    for base, base_cost in bases:
+                        for previous, step in predecessors(value, base):
+                            if abs(previous) > max_allowed or previous in backward:
+                                continue
+                            backward[previous] = (value, base, step, cost + base_cost)
+                            next_layer.append(previous)
+                            if previous in forward:
+                                meets.append(previous)
+                backward_layer = next_layer
+            if meets:
+                # 同一层的多个相遇点中取总代价最小者
+                meet = min(meets, key=lambda v: forward[v][1] + backward[v][3])
+
+        self._record_search_stats(expansions, start)
+        if meet is None:
             return None
+        # 把反向链上的每一步追加为正向节点
+        index = forward[meet][0]
+        value = meet
+        while value != target:
+            next_value, base, step, _ = backward[value]
+            values.append(next_value)
+            parents.append(index)
+            steps.append(step)
+            node_bases.append(base)
+            index = len(values) - 1
+            value = next_value
+        return self._build_path_expression(nodes, index)
+
+    def _cancellable_clock(self) -> float:
+        """time.monotonic 加上取消检查：搜索循环和 SearchBudget 每次检查超时都经过这里，请求被取消时抛出 SolveCancelled"""
+        self.cancel_token.raise_if_cancelled()
+        return time.monotonic()
+
+    def _record_search_stats(self, expansions: int, start: float):
+        """记录最近一次搜索的扩展节点数和每秒扩展速度"""
+        elapsed = time.monotonic() - start
+        self.last_search_expansions = expansions
+        self.last_search_rate = expansions / elapsed if elapsed > 0 else 0.0
+
+    def _find_expression_best_first(self, target: int, timeout_ms: int = 1000,
+                                    seed: Optional[int] = None) -> Optional[str]:
+        """
+        按与目标的距离做最佳优先搜索（持久堆，每个目标只准备一次常量）。
+        节点只记录在并行数组里，表达式字符串只为最终解生成一次。
+        给定 seed 时扩展顺序完全由它决定，同一 seed 总是给出同一结果（见 find_expression_restarts）。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        check_interval = self.deadline_check_interval
+
+        operators = self._get_operators(target)
+        bases = sorted(int(num) for num in self.base_numbers)
+        if seed is None:
+            # 运算符顺序：每个目标洗牌一次，'+' 和 '*' 固定在最前
+            random.shuffle(operators)
+            for op in ['*', '+']:
+                if op in operators:
+                    operators.remove(op)
+                    operators.insert(0, op)
+        # 优先级上的扰动（按节点编号循环取用）：不给 seed 时全为 0，即纯按距离排序
+        jitter = [0] * 4096
+        if seed is not None:
+            # 多次重启：运算符和基础数字的顺序由 seed 打乱，距离再加上至多一个基数的随机扰动，各次重启走不同的路径
+            rng = random.Random(seed)
+            rng.shuffle(operators)
+            rng.shuffle(bases)
+            jitter = [rng.randrange(max(bases)) for _ in jitter]
+        max_allowed = self._chain_value_bound(target)
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        queue: List[Tuple[int, int]] = []
+        visited, offset = self._new_state_map(max_allowed)
+        # 位图容纳整个值域，不会写满；退化为哈希表时每个状态的内存是位图的几十倍，最多记录位图上限 1/32 的状态
+        max_visited = len(visited) if isinstance(visited, bytearray) else self.state_bitmap_limit // 32
+        visited_count = 0
+        for base in bases:
+            queue.append((abs(base - target), len(values)))
+            values.append(base)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(base)
+            visited[base + offset] = 1
+            visited_count += 1
+        heapq.heapify(queue)
+
+        # 热循环中用到的方法提前绑定为局部变量
+        successors = self._chain_successors
+        push = heapq.heappush
+        expansions = 0
+        while queue:
+            _, index = heapq.heappop(queue)
+            value = values[index]
+            if value == target:
+                self._record_search_stats(expansions, start)
+                return self._build_path_expression(nodes, index)
+
+            expansions += 1
+            if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                break
+            if visited_count > max_visited:
+                continue
+
+            for base in bases:
+                for op in operators:
+                    for new_value, step in successors(value, base, op):
+                        if abs(new_value) > max_allowed or visited[new_value + offset]:
+                            continue
+                        visited[new_value + offset] = 1
+                        visited_count += 1
+                        push(queue, (abs(new_value - target) + jitter[len(values) & 4095], len(values)))
+                        values.append(new_value)
+                        parents.append(index)
+                        steps.append(step)
+                        node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return None
+
+    def _decompose_large_number(self, target: int, budget: Optional[SearchBudget] = None) -> Optional[str]:
+        """按代价最优的带符号余数分解大数（见 _plan_decomposition），总耗时受 budget 约束"""
+        tree = self._decomposition_tree(target, budget)
+        return render(tree, 'digits') if tree is not None else None
 
-    def _decompose_large_number(self, target: int) -> Optional[str]:
-        """根据数字大小动态选择分解策略"""
+    def _decomposition_tree(self, target: int, budget: Optional[SearchBudget] = None) -> Optional[ExpressionNode]:
+        """分解结果的表达式树：各层组合只建节点，由调用方一次性序列化"""
+        if budget is None:
+            budget = SearchBudget(1000, self.max_search_nodes, self._cancellable_clock)
         # 负数处理分支
         if target < 0:
-            positive_expr = self._decompose_large_number(-target)
-            if positive_expr:
-                return f"-({positive_expr})"
-            return None
-
-        # 对于较小的数字，尝试使用更简单的组合
-        if target < 1000:
-            # 尝试用99和9的组合
-            for base in [99, 9]:
-                quotient = target // base
-                remainder = target % base
-                if quotient > 0:
-                    # 对于较大的商，继续尝试分解
-                    if quotient > 100:
-                        quotient_expr = self._decompose_large_number(quotient)
-                    else:
-                        quotient_expr = self._find_expression_with_timeout(quotient, timeout_ms=300)
-                    if quotient_expr:
-                        if remainder == 0:
-                            return f"{base}*({quotient_expr})"
-                        remainder_expr = self._find_expression_with_timeout(remainder, timeout_ms=300)
-                        if remainder_expr:
-                            return f"{base}*({quotient_expr})+({remainder_expr})"
+            positive_tree = self._decomposition_tree(-target, budget)
+            return Neg(positive_tree) if positive_tree is not None else None
+        if target == 0:
+            result = self._find_expression_with_timeout(0)
+            return Raw(result) if result else None
+        # 超长目标不做 DP（每个状态都是大数除法），直接按平衡 999 进制数位生成
+        if target > self.horner_number_threshold:
+            return Raw(''.join(self._iter_horner(self._balanced_digits(target))))
+
+        memo = {}
+        if self._plan_decomposition(target, memo, budget) is None:
             return None
-
-        # 对于中等大小的数字，优先尝试99和9的组合
-        if target < self.large_number_threshold:
-            # 先尝试99
-            quotient = target // 99
-            remainder = target % 99
-            if quotient > 0:
-                # 对于较大的商，继续尝试分解
-                if quotient > 100:
-                    quotient_expr = self._decompose_large_number(quotient)
-                else:
-                    quotient_expr = self._find_expression_with_timeout(quotient, timeout_ms=300)
-                if quotient_expr:
-                    if remainder == 0:
-                        return f"99*({quotient_expr})"
-                    remainder_expr = self._find_expression_with_timeout(remainder, timeout_ms=300)
-                    if remainder_expr:
-                        return f"99*({quotient_expr})+({remainder_expr})"
-            
-            # 再尝试9
-            quotient = target // 9
-            remainder = target % 9
-            if quotient > 0:
-                # 对于较大的商，继续尝试分解
-                if quotient > 100:
-                    quotient_expr = self._decompose_large_number(quotient)
-                else:
-                    quotient_expr = self._find_expression_with_timeout(quotient, timeout_ms=300)
-                if quotient_expr:
-                    if remainder == 0:
-                        return f"9*({quotient_expr})"
-                    remainder_expr = self._find_expression_with_timeout(remainder, timeout_ms=300)
-                    if remainder_expr:
-                        return f"9*({quotient_expr})+({remainder_expr})"
-
-        # 对于大数，优先使用999
-        quotient = target // 999
-        remainder = target % 999
-        if quotient > 0:
-            # 对于较大的商，继续尝试分解
-            if quotient > 100:
-                quotient_expr = self._decompose_large_number(quotient)
+        complete = not budget.exhausted()
+        tree = self._decomposition_node(target, memo, budget)
+        if complete:
+            self._remember_decomposition(memo)
+        return tree
+
+    def _remember_decomposition(self, planned: dict):
+        """
+        保存完整（未退化为贪心）的规划结果供后续请求复用，如 q*999^k 形式的目标共享大部分商。
+        条目超过 decomposition_memo_limit 时整体清空，本次的结果也不再保存
+        （其中取自共享 memo 的状态的子拆分已被清掉）。
+        """
+        shared = self._decomposition_memo
+        if len(shared) + len(planned) > self.decomposition_memo_limit:
+            shared.clear()
+        else:
+            shared.update(planned)
+
+    def _decomposition_radices(self, target: int) -> list:
+        """分解可用的基数 [(数值, 代价)]，从大到小；超大数只用 999，避免状态数爆炸"""
+        radices = sorted(((value, cost) for value, (_, cost) in DIGIT_BASES.items()), reverse=True)
+        if target > self.decomposition_dp_limit:
+            return radices[:1]
+        return radices
+
+    def _decomposition_choices(self, target: int, budget: SearchBudget) -> list:
+        """
+        候选拆分 [(基数, 代价, q, r)]：每个基数取向下和向上取整两种；
+        预算耗尽时只保留贪心的一种，即不超过 target 的最大基数向下取整。
+        """
+        radices = self._decomposition_radices(target)
+        if budget.exhausted():
+            base, base_cost = next(((b, c) for b, c in radices if b <= target), radices[-1])
+            quotient, remainder = divmod(target, base)
+            return [(base, base_cost, quotient, remainder)]
+        choices = []
+        for base, base_cost in radices:
+            quotient, remainder = divmod(target, base)
+            choices.append((base, base_cost, quotient, remainder))
+            choices.append((base, base_cost, quotient + 1, remainder - base))
+        return choices
+
+    def _factor_basis(self, target: int) -> List[int]:
+        """
+        乘法拆分可用的素数（从小到大）：factor_trial_limit 以内的小素数，
+        加上 Pollard rho 从 target 中分解出的、不超过表上限的素因子。
+        子状态的因子都在其中，只需与它们的乘积求一次最大公因数，不必逐个重新分解。
+        """
+        if self._factor_primes is None:
+            primes = small_primes(self.factor_trial_limit)
+            self._factor_primes = (primes, math.prod(primes))
+        primes, _ = self._factor_primes
+        if target > self.factor_number_limit:
+            return primes
+        table = self._get_expression_table()
+        factors, _ = factorize(target, primes, self.factor_rho_iterations)
+        return primes + sorted(p for p in factors if primes[-1] < p <= table.limit)
+
+    def _factor_choices(self, target: int, factor_basis: List[int]) -> list:
+        """
+        乘法拆分 target = d * (target/d)：d 取表中的因子，按每个数量级花费的⑨个数
+        选最省的 factor_choice_count 个，余数为 0，与加法拆分一起按总代价比较。
+        """
+        primes, product = self._factor_primes
+        if len(factor_basis) > len(primes):
+            product *= math.prod(factor_basis[len(primes):])
+        common = math.gcd(target, product)
+        if common == 1:
+            return []
+        table = self._get_expression_table()
+        bound = min(table.limit, target - 1)
+        # common 只含各素因子一次，指数另数，只数到 bound 为止
+        factors = {}
+        for p in factorize(common, factor_basis, 0)[0]:
+            exponent, power = 0, p
+            while power <= bound and target % power == 0:
+                exponent += 1
+                power *= p
+            factors[p] = exponent
+        divisors = [d for d in divisors_up_to(factors, bound) if d > 1 and d not in DIGIT_BASES and d in table]
+        divisors.sort(key=lambda d: (table.cost(d) / math.log(d), d))
+        return [(d, table.cost(d), target // d, 0) for d in divisors[:self.factor_choice_count]]
+
+    def _plan_decomposition(self, target: int, memo: dict, budget: SearchBudget) -> Optional[int]:
+        """
+        混合基数的带符号余数分解：target = q*B + r，B 取 999/99/9，
+        q 取向下或向上取整（即 r >= 0 或 r < 0，包含四舍五入的平衡余数）；
+        有表中的因子 d 时另有乘法拆分 target = d*(target/d)。
+        对 q 和 |r| 做记忆化 DP，返回最少的⑨个数，所选拆分记在 memo[target] 中。
+        叶子为整数复杂度表中的最优解，之前请求规划过的状态直接取自 _decomposition_memo，
+        其余每个状态计入 budget 的节点数。
+        用显式栈按后序求解（子问题都有结果后再回到当前状态），深度不受递归上限限制。
+        """
+        table = self._get_expression_table()
+        shared = self._decomposition_memo
+        factor_basis = self._factor_basis(target)
+        # 乘法拆分只用于 target 及其经乘法拆分得到的余因子，加法拆分出的一般状态不再分解，避免状态数爆炸
+        cofactors = {target}
+        # 栈元素 (状态, 候选拆分, 是否经加法拆分到达)，候选为 None 表示第一次访问
+        stack = [(target, None, True)]
+        while stack:
+            value, choices, additive = stack.pop()
+            if value in memo:
+                continue
+            if choices is None:
+                if value in table:
+                    memo[value] = (table.cost(value), None, 0, 0)
+                    continue
+                if value in shared:
+                    memo[value] = shared[value]
+                    continue
+                budget.charge(1)
+                choices = []
+                if value in cofactors and not budget.exhausted():
+                    choices = self._factor_choices(value, factor_basis)
+                    cofactors.update(q for _, _, q, _ in choices)
+                # 只经乘法拆分到达、还能继续分解的余因子不做加法拆分（各余因子都做一遍 DP 代价太大）
+                if additive or not choices:
+                    # q 和 |r| 都必须严格小于 value，保证子问题规模递减
+                    choices = [(base, base_cost, q, r) for base, base_cost, q, r in self._decomposition_choices(value, budget)
+                               if q >= 1 and abs(r) < value] + choices
+                pending = [(part, base in DIGIT_BASES) for base, _, q, r in choices
+                           for part in (q if q > 1 else 0, abs(r)) if part and part not in memo]
+                if pending:
+                    stack.append((value, choices, additive))
+                    # 与递归版本相同的求解顺序：先 q 后 r，加法拆分的子问题先于乘法拆分的余因子
+                    stack.extend((part, None, from_additive) for part, from_additive in reversed(pending))
+                    continue
+
+            best = None
+            for base, base_cost, q, r in choices:
+                q_cost = memo[q][0] if q > 1 else 0
+                r_cost = memo[abs(r)][0] if r else 0
+                if q_cost is None or r_cost is None:
+                    continue
+                cost = base_cost + q_cost + r_cost
+                if best is None or cost < best[0]:
+                    best = (cost, base, q, r)
+            memo[value] = best if best is not None else (None, None, 0, 0)
+        return memo[target][0]
+
+    def _decomposition_node(self, target: int, memo: dict, budget: SearchBudget,
+                            nodes: Optional[dict] = None) -> ExpressionNode:
+        """
+        按 memo 中的拆分组合表达式树，q 为 1 时省略 "1*"。
+        用显式栈自底向上组合，重复出现的子目标共用同一棵子树，其双向搜索也只做一次；
+        传入 nodes 时已组合的子树跨调用共用（批量求解）。
+        """
+        table = self._get_expression_table()
+        shared = self._decomposition_memo
+        nodes = {} if nodes is None else nodes
+        stack = [target]
+        while stack:
+            value = stack[-1]
+            if value in nodes:
+                stack.pop()
+                continue
+            # 复用的状态只带回了自身，其下的拆分仍在共享 memo 中
+            cost, base, q, r = memo[value] if value in memo else shared[value]
+            if base is None:
+                nodes[value] = table.tree(value)
+                stack.pop()
+                continue
+            pending = [part for part in (q if q > 1 else 0, abs(r)) if part and part not in nodes]
+            if pending:
+                stack.extend(reversed(pending))
+                continue
+
+            stack.pop()
+            # 基数为 9/99/999，乘法拆分的因子取表中的表达式
+            base_node = Leaf(base) if base in DIGIT_BASES else table.tree(base)
+            node = base_node if q == 1 else BinOp('*', base_node, nodes[q])
+            if r > 0:
+                node = BinOp('+', node, nodes[r])
+            elif r < 0:
+                node = BinOp('-', node, nodes[-r])
+            nodes[value] = node if value == target else self._decomposition_part_node(value, node, cost, budget)
+        return nodes[target]
+
+    def _decomposition_part_node(self, target: int, node: ExpressionNode, cost: int,
+                                 budget: SearchBudget) -> ExpressionNode:
+        """子项：预算允许且中等大小时与双向搜索的结果比较⑨个数（node 为 cost 个），取较短者"""
+        if target <= self.bidirectional_number_threshold and not budget.exhausted():
+            searched = self._find_expression_bidirectional(target, timeout_ms=min(300, budget.share(2)))
+            budget.charge(self.last_search_expansions)
+            if searched and searched.count('9') < cost:
+                return Raw(searched)
+        return node
+
+    def _solve_decomposition_part(self, target: int, budget: SearchBudget) -> Optional[str]:
+        """超出直接搜索范围的目标：查表，中等大小时双向搜索（最多用一半预算）与分解比较⑨个数，取较短者"""
+        table = self._get_expression_table()
+        if target in table:
+            return table.expression(target)
+        searched = None
+        if abs(target) <= self.bidirectional_number_threshold and not budget.exhausted():
+            searched = self._find_expression_bidirectional(target, budget.share(2))
+            budget.charge(self.last_search_expansions)
+        decomposed = self._decompose_large_number(target, budget)
+        if searched and (not decomposed or searched.count('9') <= decomposed.count('9')):
+            return searched
+        return decomposed
+
+    def _find_expressions_frontier(self, targets: Set[int], timeout_ms: int = 1000) -> Dict[int, str]:
+        """
+        多个目标共用一次从基础数字出发、按⑨个数分层的前沿扩展（一致代价搜索），
+        每个新出层的值都在待求目标的哈希集合中查一次，命中即回溯出以⑨个数计最短的链式表达式。
+        全部命中、状态耗尽或超时时停止，返回已求出的 {目标: 表达式}（数字形式）。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        pending = set(targets)
+        max_allowed = min(max(max(abs(target) for target in pending) * 10, 10 ** 5), self.state_bitmap_limit // 2)
+        bases = sorted((value, cost) for value, (_, cost) in DIGIT_BASES.items())
+        max_base_cost = max(cost for _, cost in bases)
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        # 每个值当前的最小代价（0 表示未到达）；layers[c] 为代价为 c 的节点下标，可能含已被更便宜路径取代的条目
+        best_cost, offset = self._new_state_map(max_allowed)
+        layers = {}
+        for value, cost in bases:
+            best_cost[value + offset] = cost
+            layers.setdefault(cost, []).append(len(values))
+            values.append(value)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(value)
+
+        # 热循环中用到的方法提前绑定为局部变量
+        successors = self._chain_successors
+        operators = self.CHAIN_OPERATORS
+        check_interval = self.deadline_check_interval
+        found = {}
+        expansions = 0
+        cost = 0
+        timed_out = False
+        # 最近 max_base_cost 层都为空时不会再有新状态
+        while pending and not timed_out and any(layers.get(cost + c) for c in range(1, max_base_cost + 1)):
+            cost += 1
+            for index in layers.pop(cost, ()):
+                value = values[index]
+                if best_cost[value + offset] != cost:
+                    continue  # 已有更便宜路径，跳过过期条目
+                if value in pending:
+                    pending.discard(value)
+                    found[value] = self._build_path_expression(nodes, index)
+                    if not pending:
+                        break
+
+                expansions += 1
+                if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                    timed_out = True
+                    break
+
+                for base, base_cost in bases:
+                    new_cost = cost + base_cost
+                    if new_cost > 255:
+                        continue
+                    for op in operators:
+                        for new_value, step in successors(value, base, op):
+                            if abs(new_value) > max_allowed:
+                                continue
+                            known_cost = best_cost[new_value + offset]
+                            if known_cost == 0 or new_cost < known_cost:
+                                best_cost[new_value + offset] = new_cost
+                                layers.setdefault(new_cost, []).append(len(values))
+                                values.append(new_value)
+                                parents.append(index)
+                                steps.append(step)
+                                node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return found
+
+    def _decompose_batch(self, targets: List[int], budget: SearchBudget,
+                         searched: Set[int] = frozenset()) -> Dict[int, Optional[str]]:
+        """
+        批量分解（数字形式）：各目标共用同一份 DP memo 和已组合的子树，前面目标算过的商和余数后面直接复用。
+        整批共用 budget，每个目标分到剩余时间的均分份额，耗尽后余下的目标按贪心拆分；
+        全部目标都在各自份额内规划完时，memo 才并入跨请求的 _decomposition_memo。
+        searched 中的目标已由前沿求出最短的链式表达式，不再与双向搜索比较。
+        """
+        memo, nodes = {}, {}
+        complete = True
+        results = {}
+        ordered = sorted(targets, key=abs)
+        for index, target in enumerate(ordered):
+            magnitude = abs(target)
+            if magnitude > self.horner_number_threshold:
+                tree = Raw(''.join(self._iter_horner(self._balanced_digits(magnitude))))
             else:
-                quotient_expr = self._find_expression_with_timeout(quotient, timeout_ms=300)
-            if quotient_expr:
-                if remainder == 0:
-                    return f"999*({quotient_expr})"
-                remainder_expr = self._find_expression_with_timeout(remainder, timeout_ms=300)
-                if remainder_expr:
-                    return f"999*({quotient_expr})+({remainder_expr})"
-        
-        # 如果所有尝试都失败，返回None
-        return None
+                nodes_left = budget.max_nodes and max(0, budget.max_nodes - budget.nodes)
+                part = SearchBudget(budget.share(len(ordered) - index), nodes_left, budget.clock)
+                cost = self._plan_decomposition(magnitude, memo, part)
+                complete = complete and not part.exhausted()
+                if cost is None:
+                    budget.charge(part.nodes)
+                    results[target] = None
+                    continue
+                tree = self._decomposition_node(magnitude, memo, part, nodes)
+                if target not in searched:
+                    # 与单个求解一样，中等大小的目标整体再和双向搜索比较
+                    tree = self._decomposition_part_node(magnitude, tree, cost, part)
+                budget.charge(part.nodes)
+            results[target] = render(Neg(tree) if target < 0 else tree, 'digits')
+        if complete:
+            self._remember_decomposition(memo)
+        return results
+
+    def _solve_batch(self, targets: Iterable[int], timeout_ms: int = 1000) -> Dict[int, Optional[str]]:
+        """
+        批量求解（数字形式）：查表和结果缓存，小目标交给共用前沿，所有未查表命中的目标再批量分解。
+        与单个求解一样，前沿和分解共用一个 timeout_ms 的预算，分解的结果作为上界；
+        缓存中已有的小目标也参加前沿，每个目标取⑨最少的结果并写回结果缓存。
+        """
+        budget = SearchBudget(timeout_ms, self.max_search_nodes, self._cancellable_clock)
+        table = self._get_expression_table()
+        results = {}
+        pending = set()
+        for target in targets:
+            if target in results or target in pending:
+                continue
+            if target in table:
+                results[target] = table.expression(target)
+                continue
+            cached = self.result_cache.get(self._cache_key(target))
+            if cached is not None:
+                results[target] = cached
+            if cached is None or abs(target) <= self.batch_frontier_limit:
+                pending.add(target)
+
+        found = {}
+        small = {target for target in pending if abs(target) <= self.batch_frontier_limit}
+        if small:
+            # 前沿最多用一半预算，给分解留出时间（与单个求解中双向搜索的份额相同）
+            found = self._find_expressions_frontier(small, budget.share(2))
+            budget.charge(self.last_search_expansions)
+        decomposed = self._decompose_batch(list(pending), budget, set(found)) if pending else {}
+        for target in pending:
+            candidates = [result for result in (found.get(target), decomposed.get(target)) if result]
+            best = min(candidates, key=lambda result: result.count('9'), default=None)
+            cached = results.get(target)
+            if best is not None and (cached is None or best.count('9') < cached.count('9')):
+                self.result_cache.put(self._cache_key(target), best)
+                results[target] = best
+            elif cached is None:
+                results[target] = None
+        return results
+
+    def find_expressions(self, targets: Iterable[int], timeout_ms: int = 1000) -> Dict[int, str]:
+        """
+        批量求解许多目标，返回 {目标: 符号形式的表达式}（按输入顺序，找不到时为空串）。
+        不超过 batch_frontier_limit 的目标共用一次前沿扩展，逐个求解时重复的小数搜索只做一次，
+        结果也比逐个的启发式搜索更短；未查表命中的目标都再批量分解，共用商和余数的子结果，每个目标取⑨较少的结果。
+        整批共用 timeout_ms 的预算。
+        """
+        targets = list(targets)
+        results = self._solve_batch(targets, timeout_ms)
+        return {target: results[target].replace('9', '⑨ ') if results[target] else "" for target in targets}
+
+    def _power_ladder(self, target: int) -> List[int]:
+        """999 的反复平方幂 [999, 999^2, 999^4, ...]，直到超过 target 的平方根，在实例上复用"""
+        ladder = self._power_ladder_cache
+        while ladder[-1] * ladder[-1] <= target:
+            ladder.append(ladder[-1] * ladder[-1])
+        return ladder
+
+    def _base999_digits(self, target: int, level: int, count: int, digits):
+        """分治进制转换：target = A*999^(2^level) + B，把低位在前的 count 个数位追加到 digits（不足补 0）"""
+        if level < 0:
+            digits.append(target)
+            return
+        self.cancel_token.raise_if_cancelled()
+        high, low = divmod(target, self._power_ladder_cache[level])
+        half = 1 << level
+        self._base999_digits(low, level - 1, half, digits)
+        if high or count > half:
+            self._base999_digits(high, level - 1, count - half, digits)
+
+    def _balanced_digits(self, target: int):
+        """target (> 0) 的平衡 999 进制数位（-499..499，低位在前），存放在 int16 数组中"""
+        level = len(self._power_ladder(target)) - 1
+        digits = array('h')
+        self._base999_digits(target, level, 2 << level, digits)
+        while len(digits) > 1 and digits[-1] == 0:
+            digits.pop()
+        for i in range(len(digits)):
+            if digits[i] > 499:
+                digits[i] -= 999
+                if i + 1 == len(digits):
+                    digits.append(0)
+                digits[i + 1] += 1
+        return digits
+
+    def _iter_horner(self, digits) -> Iterator[str]:
+        """
+        按秦九韶（Horner）形式 999*(999*(...)+d1)+d0 逐个产出记号，
+        先产出全部左括号前缀，再由内向外产出各数位，整个表达式从不整体驻留内存。
+        """
+        table = self._get_expression_table()
+        top = len(digits) - 1
+        # 最高位为 1 时最内层省略 "1*"
+        bare_center = top > 0 and digits[top] == 1
+        for _ in range(top - 1 if bare_center else top):
+            yield '999*('
+        yield '999' if bare_center else table.expression(digits[top])
+        for i in range(top - 1, -1, -1):
+            if not (bare_center and i == top - 1):
+                yield ')'
+            digit = digits[i]
+            if digit > 0:
+                yield '+'
+                yield table.expression(digit)
+            elif digit < 0:
+                yield f"-({table.expression(-digit)})"
+
+    def iter_expression(self, target: int, timeout_ms: int = 1000, chunk_size: int = 1 << 16) -> Iterator[str]:
+        """
+        逐块产出符号形式的表达式（每块约 chunk_size 个字符）。
+        超长目标由 _iter_horner 边分解边输出，其余目标的结果本身不大，求出后整体产出。
+        """
+        if abs(target) > self.horner_number_threshold:
+            tokens = self._iter_horner(self._balanced_digits(abs(target)))
+            if target < 0:
+                tokens = itertools.chain(['-('], tokens, [')'])
+        else:
+            self.last_restart_seed = None
+            if self.restarts and abs(target) <= self.large_number_threshold:
+                result, self.last_restart_seed = self._solve_restarts(target, timeout_ms, self.restarts)
+            elif self.use_portfolio:
+                result = self._solve_portfolio(target, timeout_ms)
+            else:
+                result = self._find_expression_with_timeout(target, timeout_ms)
+            tokens = [result] if result else []
+
+        buffer = []
+        size = 0
+        for token in tokens:
+            buffer.append(token)
+            size += len(token)
+            if size >= chunk_size:
+                self.cancel_token.raise_if_cancelled()
+                yield ''.join(buffer).replace('9', '⑨ ')
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield ''.join(buffer).replace('9', '⑨ ')
+
+    def _chain_cost_lower_bound(self, target: int, deadline: float) -> int:
+        """链式表达式（启发式搜索和 A* 的结果）的⑨个数下界：各基础数字的代价加上 A* 周界给出的剩余代价下界"""
+        bases = sorted((value, cost) for value, (_, cost) in DIGIT_BASES.items())
+        exact, radius = self._astar_perimeter(target, bases, self._chain_value_bound(target), deadline)
+        return min(cost + exact.get(value, radius + 1) for value, cost in bases)
+
+    def _anytime_candidates(self, target: int, deadline: float) -> Iterator[Optional[str]]:
+        """iter_improvements 的候选结果（可能为 None），由快到慢；手写缓存命中时为⑨形式，⑨个数须用 expression_cost 计"""
+        table = self._get_expression_table()
+        if target in table:
+            yield table.expression(target)
+            return
 
-    def _find_expression_with_timeout(self, target: int, timeout_ms: int = 1000) -> Optional[str]:
-        # 对于大数绝对值直接使用分解策略
-        if abs(target) > 5000:
-            return self._decompose_large_number(target)
+        def remaining_ms() -> int:
+            return max(0, int((deadline - time.monotonic()) * 1000))
+
+        # 零预算的分解只走贪心拆分，毫秒级给出第一个结果
+        costs = []
+        if abs(target) <= self.horner_number_threshold:
+            result = self._decompose_large_number(target, SearchBudget(0, clock=self._cancellable_clock))
+            costs.append(expression_cost(result) if result else 255)
+            yield result
+        result = self._find_expression_with_timeout(target, remaining_ms())
+        costs.append(expression_cost(result) if result else 255)
+        yield result
+        if abs(target) > self.large_number_threshold:
+            return
+        # A* 在时限内搜完时给出最短的链式表达式，其⑨个数即启发式搜索所能达到的下界；
+        # 超时则用周界估计下界。余下的时间用不同 seed 的启发式搜索继续找更短的（见 _find_expression_best_first），
+        # 当前结果已不多于下界时重启不可能再改进
+        result = self._find_expression_astar(target, remaining_ms())
+        costs.append(expression_cost(result) if result else 255)
+        yield result
+        best_cost = min(costs)
+        lower_bound = expression_cost(result) if result else self._chain_cost_lower_bound(target, deadline)
+        while remaining_ms() > 0 and best_cost > lower_bound:
+            result = self._find_expression_best_first(target, remaining_ms(), random.getrandbits(32))
+            if result:
+                best_cost = min(best_cost, expression_cost(result))
+            yield result
+
+    def iter_improvements(self, target: int, timeout_ms: Optional[int] = None) -> Iterator[str]:
+        """
+        随时可用的求解：先产出贪心分解的结果（毫秒级），之后在截止前（默认 self.anytime_timeout_ms）依次尝试完整求解和多次重启，
+        每找到⑨严格更少的表达式就产出一次（符号形式）。调用方可随时停止迭代，最后产出的即当前最优。
+        """
+        if timeout_ms is None:
+            timeout_ms = self.anytime_timeout_ms
+        deadline = time.monotonic() + timeout_ms / 1000
+        best_cost = None
+        for result in self._anytime_candidates(target, deadline):
+            if result and (best_cost is None or expression_cost(result) < best_cost):
+                best_cost = expression_cost(result)
+                yield result.replace('9', '⑨ ')
+
+    def write_expression(self, target: int, stream, timeout_ms: int = 1000) -> bool:
+        """把表达式直接写入 stream（stdout 或文件），返回是否找到表达式"""
+        found = False
+        for chunk in self.iter_expression(target, timeout_ms):
+            stream.write(chunk)
+            found = True
+        return found
+
+    def find_expression_tree(self, target: int, timeout_ms: int = 1000) -> Optional[ExpressionNode]:
+        """
+        求解一次得到表达式树，再用 expression_tree.render 生成
+        'symbols'、'spaced'、'digits' 或 'html' 等多种形式，无需重复求解。
+        """
+        result = self._find_expression_with_timeout(target, timeout_ms)
+        return Raw(result) if result else None
+
+    def _direct_search_limit(self) -> int:
+        """直接搜索能处理的最大 |target|，超出时改用大数分解"""
+        if self.search_mode == 'vector' and vector_search_available():
+            return self.vector_number_threshold
+        return self.large_number_threshold
+
+    def _cache_key(self, target: int) -> tuple:
+        """结果缓存的键：目标和求解配置（基础数字、搜索目标即搜索模式、运算符集合），配置不同的结果互不混用"""
+        bases = tuple(sorted(int(num) for num in self.base_numbers))
+        return target, bases, self.search_mode, self.CHAIN_OPERATORS
+
+    def _find_expression_with_timeout(self, target: int, timeout_ms: int = 1000,
+                                      budget: Optional[SearchBudget] = None) -> Optional[str]:
+        # 整个请求共用一个预算：直接搜索和后续分解都从中扣除，总耗时不超过 timeout_ms
+        if budget is None:
+            budget = SearchBudget(timeout_ms, self.max_search_nodes, self._cancellable_clock)
+
+        # 整数复杂度表中已有最优解时直接查表
+        table = self._get_expression_table()
+        if target in table:
+            return table.expression(target)
+
+        # 对于大数绝对值直接使用分解策略（向量化搜索能直接处理的范围更大）
+        if abs(target) > self._direct_search_limit():
+            return self._solve_decomposition_part(target, budget)
         # 首先尝试启发式搜索
-        # 数学约束预判
-        self._disable_divisions = False
-        if target % 9 != 0:  # 不能被9整除时禁用除以9的操作
-            self._disable_divisions = True
-        start_time = time.time()
-
         if target in self.expression_cache:
             return self.expression_cache[target]
-
-        queue: List[Tuple[float, Expression]] = []
-        visited: Set[float] = set()
-
-        for num in self.base_numbers:
-            expr_str = str(num).replace('9', '⑨ ')  # 替换基础数字为符号
-            exp = Expression(float(num), str(num), set(), None)
-            queue.append((self._estimate_distance(exp.value, target), exp))
-            visited.add(exp.value)
-
-        while queue and (time.time() - start_time) * 1000 < timeout_ms:
-            import heapq
-            # 使用堆结构优化优先级队列
-            heapq.heapify(queue)
-            current_priority, current_exp = heapq.heappop(queue)
-
-            if self._is_integer(current_exp.value) and round(current_exp.value) == target:
-                result = self._simplify_expression(current_exp.expr)
-                self.expression_cache[target] = result
-                return result
-
-            # 动态获取运算符列表
-            operators = self._get_operators(target)
-            # 保留随机性但保持优先级
-            random.shuffle(operators)
-            # 将高优先级运算符移到前面
-            for op in ['*', '+']:
-                if op in operators:
-                    operators.remove(op)
-                    operators.insert(0, op)
-
-            for base_num in self.base_numbers:
-                base_exp = Expression(float(base_num), str(base_num), set(), None)
-
-                for op in operators:
-                    result = self._evaluate(current_exp, base_exp, op)
-                    if result and result.value not in visited and self._is_worth_exploring(result.value, target,
-                                                                                           visited):
-                        queue.append((self._estimate_distance(result.value, target), result))
-                        visited.add(result.value)
-
-                    if op in {'-', '/'}:
-                        reverse_result = self._evaluate(base_exp, current_exp, op)
-                        if reverse_result and reverse_result.value not in visited and self._is_worth_exploring(
-                                reverse_result.value, target, visited):
-                            queue.append((self._estimate_distance(reverse_result.value, target), reverse_result))
-                            visited.add(reverse_result.value)
-
-        # 如果启发式搜索失败，尝试大数分解
-        large_number_expr = self._decompose_large_number(target)
-        if large_number_expr:
-            return large_number_expr
-            
-        return None
+        cache_key = self._cache_key(target)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        if self.search_mode == 'vector' and vector_search_available():
+            result = self._find_expression_vector(target, budget.remaining_ms())
+        elif self.search_mode == 'astar':
+            # A* 模式：给出以⑨个数计最短的链式表达式
+            result = self._find_expression_astar(target, budget.remaining_ms())
+        else:
+            result = self._find_expression_best_first(target, budget.remaining_ms())
+        budget.charge(self.last_search_expansions)
+        # 搜索超时时用大数分解（预算已耗尽时为贪心拆分）；较大的目标上启发式搜索的链常比分解长，
+        # 搜索完成后再用剩余预算分解一次，取⑨较少者
+        if not result or abs(target) > self.decomposition_bound_threshold:
+            decomposed = self._decompose_large_number(target, budget)
+            if decomposed and (not result or decomposed.count('9') < result.count('9')):
+                result = decomposed
+        if result:
+            self.result_cache.put(cache_key, result)
+        return result
+
+    def _portfolio_strategies(self, target: int) -> List[str]:
+        """组合求解中适用于 target 的策略：各搜索只在其能处理的范围内参加，分解总是参加"""
+        size = abs(target)
+        strategies = []
+        if size <= self.large_number_threshold:
+            strategies += ['best_first', 'astar']
+        if size <= self.vector_number_threshold and vector_search_available():
+            strategies.append('vector')
+        if size <= self.bidirectional_number_threshold:
+            strategies.append('bidirectional')
+        strategies.append('decomposition')
+        return strategies
+
+    def _solve_with_strategy(self, strategy: str, target: int, timeout_ms: int) -> Optional[str]:
+        """只用一种策略求解（数字形式），供组合求解的工作进程调用；'best_first@seed' 为指定 seed 的启发式搜索"""
+        strategy, _, seed = strategy.partition('@')
+        if strategy == 'decomposition':
+            return self._decompose_large_number(target, SearchBudget(timeout_ms, self.max_search_nodes))
+        if strategy == 'bidirectional':
+            return self._find_expression_bidirectional(target, timeout_ms)
+        if strategy == 'vector':
+            return self._find_expression_vector(target, timeout_ms)
+        if strategy == 'astar':
+            return self._find_expression_astar(target, timeout_ms)
+        return self._find_expression_best_first(target, timeout_ms, int(seed) if seed else None)
+
+    def _solve_portfolio(self, target: int, timeout_ms: int = 1000, objective: str = 'best',
+                         on_result=None) -> Optional[str]:
+        """组合求解（数字形式）：查表命中或目标超长时不启动进程池"""
+        table = self._get_expression_table()
+        if target in table:
+            return table.expression(target)
+        if abs(target) > self.horner_number_threshold:
+            return self._find_expression_with_timeout(target, timeout_ms)
+        result = self.portfolio.run(target, self._portfolio_strategies(target), timeout_ms, objective, on_result,
+                                    cancel_token=self.cancel_token)
+        return result.expression
+
+    def find_expression_portfolio(self, target: int, timeout_ms: int = 1000, objective: str = 'best') -> str:
+        """
+        各策略（启发式、A*、向量化、双向搜索和大数分解）在进程池中同时求解，共用 timeout_ms 的截止时间。
+        objective 为 'best' 时返回截止前⑨最少的结果，为 'first' 时返回最先得到的结果；
+        各策略在每个规模档的胜率见 self.portfolio.stats，长期不胜的策略会被自动跳过。
+        """
+        result = self._solve_portfolio(target, timeout_ms, objective)
+        return result.replace('9', '⑨ ') if result else ""
+
+    def _solve_restarts(self, target: int, timeout_ms: int = 1000, restarts: Optional[int] = None,
+                        objective: str = 'best', seeds: Optional[List[int]] = None) -> Tuple[Optional[str], Optional[int]]:
+        """多次重启（数字形式），返回 (表达式, 胜出的 seed)；查表命中时 seed 为 None"""
+        table = self._get_expression_table()
+        if target in table:
+            return table.expression(target), None
+        if seeds is None:
+            seeds = [random.getrandbits(32) for _ in range(restarts or self.portfolio.workers)]
+        result = self.portfolio.run(target, [f'best_first@{seed}' for seed in seeds], timeout_ms, objective,
+                                    adaptive=False, cancel_token=self.cancel_token)
+        if result.expression is None:
+            return None, None
+        return result.expression, int(result.strategy.partition('@')[2])
+
+    def find_expression_restarts(self, target: int, restarts: Optional[int] = None, timeout_ms: int = 1000,
+                                 objective: str = 'best', seeds: Optional[List[int]] = None) -> Tuple[str, Optional[int]]:
+        """
+        多次重启：restarts 个（默认与进程数相同）不同 seed 的启发式搜索在进程池中同时运行，
+        objective 为 'best' 时取⑨最少的结果，为 'first' 时取最先得到的结果。
+        返回 (表达式, 胜出的 seed)，用 seeds=[seed] 可复现该结果；超出直接搜索范围的目标按常规求解，seed 为 None。
+        """
+        if abs(target) > self.large_number_threshold:
+            return self.find_expression(target, timeout_ms), None
+        result, seed = self._solve_restarts(target, timeout_ms, restarts, objective, seeds)
+        return (result.replace('9', '⑨ '), seed) if result else ("", None)
 
     def _find_best_split_pos(self, tokens: list) -> int:
         for i in reversed(range(len(tokens))):
@@ -610,8 +1567,8 @@ class ImprovedNineExpressionFinder:
                 return i
         return -1
 
-    def find_expression(self, target: int) -> str:
-        result = self._find_expression_with_timeout(target)
+    def find_expression(self, target: int, timeout_ms: int = 1000) -> str:
+        result = self._find_expression_with_timeout(target, timeout_ms)
         if result:
             # 如果原始表达式存在，转换为符号形式
             symbol_result = result.replace('9', '⑨ ')
@@ -619,16 +1576,37 @@ class ImprovedNineExpressionFinder:
         return ""
 
 
+_portfolio_finder = None
+
+
+def _solve_portfolio_strategy(strategy: str, target: int, timeout_ms: int) -> Optional[str]:
+    """组合求解的工作进程入口：每个进程只建一个求解器，复用其表和分解 memo"""
+    global _portfolio_finder
+    if _portfolio_finder is None:
+        _portfolio_finder = ImprovedNineExpressionFinder()
+    return _portfolio_finder._solve_with_strategy(strategy, target, timeout_ms)
+
+
 def main():
-    app_args = sys.argv if hasattr(sys, 'argv') else ['']
+    import argparse
+    parser = argparse.ArgumentParser(description="⑨表达式求解器")
+    parser.add_argument('--cache-file', nargs='?', const=default_cache_path(), default=None,
+                        help="把结果持久缓存到该文件（省略文件名时为各版本共用的默认位置），不加则只用内存缓存")
+    args, qt_args = parser.parse_known_args()
+    ImprovedNineExpressionFinder.persistent_cache_path = args.cache_file
+    app_args = [sys.argv[0]] + qt_args
     q_app = QApplication.instance()
     if q_app is None:
         q_app = QApplication(app_args)
 
+    # 允许输入和打印超过 4300 位的整数（Python 3.11+ 默认有限制）
+    if hasattr(sys, 'set_int_max_str_digits'):
+        sys.set_int_max_str_digits(0)
+
     finder = ImprovedNineExpressionFinder()
 
     print("\n欢迎使用⑨ 表达式求解器！")
-    print("\nF/NF 控制Fumo, q退出")
+    print("\nF/NF 控制Fumo, A/NA 控制A*最短搜索, V/NV 控制向量化搜索, P/NP 控制组合求解, R/NR 控制多次重启, \"目标 > 文件\" 写入文件, q退出")
     # ... (打印提示) ...
 
     while True:
@@ -657,21 +1635,73 @@ def main():
             finder.show_fumo_splash = False
             print("Fumo彩蛋 (GUI窗口) 已关闭。")
             continue
+        elif user_input.upper() == 'A':
+            finder.search_mode = 'astar'
+            print("A* 最短表达式搜索已开启！")
+            continue
+        elif user_input.upper() == 'NA':
+            finder.search_mode = 'best_first'
+            print("A* 搜索已关闭，恢复启发式搜索。")
+            continue
+        elif user_input.upper() == 'V':
+            finder.search_mode = 'vector'
+            print("NumPy 向量化搜索已开启！" if vector_search_available() else "未安装 NumPy，无法开启向量化搜索。")
+            continue
+        elif user_input.upper() == 'NV':
+            finder.search_mode = 'best_first'
+            print("向量化搜索已关闭，恢复启发式搜索。")
+            continue
+        elif user_input.upper() == 'P':
+            finder.use_portfolio = True
+            print(f"组合求解已开启（{finder.portfolio.workers} 个进程同时运行各策略）！")
+            continue
+        elif user_input.upper() == 'NP':
+            finder.use_portfolio = False
+            print("组合求解已关闭。")
+            continue
+        elif user_input.upper() == 'R':
+            finder.restarts = finder.portfolio.workers
+            print(f"多次重启已开启（{finder.restarts} 个不同 seed 的搜索同时运行）！")
+            continue
+        elif user_input.upper() == 'NR':
+            finder.restarts = 0
+            print("多次重启已关闭。")
+            continue
+
+        # "目标 > 文件名" 时把表达式直接写入文件
+        output_path = None
+        if '>' in user_input:
+            user_input, output_path = (part.strip() for part in user_input.split('>', 1))
 
         try:
             # ... (解析 target) ...
-            if 'e' in user_input.lower(): target = int(float(user_input))
+            if 'e' in user_input.lower(): target = int(Decimal(user_input))  # 1e100000 之类的大数不经过 float
             else: target = int(user_input)
 
-            print(f"正在为 {target} 寻找表达式...")
+            print(f"正在为 {target} 寻找表达式...（Ctrl+C 取消）")
+            # 求解期间 Ctrl+C 只取消当前请求，回到输入提示
+            finder.cancel_token = CancellationToken()
+            signal.signal(signal.SIGINT, lambda *_: finder.cancel_token.cancel())
             start_time = time.time()
-            expr = finder.find_expression(target)
-            elapsed_time = time.time() - start_time
-
-            if expr:
-                print(f"\n结果 ({elapsed_time:.2f}s):")
-                # wrapped_expr = finder._wrap_expression(expr)
-                print(f"{target} = {expr}") # 直接打印原始表达式
+            # 表达式逐块写出，超长结果不会在内存中整体拼接
+            chunks = finder.iter_expression(target)
+            first_chunk = next(chunks, None)
+
+            if first_chunk is not None:
+                if output_path:
+                    with open(output_path, 'w', encoding='utf-8') as output:
+                        output.write(first_chunk)
+                        for chunk in chunks:
+                            output.write(chunk)
+                    print(f"\n结果 ({time.time() - start_time:.2f}s) 已写入 {output_path}")
+                else:
+                    print("\n结果:")
+                    sys.stdout.write(f"{target} = {first_chunk}")
+                    for chunk in chunks:
+                        sys.stdout.write(chunk)
+                    print(f"\n({time.time() - start_time:.2f}s)")
+                if finder.restarts and finder.last_restart_seed is not None:
+                    print(f"seed: {finder.last_restart_seed}（复现：find_expression_restarts({target}, seeds=[{finder.last_restart_seed}])）")
                 print("\033[38;2;1;101;204mbaka~\033[0m")
                 finder.play_baka_sound()
 
@@ -684,10 +1714,14 @@ def main():
                         time.sleep(0.01) # 短暂休眠，让其他线程（如音频）也有机会
             else:
                 print(f"未能找到 {target} 的表达式。")
-        except ValueError:
+        except SolveCancelled:
+            print("\n已取消。")
+        except (ValueError, ArithmeticError):  # Decimal 解析失败抛出 InvalidOperation
             print("请输入有效整数或科学计数法(如1e3)！")
         except Exception as e:
             print(f"发生意外错误: {e}")
+        finally:
+            signal.signal(signal.SIGINT, signal.default_int_handler)
 
     # ---- 在主循环结束后，可以考虑退出QApplication (如果它是唯一用途) ----
     # if q_app:
@@ -0,0 +1,140 @@
+# result_cache.py
+# 有界的结果缓存：条目数和字节数双重上限，按 LRU 或访问频率（LFU）淘汰，并统计命中率
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, NamedTuple
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    entries: int
+    bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class LRUCache:
+    """
+    最近最少使用淘汰。值的大小按 sys.getsizeof 计，单个超过 max_bytes 的值不缓存。
+    加锁后可被多个线程（如 GUI 的各个 WorkerThread）共用。
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 16 << 20):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        self._entries = OrderedDict()  # 键 -> (值, 字节数)，按最近访问排序
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._touch(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any):
+        size = sys.getsizeof(value)
+        with self._lock:
+            if key in self._entries:
+                self._discard(key)
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+            while self._entries and (len(self._entries) >= self.max_entries or self.bytes + size > self.max_bytes):
+                self._discard(self._victim())
+                self.evictions += 1
+            self._insert(key, value, size)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._discard(key)
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, self.evictions, len(self._entries), self.bytes)
+
+    # 以下为淘汰策略的钩子，调用时已持有锁
+    def _touch(self, key: Hashable):
+        self._entries.move_to_end(key)
+
+    def _victim(self) -> Hashable:
+        return next(iter(self._entries))
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        self._entries[key] = (value, size)
+        self.bytes += size
+
+    def _discard(self, key: Hashable):
+        _, size = self._entries.pop(key)
+        self.bytes -= size
+
+
+class LFUCache(LRUCache):
+    """
+    按访问次数淘汰，次数相同时淘汰最久未用的（O(1) 的分桶实现）。
+    热门目标长期驻留，只查一次的大目标先被挤出，适合访问分布长尾的常驻后端。
+    """
+
+    def __init__(self, max_entries: int = 4096, max_bytes: int = 16 << 20):
+        super().__init__(max_entries, max_bytes)
+        self._frequency = {}  # 键 -> 访问次数
+        self._buckets = {}  # 访问次数 -> 该次数的键（OrderedDict，按最近访问排序）
+        self._min_frequency = 0
+
+    def _touch(self, key: Hashable):
+        frequency = self._frequency[key]
+        self._unlink(key, frequency)
+        if self._min_frequency == frequency and frequency not in self._buckets:
+            self._min_frequency = frequency + 1
+        self._frequency[key] = frequency + 1
+        self._buckets.setdefault(frequency + 1, OrderedDict())[key] = None
+
+    def _victim(self) -> Hashable:
+        # 删除条目可能清空最小次数的桶，此时重新找最小值
+        if self._min_frequency not in self._buckets:
+            self._min_frequency = min(self._buckets)
+        return next(iter(self._buckets[self._min_frequency]))
+
+    def _insert(self, key: Hashable, value: Any, size: int):
+        super()._insert(key, value, size)
+        self._frequency[key] = 1
+        self._buckets.setdefault(1, OrderedDict())[key] = None
+        self._min_frequency = 1
+
+    def _discard(self, key: Hashable):
+        super()._discard(key)
+        self._unlink(key, self._frequency.pop(key))
+
+    def _unlink(self, key: Hashable, frequency: int):
+        bucket = self._buckets[frequency]
+        del bucket[key]
+        if not bucket:
+            del self._buckets[frequency]
+
+
+CACHE_POLICIES = {'lru': LRUCache, 'lfu': LFUCache}
+
+
+def make_cache(policy: str = 'lru', max_entries: int = 4096, max_bytes: int = 16 << 20) -> LRUCache:
+    """按名字创建缓存：'lru' 或 'lfu'"""
+    if policy not in CACHE_POLICIES:
+        raise ValueError(f"未知的缓存策略: {policy}")
+    return CACHE_POLICIES[policy](max_entries, max_bytes)
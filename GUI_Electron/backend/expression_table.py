@@ -0,0 +1,361 @@
+# expression_table.py
+# 离线"整数复杂度"表：为区间 [-limit, limit] 内每个整数求出代价最小的⑨表达式（由 frequently_used_number_generater.py 生成文件）
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from expression_tree import BinOp, ExpressionNode, Leaf
+
+try:
+    import numpy as np
+except ImportError:  # 没有 NumPy 时构建表退回逐个组合的纯 Python 循环
+    np = None
+
+# 运算符编码（0 表示尚未求解）
+OP_LEAF = 1
+OP_ADD = 2
+OP_SUB = 3
+OP_MUL = 4
+OP_DIV = 5
+OP_SYMBOLS = {OP_ADD: '+', OP_SUB: '-', OP_MUL: '*', OP_DIV: '/'}
+
+# 基础数字 -> (字符串表示, 代价)，代价为⑨符号个数
+DIGIT_BASES = {9: ('9', 1), 99: ('99', 2), 999: ('999', 3)}
+SYMBOL_BASES = {9: ('⑨', 1), 99: ('⑨⑨', 2), 999: ('⑨⑨⑨', 3), 3: ('√⑨', 1)}
+
+# 二进制表文件格式（小端）：64 字节文件头，随后依次为
+# lefts(int32) | rights(int32) | costs(uint8) | ops(uint8)，每个数组长 2*limit+1
+TABLE_MAGIC = b'NINETBL\0'
+TABLE_VERSION = 1
+HEADER = struct.Struct('<8sIqI')
+HEADER_SIZE = 64
+DEFAULT_TABLE_FILE = 'expression_table.bin'
+# 求解器按 999 进制拆分时每一位（|v| <= 998）都直接查表，表的范围不能比这更小
+MIN_TABLE_LIMIT = 999
+
+# 向量化构建时每块组合的 (x, y) 对数上限，以及值得分给进程池的单层组合数
+BLOCK_PAIRS = 1 << 20
+PARALLEL_LAYER_PAIRS = 1 << 22
+
+
+def base_fingerprint(base_map: Dict[int, Tuple[str, int]]) -> int:
+    """基础数字集合的指纹，防止用错表文件（符号不影响表内容）"""
+    key = ','.join(f"{value}:{cost}" for value, (_, cost) in sorted(base_map.items()))
+    return zlib.crc32(key.encode('ascii'))
+
+
+def _precedence(op: int) -> int:
+    if op in (OP_ADD, OP_SUB):
+        return 1
+    if op in (OP_MUL, OP_DIV):
+        return 2
+    return 3
+
+
+class ExpressionTable:
+    """已求解表达式表：每个整数对应最小代价、运算符和两个操作数回指"""
+
+    def __init__(self, limit: int, base_map: Dict[int, Tuple[str, int]],
+                 costs, ops, lefts, rights, mapping: Optional[mmap.mmap] = None):
+        self.limit = limit
+        self.base_map = base_map
+        # 四个定长数组均以 value + limit 为下标
+        self.costs = costs
+        self.ops = ops
+        self.lefts = lefts
+        self.rights = rights
+        # 从文件加载时持有 mmap，保证数组视图有效
+        self._mapping = mapping
+
+    def save(self, path: str):
+        """以紧凑的二进制格式写出表；先写临时文件再替换，正在 mmap 旧表的进程不受影响"""
+        header = HEADER.pack(TABLE_MAGIC, TABLE_VERSION, self.limit, base_fingerprint(self.base_map))
+        lefts = array('i', self.lefts)
+        rights = array('i', self.rights)
+        if sys.byteorder != 'little':
+            lefts.byteswap()
+            rights.byteswap()
+        temp_path = path + '.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(header.ljust(HEADER_SIZE, b'\0'))
+            f.write(lefts.tobytes())
+            f.write(rights.tobytes())
+            f.write(bytes(self.costs))
+            f.write(bytes(self.ops))
+        os.replace(temp_path, path)
+
+    @classmethod
+    def load(cls, path: str, base_map: Dict[int, Tuple[str, int]], min_limit: int = 0) -> 'ExpressionTable':
+        """用 mmap 加载表文件：不拷贝数据，多个进程共享同一份页缓存；范围小于 ±min_limit 的表文件不可用"""
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, limit, fingerprint = HEADER.unpack_from(mapping, 0)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION:
+            mapping.close()
+            raise ValueError(f"不是有效的表文件: {path}")
+        if fingerprint != base_fingerprint(base_map):
+            mapping.close()
+            raise ValueError(f"表文件的基础数字集合不匹配: {path}")
+        if limit < min_limit:
+            mapping.close()
+            raise ValueError(f"表文件的范围 ±{limit} 小于所需的 ±{min_limit}: {path}")
+        size = 2 * limit + 1
+        if len(mapping) != HEADER_SIZE + 10 * size:
+            mapping.close()
+            raise ValueError(f"表文件长度不正确: {path}")
+
+        view = memoryview(mapping)
+        offset = HEADER_SIZE
+        lefts = view[offset:offset + 4 * size]
+        offset += 4 * size
+        rights = view[offset:offset + 4 * size]
+        offset += 4 * size
+        costs = view[offset:offset + size]
+        offset += size
+        ops = view[offset:offset + size]
+        if sys.byteorder == 'little':
+            lefts = lefts.cast('i')
+            rights = rights.cast('i')
+        else:
+            # 大端机器上无法直接映射，退化为拷贝后字节序翻转
+            lefts, rights = array('i', lefts), array('i', rights)
+            lefts.byteswap()
+            rights.byteswap()
+        return cls(limit, base_map, costs, ops, lefts, rights, mapping=mapping)
+
+    def __contains__(self, value: int) -> bool:
+        return -self.limit <= value <= self.limit and self.ops[value + self.limit] != 0
+
+    def __len__(self) -> int:
+        return sum(1 for op in self.ops if op)
+
+    def cost(self, value: int) -> Optional[int]:
+        if value not in self:
+            return None
+        return self.costs[value + self.limit]
+
+    def expression(self, value: int) -> Optional[str]:
+        """沿回指重建表达式字符串"""
+        if value not in self:
+            return None
+        return self._render(value)[0]
+
+    def tree(self, value: int) -> Optional[ExpressionNode]:
+        """沿回指重建不可变表达式树，可与分解结果直接组合"""
+        if value not in self:
+            return None
+        index = value + self.limit
+        op = self.ops[index]
+        if op == OP_LEAF:
+            return Leaf(value)
+        return BinOp(OP_SYMBOLS[op], self.tree(self.lefts[index]), self.tree(self.rights[index]))
+
+    def _render(self, value: int) -> Tuple[str, int]:
+        index = value + self.limit
+        op = self.ops[index]
+        if op == OP_LEAF:
+            return self.base_map[value][0], op
+
+        left_str, left_op = self._render(self.lefts[index])
+        right_str, right_op = self._render(self.rights[index])
+        precedence = _precedence(op)
+        if _precedence(left_op) < precedence:
+            left_str = f"({left_str})"
+        # 右操作数在 '-' 和 '/' 下同级也要加括号
+        right_precedence = _precedence(right_op)
+        if right_precedence < precedence or (right_precedence == precedence and op in (OP_SUB, OP_DIV)):
+            right_str = f"({right_str})"
+        return f"{left_str}{OP_SYMBOLS[op]}{right_str}", op
+
+
+def _combine_rows(task) -> tuple:
+    """
+    向量化地组合：lefts 中每个 x 与 rights 中每个 y 做四则运算，展开顺序与逐个枚举相同
+    （x、y、运算符 '-' '+' '*' '/'），按每块约 BLOCK_PAIRS 对分块计算。
+    只保留区间内、且 unsolved 中标记为未求解的值，块内每个值只留第一次出现，
+    按出现顺序返回 (值, 运算符, x, y) 四个数组。模块级函数，可交给进程池执行。
+    """
+    lefts, rights, commutative, limit, unsolved = task
+    rows = max(1, BLOCK_PAIRS // len(rights))
+    y = rights[None, :]
+    # 不能整除（或除数为 0）时用区间外的值占位，随后被范围掩码剔除
+    nonzero = y != 0
+    divisor = np.where(nonzero, y, 1)
+    op_codes = np.array([OP_SUB, OP_ADD, OP_MUL, OP_DIV] if commutative else [OP_SUB, OP_DIV], dtype=np.uint8)
+    width = len(op_codes)
+    results = []
+    for start in range(0, len(lefts), rows):
+        block = lefts[start:start + rows]
+        x = block[:, None]
+        shape = (len(block), len(rights))
+        columns = [x - y]
+        if commutative:
+            columns.append(x + y)
+            columns.append(x * y)
+        columns.append(np.where(nonzero & (x % divisor == 0), x // divisor, limit + 1))
+        values = np.stack([np.broadcast_to(column, shape) for column in columns], axis=-1).reshape(-1)
+
+        positions = np.nonzero(np.abs(values) <= limit)[0]
+        positions = positions[unsolved[values[positions] + limit]]
+        _, first = np.unique(values[positions], return_index=True)
+        positions = positions[np.sort(first)]
+        pairs = positions // width
+        results.append((values[positions], op_codes[positions % width],
+                        block[pairs // shape[1]], rights[pairs % shape[1]]))
+    return tuple(np.concatenate(parts) for parts in zip(*results))
+
+
+class ExpressionTableBuilder:
+    """
+    按代价逐层构造表：第 c 层由所有代价为 a 与 c-a 的已解子表达式两两组合得到，
+    因此第一次到达某个值时的代价即为最小代价（中间结果限制在区间内），每个值只存一次。
+    有 NumPy 时每对 (a, c-a) 的组合按块批量计算，workers > 1 时大层的块分给进程池；
+    同一个值在一层中多次出现时总取枚举顺序中的第一次，结果与纯 Python 循环逐字节相同。
+    """
+
+    def __init__(self, limit: int = 2000, max_cost: int = 16,
+                 base_map: Optional[Dict[int, Tuple[str, int]]] = None, workers: int = 1):
+        self.limit = limit
+        self.max_cost = max_cost
+        self.base_map = base_map if base_map is not None else DIGIT_BASES
+        self.workers = workers
+
+    def build(self, progress: Optional[Callable[[int, int, int, int], None]] = None) -> ExpressionTable:
+        """
+        逐层求解；每完成一层调用 progress(代价, 已求解个数, 区间大小, 累计组合次数)。
+        遍历顺序固定，同样的参数总是得到逐字节相同的表。
+        """
+        limit = self.limit
+        size = 2 * limit + 1
+        costs = bytearray(size)
+        ops = bytearray(size)
+        lefts = array('i', bytes(4 * size))
+        rights = array('i', bytes(4 * size))
+        levels: List[List[int]] = [[] for _ in range(self.max_cost + 1)]
+        solved = 0
+
+        # 基础数字作为叶子，同值取代价更小者
+        for value, (_, cost) in sorted(self.base_map.items(), key=lambda item: item[1][1]):
+            if -limit <= value <= limit and not ops[value + limit] and cost <= self.max_cost:
+                costs[value + limit] = cost
+                ops[value + limit] = OP_LEAF
+                lefts[value + limit] = value
+                levels[cost].append(value)
+                solved += 1
+
+        arrays = (costs, ops, lefts, rights)
+        if np is not None:
+            self._combine_vectorized(arrays, levels, solved, progress)
+        else:
+            self._combine_python(arrays, levels, solved, progress)
+        return ExpressionTable(limit, self.base_map, costs, ops, lefts, rights)
+
+    def _combine_python(self, arrays, levels, solved: int, progress):
+        limit = self.limit
+        size = 2 * limit + 1
+        costs, ops, lefts, rights = arrays
+        combinations = 0
+        for cost in range(2, self.max_cost + 1):
+            if solved == size:
+                break
+            new_values = levels[cost]
+            for left_cost in range(1, cost):
+                right_cost = cost - left_cost
+                # '+' 和 '*' 满足交换律，只需组合一次
+                commutative = left_cost <= right_cost
+                right_level = levels[right_cost]
+                combinations += len(levels[left_cost]) * len(right_level)
+                for x in levels[left_cost]:
+                    for y in right_level:
+                        candidates = [(x - y, OP_SUB)]
+                        if commutative:
+                            candidates.append((x + y, OP_ADD))
+                            candidates.append((x * y, OP_MUL))
+                        if y != 0 and x % y == 0:
+                            candidates.append((x // y, OP_DIV))
+                        for value, op in candidates:
+                            if -limit <= value <= limit:
+                                index = value + limit
+                                if not ops[index]:
+                                    costs[index] = cost
+                                    ops[index] = op
+                                    lefts[index] = x
+                                    rights[index] = y
+                                    new_values.append(value)
+                                    solved += 1
+            if progress is not None:
+                progress(cost, solved, size, combinations)
+
+    def _combine_vectorized(self, arrays, levels, solved: int, progress):
+        limit = self.limit
+        size = 2 * limit + 1
+        # 直接在表的缓冲区上建数组视图，写入即写表
+        costs, ops, lefts, rights = (np.frombuffer(buffer, dtype=dtype) for buffer, dtype in
+                                     zip(arrays, (np.uint8, np.uint8, np.int32, np.int32)))
+        levels = [np.array(level, dtype=np.int64) for level in levels]
+        pool = None
+        combinations = 0
+        try:
+            for cost in range(2, self.max_cost + 1):
+                if solved == size:
+                    break
+                # 大层分给进程池：每种 (a, c-a) 组合的左层切成若干段，每段一个任务
+                shapes = [(levels[left_cost], levels[cost - left_cost], left_cost <= cost - left_cost)
+                          for left_cost in range(1, cost)
+                          if len(levels[left_cost]) and len(levels[cost - left_cost])]
+                layer_pairs = sum(len(left) * len(right) for left, right, _ in shapes)
+                combinations += layer_pairs
+                parallel = self.workers > 1 and layer_pairs >= PARALLEL_LAYER_PAIRS
+                pieces = self.workers * 4 if parallel else 1
+                unsolved = ops == 0
+                tasks = []
+                for left_level, right_level, commutative in shapes:
+                    step = -(-len(left_level) // pieces)
+                    for start in range(0, len(left_level), step):
+                        tasks.append((left_level[start:start + step], right_level, commutative, limit, unsolved))
+
+                if parallel:
+                    if pool is None:
+                        pool = ProcessPoolExecutor(max_workers=self.workers)
+                    results = list(pool.map(_combine_rows, tasks))
+                else:
+                    results = [_combine_rows(task) for task in tasks]
+
+                if results:
+                    values, value_ops, xs, ys = (np.concatenate(parts) for parts in zip(*results))
+                    # 各任务已去掉更低代价求解过的值，这里按任务顺序取每个值的第一次出现
+                    _, first = np.unique(values, return_index=True)
+                    picked = np.sort(first)
+                    indices = values[picked] + limit
+                    costs[indices] = cost
+                    ops[indices] = value_ops[picked]
+                    lefts[indices] = xs[picked]
+                    rights[indices] = ys[picked]
+                    levels[cost] = np.concatenate([levels[cost], values[picked]])
+                    solved += len(picked)
+                if progress is not None:
+                    progress(cost, solved, size, combinations)
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+
+def load_or_build(directory: str, base_map: Dict[int, Tuple[str, int]], limit: int) -> ExpressionTable:
+    """
+    优先映射目录下预先生成的表文件，不存在、不匹配或范围小于 ±limit 时在进程内构建小表。
+    limit 不足 MIN_TABLE_LIMIT 时按 MIN_TABLE_LIMIT 计。
+    """
+    limit = max(limit, MIN_TABLE_LIMIT)
+    path = os.path.join(directory, DEFAULT_TABLE_FILE)
+    if os.path.exists(path):
+        try:
+            return ExpressionTable.load(path, base_map, min_limit=limit)
+        except (OSError, ValueError) as e:
+            print(f" [提示] 表文件不可用，改为现场构建: {e}")
+    return ExpressionTableBuilder(limit=limit, base_map=base_map).build()
+
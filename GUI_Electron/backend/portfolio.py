@@ -0,0 +1,252 @@
+# portfolio.py
+# 组合求解：几种策略在进程池中同时求解同一目标、共用一个截止时间，按目标规模统计各策略的胜率
+import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from fractions import Fraction
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+from cancellation import CancellationToken, SolveCancelled
+from expression_tree import OPERATOR_PRECEDENCE, to_digits
+
+# 最后一个分支匹配其它任何字符，使无法识别的输入整体无效而不是被跳过
+_TOKEN = re.compile(r'√9|[0-9]+|[()+\-*/]|.', re.DOTALL)
+
+
+def size_class(target: int) -> int:
+    """目标的规模档：二进制位数每翻一倍升一档"""
+    return abs(int(target)).bit_length().bit_length()
+
+
+def expression_cost(expression: str) -> int:
+    """表达式中⑨的个数（⑨ 符号形式或数字形式均可）"""
+    return to_digits(expression).count('9')
+
+
+def evaluate(expression: str) -> Optional[Fraction]:
+    """
+    精确求值（9/99/999、√⑨、+-*/ 和括号，⑨ 符号形式或数字形式均可），
+    除以 0 或无法解析时返回 None。显式栈的调度场算法，任意长的表达式都不会递归过深。
+    """
+    values: List[Fraction] = []
+    operators: List[str] = []  # '(' 或运算符，'neg' 为取负
+
+    def reduce():
+        op = operators.pop()
+        if op == 'neg':
+            values.append(-values.pop())
+            return
+        right = values.pop()
+        left = values.pop()
+        if op == '+':
+            values.append(left + right)
+        elif op == '-':
+            values.append(left - right)
+        elif op == '*':
+            values.append(left * right)
+        else:
+            values.append(left / right)
+
+    text = ''.join(to_digits(expression).split())
+    expect_operand = True
+    try:
+        for token in _TOKEN.findall(text):
+            if expect_operand:
+                if token == '(':
+                    operators.append(token)
+                elif token == '-':
+                    operators.append('neg')
+                elif token == '√9':
+                    values.append(Fraction(3))
+                    expect_operand = False
+                elif token.isascii() and token.isdigit():
+                    values.append(Fraction(int(token)))
+                    expect_operand = False
+                else:
+                    return None
+            elif token == ')':
+                while operators[-1] != '(':
+                    reduce()
+                operators.pop()
+            elif token in OPERATOR_PRECEDENCE:
+                precedence = OPERATOR_PRECEDENCE[token]
+                # 左结合：同级的先算；取负的优先级高于所有二元运算
+                while operators and operators[-1] != '(' and (
+                        operators[-1] == 'neg' or OPERATOR_PRECEDENCE[operators[-1]] >= precedence):
+                    reduce()
+                operators.append(token)
+                expect_operand = True
+            else:
+                return None
+        if expect_operand:
+            return None
+        while operators:
+            if operators[-1] == '(':
+                return None
+            reduce()
+    except (IndexError, ZeroDivisionError):
+        return None
+    return values[0] if len(values) == 1 else None
+
+
+class StrategyStats(NamedTuple):
+    runs: int
+    wins: int
+    total_ms: float
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.runs if self.runs else 0.0
+
+
+class PortfolioStats:
+    """
+    每个规模档内各策略的运行次数、获胜次数（给出截止前⑨最少的结果）和总耗时，加锁后可跨线程共用。
+    运行满 min_runs 次仍几乎不胜（胜率低于 min_win_rate）的策略在该档被跳过，
+    每档每 explore_interval 个请求仍全部运行一次，让被跳过的策略有机会恢复。
+    """
+
+    def __init__(self, min_runs: int = 20, min_win_rate: float = 0.05, explore_interval: int = 10):
+        self.min_runs = min_runs
+        self.min_win_rate = min_win_rate
+        self.explore_interval = explore_interval
+        self._stats: Dict[int, Dict[str, StrategyStats]] = {}
+        self._requests: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def select(self, size: int, strategies: List[str]) -> List[str]:
+        """本次要运行的策略（保持原顺序），至少保留胜率最高的一个"""
+        with self._lock:
+            requests = self._requests.get(size, 0)
+            self._requests[size] = requests + 1
+            stats = self._stats.get(size, {})
+            if requests % self.explore_interval == 0:
+                return list(strategies)
+            kept = [name for name in strategies
+                    if name not in stats or stats[name].runs < self.min_runs
+                    or stats[name].win_rate >= self.min_win_rate]
+            if not kept and strategies:
+                kept = [max(strategies, key=lambda name: stats[name].win_rate)]
+            return kept
+
+    def record(self, size: int, strategy: str, won: bool, elapsed_ms: float):
+        with self._lock:
+            runs, wins, total_ms = self._stats.setdefault(size, {}).get(strategy, StrategyStats(0, 0, 0.0))
+            self._stats[size][strategy] = StrategyStats(runs + 1, wins + won, total_ms + elapsed_ms)
+
+    def snapshot(self) -> Dict[int, Dict[str, StrategyStats]]:
+        with self._lock:
+            return {size: dict(stats) for size, stats in self._stats.items()}
+
+
+class PortfolioResult(NamedTuple):
+    expression: Optional[str]  # 截止前⑨最少的结果，objective 为 'first' 时为最先得到的结果
+    strategy: Optional[str]
+    cost: Optional[int]
+    first_strategy: Optional[str]  # 最先给出有效结果的策略及其用时
+    first_ms: Optional[float]
+    elapsed_ms: float
+
+
+def _timed_solve(solve: Callable[[str, int, int], Optional[str]], strategy: str, target: int,
+                 deadline: float) -> tuple:
+    """在工作进程中运行：按剩余时间求解并计时（截止时间用墙上时钟，跨进程可比）"""
+    start = time.time()
+    timeout_ms = max(1, int((deadline - start) * 1000))
+    return solve(strategy, target, timeout_ms), (time.time() - start) * 1000
+
+
+class PortfolioSolver:
+    """
+    solve(策略名, 目标, 毫秒) 为模块级函数（可被 pickle），在工作进程中执行并返回表达式或 None。
+    各策略同时提交，结果经 evaluate 核对后才算有效；进程池在第一次求解时创建，之后复用。
+    """
+
+    cancel_poll_interval = 0.05  # 有取消令牌时等待结果的最长间隔（秒）
+
+    def __init__(self, solve: Callable[[str, int, int], Optional[str]], workers: int,
+                 stats: Optional[PortfolioStats] = None):
+        self.solve = solve
+        self.workers = max(1, workers)
+        self.stats = stats if stats is not None else PortfolioStats()
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool
+
+    def run(self, target: int, strategies: List[str], timeout_ms: int, objective: str = 'best',
+            on_result: Optional[Callable[[str, str], None]] = None, adaptive: bool = True,
+            cancel_token: Optional[CancellationToken] = None) -> PortfolioResult:
+        """
+        objective 为 'best' 时等到截止或全部策略结束，返回⑨最少的结果；为 'first' 时返回最先得到的有效结果。
+        on_result(表达式, 策略名) 在得到第一个有效结果和之后每次更优的结果时调用。
+        adaptive 为 False 时（如同一搜索的多次重启）全部运行，也不计入胜率。
+        cancel_token 被取消时撤销尚未开始的策略并抛出 SolveCancelled（已在运行的策略到截止时间自行结束），不计入胜率。
+        """
+        if objective not in ('best', 'first'):
+            raise ValueError(f"未知的优化目标: {objective}")
+        start = time.time()
+        deadline = start + timeout_ms / 1000
+        size = size_class(target)
+        pool = self._executor()
+        selected = self.stats.select(size, strategies) if adaptive else strategies
+        futures = {pool.submit(_timed_solve, self.solve, name, target, deadline): name for name in selected}
+        pending = set(futures)
+        finished = {}  # 策略名 -> (⑨个数或 None, 用时)
+        best = first = None  # (⑨个数, 表达式, 策略名)
+        first_ms = None
+        while pending:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            if cancel_token is not None:
+                if cancel_token.cancelled:
+                    for future in pending:
+                        future.cancel()
+                    raise SolveCancelled()
+                remaining = min(remaining, self.cancel_poll_interval)
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = futures[future]
+                try:
+                    expression, elapsed_ms = future.result()
+                except Exception:
+                    expression, elapsed_ms = None, (time.time() - start) * 1000
+                cost = None
+                if expression and evaluate(expression) == target:
+                    cost = expression_cost(expression)
+                    if first is None:
+                        first = (cost, expression, name)
+                        first_ms = (time.time() - start) * 1000
+                    if best is None or cost < best[0]:
+                        best = (cost, expression, name)
+                        if on_result is not None:
+                            on_result(expression, name)
+                finished[name] = (cost, elapsed_ms)
+            if objective == 'first' and first is not None:
+                break
+        for future in pending:
+            future.cancel()
+
+        chosen = first if objective == 'first' else best
+        for name in futures.values() if adaptive else ():
+            if name in finished:
+                self.stats.record(size, name, chosen is not None and name == chosen[2], finished[name][1])
+            elif objective == 'best':
+                # 截止前没结束的策略按用满时间计
+                self.stats.record(size, name, False, float(timeout_ms))
+        if chosen is None:
+            return PortfolioResult(None, None, None, None, None, (time.time() - start) * 1000)
+        cost, expression, name = chosen
+        return PortfolioResult(expression, name, cost, first[2], first_ms, (time.time() - start) * 1000)
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
@@ -0,0 +1,140 @@
+# vector_search.py
+# NumPy 向量化的分层前沿搜索（NumPy 为可选依赖，缺失时调用方退回逐节点搜索）
+from typing import Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 步骤编码与 main.py 中 CHAIN_OPERATORS 一致：运算符下标*2 + (基础数字是否在左侧)
+STEP_ADD = 0
+STEP_SUB = 2
+STEP_RSUB = 3
+STEP_MUL = 4
+STEP_DIV = 6
+STEP_RDIV = 7
+
+
+def vector_search_available() -> bool:
+    return np is not None
+
+
+class VectorFrontierSearch:
+    """
+    按代价（⑨个数）分层的链式搜索：第 c 层由第 c-cost(b) 层整体与基础数字 b 做四则运算得到。
+    每层的前沿是一个 int64 数组，'/' 用整除掩码、范围用 |v| <= max_allowed 掩码，
+    层内用 np.unique 去重、层间用布尔位图去重，回指存放在并行数组中。
+    """
+
+    def __init__(self, base_map: Dict[int, Tuple[str, int]], max_allowed: int):
+        if np is None:
+            raise RuntimeError("向量化搜索需要 NumPy")
+        self.bases = sorted((value, cost) for value, (_, cost) in base_map.items())
+        self.max_allowed = max_allowed
+        self.expansions = 0
+        self.values = self.parents = self.steps = self.node_bases = None
+
+    def _expand(self, frontier, indices, base: int):
+        """整层前沿与基础数字 b 的所有组合，返回 (新值, 父节点下标, 步骤编码)"""
+        chunks = [
+            (frontier + base, indices, STEP_ADD),
+            (frontier - base, indices, STEP_SUB),
+            (base - frontier, indices, STEP_RSUB),
+            (frontier * base, indices, STEP_MUL),
+        ]
+        divisible = frontier % base == 0
+        chunks.append((frontier[divisible] // base, indices[divisible], STEP_DIV))
+        nonzero = frontier != 0
+        divisors = frontier[nonzero]
+        divides = base % divisors == 0
+        chunks.append((base // divisors[divides], indices[nonzero][divides], STEP_RDIV))
+
+        values = np.concatenate([chunk[0] for chunk in chunks])
+        parents = np.concatenate([chunk[1] for chunk in chunks])
+        steps = np.concatenate([np.full(len(chunk[0]), chunk[2], dtype=np.uint8) for chunk in chunks])
+        return values, parents, steps
+
+    def search(self, target: int, deadline: float, clock) -> Optional[int]:
+        """搜索到目标时返回其节点下标；超时或层全部为空时返回 None"""
+        max_allowed = self.max_allowed
+        offset = max_allowed
+        if abs(target) > max_allowed:
+            return None
+        visited = np.zeros(2 * max_allowed + 1, dtype=np.bool_)
+
+        max_base_cost = max(cost for _, cost in self.bases)
+        values = [np.array([value for value, _ in self.bases], dtype=np.int64)]
+        parents = [np.full(len(self.bases), -1, dtype=np.int64)]
+        steps = [np.zeros(len(self.bases), dtype=np.uint8)]
+        node_bases = [values[0].copy()]
+        visited[values[0] + offset] = True
+        node_count = len(self.bases)
+
+        # layers[c] = (该层节点的全局下标, 该层的值)
+        layers = {}
+        for cost in sorted({cost for _, cost in self.bases}):
+            mask = np.array([c == cost for _, c in self.bases])
+            layers[cost] = (np.nonzero(mask)[0].astype(np.int64), values[0][mask])
+
+        found = None
+        leaf_hits = np.nonzero(values[0] == target)[0]
+        if len(leaf_hits):
+            found = int(leaf_hits[0])
+
+        cost = 1
+        self.expansions = 0
+        while found is None and clock() < deadline:
+            cost += 1
+            # 最近 max_base_cost 层都为空时不会再有新状态
+            if all(len(layers.get(cost - c, ((), ()))[1]) == 0 for c in range(1, max_base_cost + 1)):
+                break
+
+            new_values, new_parents, new_steps, new_bases = [], [], [], []
+            for base, base_cost in self.bases:
+                layer = layers.get(cost - base_cost)
+                if layer is None or len(layer[1]) == 0:
+                    continue
+                indices, frontier = layer
+                self.expansions += len(frontier)
+                candidates, candidate_parents, candidate_steps = self._expand(frontier, indices, base)
+                new_values.append(candidates)
+                new_parents.append(candidate_parents)
+                new_steps.append(candidate_steps)
+                new_bases.append(np.full(len(candidates), base, dtype=np.int64))
+
+            # 代价恰为 cost 的基础数字（如 99、999）本身也属于这一层
+            leaves = layers.get(cost, (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)))
+            if not new_values:
+                layers[cost] = leaves
+                continue
+            candidates = np.concatenate(new_values)
+            keep = np.abs(candidates) <= max_allowed
+            keep[keep] = ~visited[candidates[keep] + offset]
+            candidates = candidates[keep]
+            # 层内去重，保留第一次出现的位置，保证结果确定
+            candidates, first = np.unique(candidates, return_index=True)
+            order = np.argsort(first, kind='stable')
+            candidates = candidates[order]
+            picked = np.nonzero(keep)[0][first[order]]
+
+            visited[candidates + offset] = True
+            layer_indices = np.arange(node_count, node_count + len(candidates), dtype=np.int64)
+            node_count += len(candidates)
+            values.append(candidates)
+            parents.append(np.concatenate(new_parents)[picked])
+            steps.append(np.concatenate(new_steps)[picked])
+            node_bases.append(np.concatenate(new_bases)[picked])
+            layers[cost] = (np.concatenate([leaves[0], layer_indices]), np.concatenate([leaves[1], candidates]))
+            # 超过最大基础代价的旧层不再需要
+            layers.pop(cost - max_base_cost - 1, None)
+
+            hits = np.nonzero(candidates == target)[0]
+            if len(hits):
+                found = int(layer_indices[hits[0]])
+
+        self.values = np.concatenate(values)
+        self.parents = np.concatenate(parents)
+        self.steps = np.concatenate(steps)
+        self.node_bases = np.concatenate(node_bases)
+        return found
\ No newline at end of file
@@ -0,0 +1,28 @@
+# cancellation.py
+# 协作式取消：求解请求持有一个令牌，搜索和分解循环在检查超时的同时检查它，被取消时抛出 SolveCancelled
+import threading
+
+
+class SolveCancelled(Exception):
+    """求解请求已被取消（通常是被新的请求取代）"""
+
+
+class CancellationToken:
+    """
+    一次求解请求的取消标志，可在任意线程中调用 cancel()。
+    令牌只能取消一次，新的请求应使用新的令牌。
+    """
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise SolveCancelled()
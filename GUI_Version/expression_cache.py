@@ -124,6 +124,6 @@ EXPRESSION_CACHE = {
     1998: '999+999',
     222: '(999+999)/9',
     2997: '(999+999)+999',
-    1919810: '999*(999+99*9+9*(9-(((9-99/9)*9-9)/9+9)+(9 +9+9)/9)+99*((9-9/9)+9)+9*(9-(9+9+9+9)/9)+(9+9)/9)',
-    114514: '(999*(99-((99-9-9)+99)/9)+9+9+9+9))-99*(9-(((9-99/9)*9-9)/9+9)-9*(9-9/9)-(9+9)/9)',
+    1919810: '999*(99*(9+9+9/9)+((9*9*9-9)/(9+9)))+(9*9*9+(9+9)/9)',
+    114514: '(((((9+9)*9-9)*9+9+9+9+9)*9+9)*9*9-99)/9-9',
 }
\ No newline at end of file
@@ -0,0 +1,149 @@
+# expression_tree.py
+# 不可变表达式树：分解时每次组合只建一个节点（O(1)），最后一次性序列化为 ⑨ 符号、数字或 HTML
+from typing import Iterator, NamedTuple, Optional, Union
+
+OPERATOR_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2}
+ATOM_PRECEDENCE = 3
+
+# 叶子的数字形式，其它形式都由数字形式逐字符转换得到
+LEAF_TEXT = {9: '9', 99: '99', 999: '999', 3: '√9'}
+
+# 输出形式 -> 字符转换表
+RENDERINGS = {
+    'digits': str.maketrans({}),
+    'symbols': str.maketrans({'9': '⑨'}),
+    'spaced': str.maketrans({'9': '⑨ '}),  # 命令行版的 "⑨ ⑨ ⑨ " 风格
+    'html': str.maketrans({'9': '⑨', '-': '&minus;', '*': '&times;', '/': '&divide;',
+                           '<': '&lt;', '>': '&gt;', '&': '&amp;'}),
+}
+
+
+class Leaf(NamedTuple):
+    """基础数字（9、99、999，GUI 版还有 √⑨ 即 3）"""
+    value: int
+
+
+class Raw(NamedTuple):
+    """
+    已经生成的数字形式子表达式（如搜索结果），按其顶层运算符参与加括号；
+    precedence 已知时可直接给出，省去扫描 text。
+    """
+    text: str
+    precedence: Optional[int] = None
+
+
+class Name(NamedTuple):
+    """按名字引用的子表达式（如共享幂 P3），原样输出，不做字符转换"""
+    text: str
+
+
+class BinOp(NamedTuple):
+    op: str
+    left: 'ExpressionNode'
+    right: 'ExpressionNode'
+
+
+class Neg(NamedTuple):
+    """取负，序列化为 -(...)"""
+    operand: 'ExpressionNode'
+
+
+ExpressionNode = Union[Leaf, Raw, Name, BinOp, Neg]
+
+
+def to_digits(text: str) -> str:
+    """⑨ 符号形式的字符串转回数字形式，供 Raw 使用"""
+    return text.replace('⑨ ', '9').replace('⑨', '9')
+
+
+def _text_precedence(text: str) -> int:
+    """字符串表达式在括号外最低的运算符优先级"""
+    if text.startswith('-'):
+        return 1
+    depth = 0
+    precedence = ATOM_PRECEDENCE
+    for char in text:
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif depth == 0 and char in OPERATOR_PRECEDENCE:
+            precedence = min(precedence, OPERATOR_PRECEDENCE[char])
+    return precedence
+
+
+def precedence(node: ExpressionNode) -> int:
+    if isinstance(node, BinOp):
+        return OPERATOR_PRECEDENCE[node.op]
+    if isinstance(node, Raw):
+        return node.precedence if node.precedence is not None else _text_precedence(node.text)
+    if isinstance(node, Neg):
+        return 1
+    return ATOM_PRECEDENCE
+
+
+def iter_tokens(node: ExpressionNode, rendering: str = 'digits') -> Iterator[str]:
+    """
+    用显式栈按中序产出 rendering 形式的记号，括号规则与 _format_operand 相同：
+    左操作数优先级更低时加括号，右操作数优先级更低、或在 '-'、'/' 下同级时加括号。
+    不递归，任意深的树都能序列化。
+    """
+    table = RENDERINGS[rendering]
+    leaf_text = {value: text.translate(table) for value, text in LEAF_TEXT.items()}
+    operator_text = {op: op.translate(table) for op in OPERATOR_PRECEDENCE}
+    negate = '-('.translate(table)
+    stack = [node]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        item = pop()
+        kind = type(item)
+        if kind is str:
+            yield item
+        elif kind is Leaf:
+            yield leaf_text[item.value]
+        elif kind is BinOp:
+            op, left, right = item
+            op_precedence = OPERATOR_PRECEDENCE[op]
+            right_precedence = OPERATOR_PRECEDENCE[right.op] if type(right) is BinOp else precedence(right)
+            if right_precedence < op_precedence or (right_precedence == op_precedence and op in '-/'):
+                stack.extend((')', right, '('))
+            else:
+                push(right)
+            push(operator_text[op])
+            left_precedence = OPERATOR_PRECEDENCE[left.op] if type(left) is BinOp else precedence(left)
+            if left_precedence < op_precedence:
+                stack.extend((')', left, '('))
+            else:
+                push(left)
+        elif kind is Raw:
+            yield item.text.translate(table)
+        elif kind is Name:
+            yield item.text
+        else:
+            stack.extend((')', item.operand, negate))
+
+
+def iter_chunks(node: ExpressionNode, rendering: str = 'symbols', chunk_size: int = 1 << 16) -> Iterator[str]:
+    """按 rendering 形式逐块产出序列化结果"""
+    buffer = []
+    size = 0
+    for token in iter_tokens(node, rendering):
+        buffer.append(token)
+        size += len(token)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def flatten(node: ExpressionNode) -> Raw:
+    """把子树预先序列化成 Raw，供反复引用的小子树使用，之后每次输出只需一个记号"""
+    return Raw(render(node, 'digits'), precedence(node))
+
+
+def render(node: ExpressionNode, rendering: str = 'symbols') -> str:
+    """一次性序列化：'digits'、'symbols'、'spaced' 或 'html'"""
+    return ''.join(iter_tokens(node, rendering))
@@ -8,6 +8,8 @@ from PyQt6.QtCore import Qt, QThread, pyqtSignal, QPropertyAnimation, QEasingCur
 from PyQt6.QtGui import QFont, QIcon, QColor, QPixmap, QPalette, QImage, QTextCursor, QPaintEvent, QScreen, QMouseEvent, QResizeEvent
 
 from main import ImprovedNineExpressionFinder
+from cancellation import CancellationToken, SolveCancelled
+from persistent_cache import default_cache_path
 from typing import Optional
 from Icon_Data import ICON_DATA
 from setting_grey import SETTING_GREY
@@ -281,19 +283,35 @@ DARK_STYLESHEET_INACTIVE_BASE = """
 
 class WorkerThread(QThread):
     result_ready = pyqtSignal(str, str, float)
+    progress_ready = pyqtSignal(str, str, float)  # 计算期间⑨更少的中间结果
     error_occurred = pyqtSignal(str)
 
     def __init__(self, target):
         super().__init__()
         self.target = target
+        self.cancel_token = CancellationToken()
+
+    def cancel(self):
+        """请求停止计算：搜索和分解循环下一次检查时退出，不再发出任何信号"""
+        self.cancel_token.cancel()
 
     def run(self):
         try:
             finder = ImprovedNineExpressionFinder()
+            finder.cancel_token = self.cancel_token
             start = time.time()
-            expr = finder.find_expression(self.target)
-            elapsed = time.time() - start
-            self.result_ready.emit(str(self.target), expr, elapsed)
+            expr = ""
+            # 第一个结果（毫秒级）立即显示，之后每找到⑨更少的就作为进度发出，替换显示中的结果
+            for improvement in finder.iter_improvements(self.target):
+                if not expr:
+                    self.result_ready.emit(str(self.target), improvement, time.time() - start)
+                else:
+                    self.progress_ready.emit(str(self.target), improvement, time.time() - start)
+                expr = improvement
+            if not expr:
+                self.result_ready.emit(str(self.target), expr, time.time() - start)
+        except SolveCancelled:
+            pass
         except Exception as e:
             self.error_occurred.emit(str(e))
             
@@ -965,6 +983,8 @@ class NineSolverGUI(QMainWindow):
         self.ICON_DATA = ICON_DATA
         # 存储所有成功计算的结果
         self.historical_results = []
+        self.worker = None
+        self._cancelled_workers = set()  # 已取消但尚未退出的线程，结束前保留引用
         
         # 新增：预加载设置图标
         self.setting_icon_light = QIcon(QPixmap.fromImage(QImage.fromData(base64.b64decode(SETTING_GREY))))
@@ -1714,6 +1734,16 @@ class NineSolverGUI(QMainWindow):
         else:
             self.status_label.setText("未找到结果")
 
+    def show_progress(self, target_str: str, expr_str: str, elapsed: float):
+        """结果显示后找到的更短表达式：替换该目标最近一条结果，状态栏显示当前⑨个数"""
+        for entry in reversed(self.historical_results):
+            if entry.get('target') == target_str and entry.get('expr'):
+                entry['expr'] = expr_str
+                entry['elapsed'] = elapsed
+                self._render_all_historical_results()
+                self.status_label.setText(f"已找到 {expr_str.count('⑨')} 个⑨ 的结果 - 耗时 {elapsed:.2f}秒")
+                break
+
     def on_enter_pressed(self):
         self.calculate_btn.triggerAnimation()
         self.calculate_btn.click()
@@ -1831,7 +1861,8 @@ class NineSolverGUI(QMainWindow):
             else:
                 target_value = int(input_text)
             
-            self.calculate_btn.setEnabled(False)
+            # 计算期间按钮保持可用：提交新目标时取消仍在计算的旧目标
+            self._cancel_running_worker()
             
             # "计算中..." 的提示处理
             if not self.accumulate_results:
@@ -1849,6 +1880,7 @@ class NineSolverGUI(QMainWindow):
 
             self.worker = WorkerThread(target_value)
             self.worker.result_ready.connect(self.show_result)
+            self.worker.progress_ready.connect(self.show_progress)
             self.worker.error_occurred.connect(self.on_worker_error) # <--- 改用新槽函数
             self.worker.finished.connect(self.cleanup_after_calculation)
             self.worker.start()
@@ -1899,6 +1931,17 @@ class NineSolverGUI(QMainWindow):
             self.status_label.setStyleSheet("color: #aaaaaa; font-style: italic;")
         else:
             self.status_label.setStyleSheet("color: #6c757d; font-style: italic;")    
+    def _cancel_running_worker(self):
+        """取消仍在计算的上一个目标并断开其信号，旧结果不会再显示；运行中的 QThread 被回收会崩溃，故先保留引用"""
+        worker = self.worker
+        if worker is None or not worker.isRunning():
+            return
+        worker.cancel()
+        for signal in (worker.result_ready, worker.progress_ready, worker.error_occurred, worker.finished):
+            signal.disconnect()
+        self._cancelled_workers.add(worker)
+        worker.finished.connect(lambda: self._cancelled_workers.discard(worker))
+
     def cleanup_after_calculation(self):
         """计算完成后清理输入框并恢复按钮状态"""
         self.input_field.clear()
@@ -1997,13 +2040,22 @@ class NineSolverGUI(QMainWindow):
         self.result_display.ensureCursorVisible()
     
     def closeEvent(self, event):
-        # 直接关闭程序
+        # 直接关闭程序，正在进行的计算一并取消
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.cancel()
+            self.worker.wait()
         event.accept()
         
 
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    import argparse
+    parser = argparse.ArgumentParser(description="⑨表达式求解器")
+    parser.add_argument('--cache-file', nargs='?', const=default_cache_path(), default=None,
+                        help="把结果持久缓存到该文件（省略文件名时为各版本共用的默认位置），不加则只用内存缓存")
+    args, qt_args = parser.parse_known_args()
+    ImprovedNineExpressionFinder.persistent_cache_path = args.cache_file
+    app = QApplication([sys.argv[0]] + qt_args)
     
     # 设置应用程序字体
     font = QFont()
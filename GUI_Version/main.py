@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional, Set, List, Tuple
+from typing import Dict, Iterable, Iterator, Optional, Set, List, Tuple
+import heapq
 import math
 import time
 import random
@@ -7,10 +8,20 @@ import re
 import wave
 import pyaudio
 import io
+import os
 import base64
 import threading
+from array import array
 import gmpy2
 from gmpy2 import mpz
+from expression_table import load_or_build, SYMBOL_BASES
+from result_cache import make_cache
+from persistent_cache import TieredCache, open_persistent_cache
+from expression_tree import BinOp, ExpressionNode, Leaf, Name, Neg, Raw, flatten, render, to_digits
+from factorization import divisors_up_to, factorize, small_primes
+from cancellation import CancellationToken
+from portfolio import PortfolioSolver
+from vector_search import VectorFrontierSearch, vector_search_available
 
 @dataclass
 class Expression:
@@ -28,9 +39,34 @@ class Expression:
         return hash(self.value)
 
 
+class SparseFlags(dict):
+    """值域过大、无法用位图时的退化形式：与 bytearray 相同的下标读写接口，底层是哈希表"""
+
+    def __missing__(self, key):
+        return 0
+
+
 class ImprovedNineExpressionFinder:
+    # 链式搜索的运算符，下标用于节点的步骤编码
+    CHAIN_OPERATORS = ('+', '-', '*', '/')
+    # 进程内共享的整数复杂度表，首次查询时构建（每个 WorkerThread 都会新建查找器）
+    _expression_table = None
+    expression_table_limit = 2000
+    _symbolized_cache = None
+    # 进程内共享的有界结果缓存（见 result_cache.py），各个 WorkerThread 新建的实例共用同一个
+    _result_cache = None
+    result_cache_policy = 'lru'  # 'lru' 或 'lfu'
+    result_cache_entries = 4096
+    result_cache_bytes = 16 << 20
+    # 内存缓存之后的磁盘缓存（见 persistent_cache.py），各版本共用一个文件；默认不用，各入口加 --cache-file 时在创建实例前设置
+    persistent_cache_path = None
+    # 搜索或分解的结果会因代码改动而不同时递增，使磁盘上的旧结果失效
+    CACHE_ENGINE_VERSION = 2
+    # 组合求解（见 portfolio.py）的进程池和各策略胜率，进程内共享，进程池在第一次组合求解时创建
+    _portfolio = None
+    portfolio_workers = os.cpu_count() or 1
+
     def __init__(self):
-        self._disable_divisions = False
         self.base_number_map = {
             mpz(9): '⑨',
             mpz(99): '⑨⑨',
@@ -41,11 +77,46 @@ class ImprovedNineExpressionFinder:
         from baka_sound import BAKA_DATA
         self.BAKA_DATA = BAKA_DATA
         self.large_number_threshold = 5000  # 大数阈值
-        from expression_cache import EXPRESSION_CACHE
-        self.expression_cache = EXPRESSION_CACHE
+        self.search_mode = 'best_first'  # 小目标搜索策略：'best_first'、'astar' 或 'vector'（需要 NumPy）
+        self.vector_number_threshold = 200000  # 向量化搜索可直接处理的目标上限
+        self.decomposition_bound_threshold = 2000  # 直接搜索的目标超过此值时，结果再与大数分解比较，取⑨较少者
+        self.deadline_check_interval = 64  # 每扩展多少个节点检查一次超时（同时检查取消）
+        self.astar_perimeter_states = 20000  # A* 周界启发从目标反向搜索的状态数上限
+        self.anytime_timeout_ms = 900  # iter_improvements 的默认时限（毫秒），到时或结果达到下界即停止
+        self.cancel_token = CancellationToken()  # 每个新请求换一个新令牌，取消旧令牌即停止旧请求
+        self.last_search_expansions = 0
+        self.last_search_rate = 0.0  # 最近一次搜索每秒扩展的节点数
+        self.state_bitmap_limit = 1 << 26  # 状态位图最多 64MB，超出则退化为哈希表
+        self.decomposition_dp_limit = mpz(10) ** 60  # 超过此值的分解只用 ⑨⑨⑨ 作基数
+        self.divide_and_conquer_digits = 1000  # 超过此位数时改用分治进制转换（DP 的每个状态都是大数除法）
+        self._power_ladder_cache = [mpz(999)]
+        self.decomposition_memo_limit = 1 << 18  # 跨请求复用的分解子问题条目上限，0 表示不复用
+        self._decomposition_memo = {}
+        self.batch_frontier_limit = 10 ** 5  # 批量求解中不超过此值的目标共用一次前沿扩展
+        self.factor_trial_limit = 1000  # 乘法拆分：试除的素数上限，更大的素因子由 Pollard rho 寻找
+        self.factor_rho_iterations = 4096
+        self.factor_choice_count = 3  # 每个状态最多尝试的乘法拆分数
+        self._factor_primes = None
+        self.output_mode = 'infix'  # 'infix' 输出普通中缀表达式，'program' 输出共享幂 let 绑定程序
+        # 手写缓存只在进程内转换一次符号，大批量结果由 mmap 表提供
+        cls = type(self)
+        if cls._symbolized_cache is None:
+            from expression_cache import EXPRESSION_CACHE
+            cls._symbolized_cache = {k: v.replace('9', '⑨') for k, v in EXPRESSION_CACHE.items()}
+        self.expression_cache = cls._symbolized_cache  # 只读，不再为每个实例复制
+        # 搜索结果的缓存可替换为任何带 get/put 的对象，如 make_cache('lfu')
+        if cls._result_cache is None:
+            cls._result_cache = make_cache(cls.result_cache_policy, cls.result_cache_entries, cls.result_cache_bytes)
+            if cls.persistent_cache_path:
+                disk = open_persistent_cache(cls.persistent_cache_path, cls.CACHE_ENGINE_VERSION)
+                if disk is not None:
+                    cls._result_cache = TieredCache(cls._result_cache, disk)
+        self.result_cache = cls._result_cache
+        self.use_portfolio = False  # 为 True 时各策略在进程池中同时求解，取截止前⑨最少的结果
+        if cls._portfolio is None:
+            cls._portfolio = PortfolioSolver(_solve_portfolio_strategy, cls.portfolio_workers)
+        self.portfolio = cls._portfolio
         self.max_line_length = 60  # 调整行长度
-        # 将缓存中的表达式转换为符号形式
-        self.expression_cache = {k: v.replace('9', '⑨') for k, v in self.expression_cache.items()}
         # 为新的分解算法预先计算好构造块
         self.greedy_blocks = self._precompute_greedy_blocks()
 
@@ -78,6 +149,15 @@ class ImprovedNineExpressionFinder:
         blocks.sort(key=lambda item: item[0], reverse=True)
         return blocks
     
+    def _get_expression_table(self):
+        """获取整数复杂度表（同一进程内只加载一次）"""
+        cls = type(self)
+        if cls._expression_table is None:
+            # 目录下有离线生成的 expression_table.bin 时直接 mmap，否则现场构建小表
+            cls._expression_table = load_or_build(os.path.dirname(os.path.abspath(__file__)),
+                                                  SYMBOL_BASES, cls.expression_table_limit)
+        return cls._expression_table
+
     def play_baka_sound(self):
         thread = threading.Thread(target=self._play_audio, daemon=True)
         thread.start()
@@ -146,30 +226,6 @@ class ImprovedNineExpressionFinder:
     def _simplify_expression(self, expr: str) -> str:
         return expr.replace('+-', '-').replace('-+', '-')
 
-    def _is_integer(self, num: float) -> bool:
-        return abs(num - round(num)) < 1e-10
-
-    def _estimate_distance(self, value: float, target: int) -> float:
-        return abs(value - target)
-
-    def _diversity_score(self, operators_used: set) -> float:
-        score = len(operators_used) * 2
-        if '*' in operators_used:
-            score += 3
-        return score
-
-    def _is_worth_exploring(self, value: mpz, target: mpz, visited: Set[mpz]) -> bool:
-        # 使用gmpy2，理论上没有上限，但为了防止状态空间爆炸，仍然可以设置一个阈值
-        factor = 100
-        max_allowed = abs(target) * factor if target != 0 else mpz(10**7)
-        if abs(value) > max_allowed:
-            return False
-        
-        # 状态空间限制
-        if len(visited) > 100000: # 限制BFS的搜索广度
-            return False
-        return True
-
     def _format_operand(self, exp: Expression, parent_op: str, is_right_operand: bool = False) -> str:
         if exp.operator is None:
             return exp.expr
@@ -185,9 +241,8 @@ class ImprovedNineExpressionFinder:
                 need_parenthesis = True
         elif parent_op in {'-', '/'}:
             if is_right_operand:
-                if current_precedence < parent_precedence:
-                    need_parenthesis = True
-                elif current_precedence == parent_precedence and exp.operator != parent_op:
+                # 右操作数同级时也必须加括号：a-(b-c) 不等于 a-b-c
+                if current_precedence <= parent_precedence:
                     need_parenthesis = True
             else:
                 if current_precedence < parent_precedence:
@@ -197,159 +252,709 @@ class ImprovedNineExpressionFinder:
 
         return f"({exp.expr})" if need_parenthesis else exp.expr
 
-    def _evaluate(self, exp1: Expression, exp2: Expression, operator: str) -> Optional[Expression]:
-        try:
-            value = mpz(0)
-            if operator == '+':
-                value = exp1.value + exp2.value
-            elif operator == '-':
-                value = exp1.value - exp2.value
-            elif operator == '*':
-                value = exp1.value * exp2.value
-            elif operator == '/':
-                if exp2.value == 0: return None
-                # 使用gmpy2.is_divisible确保整除
-                if not gmpy2.is_divisible(exp1.value, exp2.value):
-                    return None
-                value = exp1.value // exp2.value # 使用整数除法
-            else:
-                return None
+    def _astar_heuristic(self, value: int, target: int) -> int:
+        """
+        A* 的可采纳下界：每个基础数字 b（含 √⑨=3）都满足 b+1 <= 10^(⑨个数)，
+        因此每多用一个⑨，|值| 至多放大 10 倍，由此估计至少还需要几个⑨。
+        （按距离折算 999 步数的估计在有乘法时不可采纳，这里不用）
+        """
+        if value == target:
+            return 0
+        reach = max(abs(value), 1)
+        remaining = abs(target)
+        steps = 0
+        while reach < remaining:
+            reach *= 10
+            steps += 1
+        return max(steps, 1)
+
+    def _new_state_map(self, max_allowed: int):
+        """
+        为取值范围 [-max_allowed, max_allowed] 的搜索分配按 value + offset 下标的状态表：
+        范围可控时是 bytearray（无哈希、每个状态 1 字节），否则退化为 SparseFlags。
+        """
+        size = 2 * max_allowed + 1
+        if size <= self.state_bitmap_limit:
+            return bytearray(size), max_allowed
+        return SparseFlags(), max_allowed
+
+    def _chain_value_bound(self, target: int) -> int:
+        """链式表达式（启发式搜索和 A*）中间值的绝对值上限：目标的 100 倍，但至少 10**6，使小目标也能借道较大的中间值"""
+        return max(abs(target) * 100, 10 ** 6)
+
+    def _chain_successors(self, value: int, base: int, op: str) -> list:
+        """
+        当前值与一个基础数字做 op 运算得到的后继 [(新值, 步骤编码)]。
+        步骤编码 = 运算符下标*2 + (基础数字是否在左侧)，只占一个字节。
+        """
+        if op == '+':
+            return [(value + base, 0)]
+        if op == '-':
+            return [(value - base, 2), (base - value, 3)]
+        if op == '*':
+            return [(value * base, 4)]
+        successors = []
+        if value % base == 0:
+            successors.append((value // base, 6))
+        if value != 0 and base % value == 0:
+            successors.append((base // value, 7))
+        return successors
+
+    def _new_search_nodes(self):
+        """搜索节点的并行数组：值、父节点下标、步骤编码、所用基础数字"""
+        return array('q'), array('q'), bytearray(), array('q')
+
+    def _build_path_expression(self, nodes, index: int) -> str:
+        """沿父节点下标回溯解路径，只对这一条路径做括号格式化"""
+        values, parents, steps, bases = nodes
+        chain = []
+        while parents[index] >= 0:
+            chain.append(index)
+            index = int(parents[index])
+        exp = Expression(values[index], SYMBOL_BASES[values[index]][0], set(), None)
+        for index in reversed(chain):
+            op = self.CHAIN_OPERATORS[steps[index] >> 1]
+            base_exp = Expression(bases[index], SYMBOL_BASES[bases[index]][0], set(), None)
+            left, right = (base_exp, exp) if steps[index] & 1 else (exp, base_exp)
+            expr = f"{self._format_operand(left, op)}{op}{self._format_operand(right, op, is_right_operand=True)}"
+            exp = Expression(values[index], self._simplify_expression(expr), set(), operator=op)
+        return exp.expr
+
+    def _inverse_chain_predecessors(self, value: int, base: int) -> list:
+        """
+        _chain_successors 的逆运算：哪些 v 经过一步 (v op base) 能得到 value，
+        返回 [(v, 步骤编码)]，步骤编码与正向一致。
+        """
+        predecessors = [(value - base, 0), (value + base, 2), (base - value, 3), (value * base, 6)]
+        if value % base == 0:
+            predecessors.append((value // base, 4))
+        if value != 0 and base % value == 0:
+            predecessors.append((base // value, 7))
+        return predecessors
+
+    def _astar_perimeter(self, target: int, bases: list, max_allowed: int, deadline: float) -> Tuple[dict, int]:
+        """
+        A* 的周界启发：从目标出发按逆运算（_inverse_chain_predecessors）逐层做一致代价搜索，
+        直到到达的值超过 astar_perimeter_states 个或超时。返回 ({值: 到目标的精确剩余代价}, 半径 R)：
+        剩余代价不超过 R 的值都在表中，表外的值剩余代价至少为 R+1，二者都是可采纳的下界。
+        """
+        costs = {target: 0}
+        layers = {0: [target]}
+        predecessors = self._inverse_chain_predecessors
+        radius = 0
+        while True:
+            for value in layers.pop(radius, ()):
+                if costs[value] != radius:
+                    continue  # 已有更便宜路径，跳过过期条目
+                for base, base_cost in bases:
+                    new_cost = radius + base_cost
+                    for previous, _ in predecessors(value, base):
+                        if abs(previous) > max_allowed:
+                            continue
+                        known_cost = costs.get(previous)
+                        if known_cost is None or new_cost < known_cost:
+                            costs[previous] = new_cost
+                            layers.setdefault(new_cost, []).append(previous)
+            if not layers:
+                return costs, 255  # 能到达目标的值都已求出，其余值到不了目标
+            if len(costs) >= self.astar_perimeter_states or self._cancellable_clock() > deadline:
+                break
+            radius += 1
+        # 代价大于 R 的条目只是上界，不能当作下界使用
+        return {value: cost for value, cost in costs.items() if cost <= radius}, radius
+
+    def _find_expression_astar(self, target: int, timeout_ms: int = 900) -> Optional[str]:
+        """
+        A* 搜索：g 为已用⑨个数，h 取周界（_astar_perimeter）内的精确剩余代价，
+        周界外取 R+1 与 _astar_heuristic 中的较大者。启发函数可采纳，目标第一次出堆即为最短的链式表达式；
+        周界让中等大小的目标也能在默认时限内搜完。扩展节点数记录在 self.last_search_expansions，便于基准测试。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        max_allowed = self._chain_value_bound(target)
+        bases = sorted((value, cost) for value, (_, cost) in SYMBOL_BASES.items())
+        exact, radius = self._astar_perimeter(target, bases, max_allowed, deadline)
+
+        def heuristic(value: int, target: int) -> int:
+            remaining = exact.get(value)
+            if remaining is not None:
+                return remaining
+            return max(radius + 1, self._astar_heuristic(value, target))
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        # 每个值当前的最小代价（0 表示未到达），代价超过 255 的路径直接放弃
+        best_cost, offset = self._new_state_map(max_allowed)
+        heap = []
+        for value, cost in bases:
+            best_cost[value + offset] = cost
+            # 同 f 值时优先扩展 g 更大的节点，再按节点下标，保证结果确定
+            heap.append((cost + heuristic(value, target), -cost, len(values)))
+            values.append(value)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(value)
+        heapq.heapify(heap)
+
+        expansions = 0
+        while heap:
+            _, neg_cost, index = heapq.heappop(heap)
+            cost = -neg_cost
+            value = values[index]
+            if cost > best_cost[value + offset]:
+                continue  # 已有更便宜路径，跳过过期条目
+            if value == target:
+                self._record_search_stats(expansions, start)
+                return self._build_path_expression(nodes, index)
 
-            exp1_str = self._format_operand(exp1, operator)
-            exp2_str = self._format_operand(exp2, operator, is_right_operand=True)
-            expr = f"{exp1_str}{operator}{exp2_str}"
-            expr = self._simplify_expression(expr)
+            expansions += 1
+            if expansions % self.deadline_check_interval == 0 and self._cancellable_clock() > deadline:
+                break
 
-            new_operators_used = exp1.operators_used | exp2.operators_used | {operator}
-            return Expression(value, expr, new_operators_used, operator=operator)
-        except:
+            for base, base_cost in bases:
+                new_cost = cost + base_cost
+                for op in self.CHAIN_OPERATORS:
+                    for new_value, step in self._chain_successors(value, base, op):
+                        if abs(new_value) > max_allowed:
+                            continue
+                        known_cost = best_cost[new_value + offset]
+                        if (known_cost == 0 or new_cost < known_cost) and new_cost <= 255:
+                            best_cost[new_value + offset] = new_cost
+                            heapq.heappush(heap, (new_cost + heuristic(new_value, target), -new_cost, len(values)))
+                            values.append(new_value)
+                            parents.append(index)
+                            steps.append(step)
+                            node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return None
+
+    def _find_expression_vector(self, target: int, timeout_ms: int = 900) -> Optional[str]:
+        """NumPy 分层前沿搜索：整层一次性扩展，给出以⑨个数计最短的链式表达式"""
+        start = time.monotonic()
+        # 范围取目标的 10 倍即可让 x/9 之类的步骤覆盖到目标附近
+        max_allowed = min(max(abs(target) * 10, 10 ** 5), self.state_bitmap_limit // 2)
+        search = VectorFrontierSearch(SYMBOL_BASES, max_allowed)
+        index = search.search(target, start + timeout_ms / 1000, self._cancellable_clock)
+        self._record_search_stats(search.expansions, start)
+        if index is None:
             return None
+        return self._build_path_expression((search.values, search.parents, search.steps, search.node_bases), index)
+
+    def _cancellable_clock(self) -> float:
+        """time.monotonic 加上取消检查：搜索循环每次检查超时都经过这里，请求被取消时抛出 SolveCancelled"""
+        self.cancel_token.raise_if_cancelled()
+        return time.monotonic()
+
+    def _record_search_stats(self, expansions: int, start: float):
+        """记录最近一次搜索的扩展节点数和每秒扩展速度"""
+        elapsed = time.monotonic() - start
+        self.last_search_expansions = expansions
+        self.last_search_rate = expansions / elapsed if elapsed > 0 else 0.0
+
+    def _find_expression_best_first(self, target: int, timeout_ms: int = 900,
+                                    seed: Optional[int] = None) -> Optional[str]:
+        """
+        按与目标的距离做最佳优先搜索（持久堆，每个目标只准备一次常量）。
+        节点只记录在并行数组里，表达式字符串只为最终解生成一次。
+        给定 seed 时扩展顺序完全由它决定，同一 seed 总是给出同一结果（见 find_expression_restarts）。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        check_interval = self.deadline_check_interval
+
+        operators = self._get_operators(target)
+        bases = sorted(int(num) for num in self.base_numbers)
+        # 优先级上的扰动（按节点编号循环取用）：不给 seed 时全为 0，即纯按距离排序
+        jitter = [0] * 4096
+        if seed is None:
+            # 运算符顺序：每个目标洗牌一次
+            random.shuffle(operators)
+        else:
+            # 多次重启：运算符和基础数字的顺序由 seed 打乱，距离再加上至多一个基数的随机扰动，各次重启走不同的路径
+            rng = random.Random(seed)
+            rng.shuffle(operators)
+            rng.shuffle(bases)
+            jitter = [rng.randrange(max(bases)) for _ in jitter]
+        max_allowed = self._chain_value_bound(target)
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        queue: List[Tuple[int, int]] = []
+        visited, offset = self._new_state_map(max_allowed)
+        # 位图容纳整个值域，不会写满；退化为哈希表时每个状态的内存是位图的几十倍，最多记录位图上限 1/32 的状态
+        max_visited = len(visited) if isinstance(visited, bytearray) else self.state_bitmap_limit // 32
+        visited_count = 0
+        for base in bases:
+            queue.append((abs(base - target), len(values)))
+            values.append(base)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(base)
+            visited[base + offset] = 1
+            visited_count += 1
+        heapq.heapify(queue)
+
+        expansions = 0
+        while queue:
+            _, index = heapq.heappop(queue)
+            value = values[index]
+            if value == target:
+                self._record_search_stats(expansions, start)
+                return self._build_path_expression(nodes, index)
+
+            expansions += 1
+            if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                break
+            if visited_count > max_visited:
+                continue
+
+            for base in bases:
+                for op in operators:
+                    for new_value, step in self._chain_successors(value, base, op):
+                        if abs(new_value) > max_allowed or visited[new_value + offset]:
+                            continue
+                        visited[new_value + offset] = 1
+                        visited_count += 1
+                        heapq.heappush(queue, (abs(new_value - target) + jitter[len(values) & 4095], len(values)))
+                        values.append(new_value)
+                        parents.append(index)
+                        steps.append(step)
+                        node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return None
 
     def _decompose_large_number(self, target: mpz) -> Optional[str]:
         """
-        使用基于gmpy2的贪心算法快速分解大数。
-        这个函数会递归调用，并返回一个部分表达式列表。
+        使用基于gmpy2的分解算法快速分解大数。
+        分解过程只组合表达式树（见 _decomposition_tree），最后一次性序列化。
         """
+        tree = self._decomposition_tree(target)
+        if tree is None:
+            return None
+        return render(tree, 'symbols')
+
+    def _decomposition_tree(self, target: mpz) -> Optional[ExpressionNode]:
+        """分解的核心，返回表达式树，如 BinOp('*', Leaf(999), BinOp('+', ...))"""
         if target < 0:
             # 处理负数
-            decomposed_positive = self._decompose_large_number_recursive_parts(-target)
-            if decomposed_positive:
-                return f"-({self._format_decomposed_parts(decomposed_positive)})"
+            positive = self._decomposition_tree(-target)
+            return Neg(positive) if positive is not None else None
+        if target == 0:
             return None
 
-        # 对于正数，直接调用并格式化
-        parts = self._decompose_large_number_recursive_parts(target)
-        if parts:
-            return self._format_decomposed_parts(parts)
-        return None
+        # 位数很多时改用分治的进制转换，避免逐块整除的平方复杂度
+        if gmpy2.num_digits(target) > self.divide_and_conquer_digits:
+            return self._decompose_divide_and_conquer(target)
 
-    def _decompose_large_number_recursive_parts(self, target: mpz) -> List[str]:
-        """递归分解的核心，返回一个字符串列表，如 ['999*999', '+', '9*9']"""
-        if target == 0:
+        memo = {}
+        if self._plan_decomposition(target, memo) is None:
+            return None
+        tree = self._decomposition_node(target, memo)
+        self._remember_decomposition(memo)
+        return tree
+
+    def _remember_decomposition(self, planned: dict):
+        """
+        保存规划结果供后续请求复用。条目超过 decomposition_memo_limit 时整体清空，
+        本次的结果也不再保存（其中取自共享 memo 的状态的子拆分已被清掉）。
+        """
+        shared = self._decomposition_memo
+        if len(shared) + len(planned) > self.decomposition_memo_limit:
+            shared.clear()
+        else:
+            shared.update(planned)
+
+    def _decomposition_radices(self, target: mpz) -> List[Tuple[mpz, str, int]]:
+        """
+        分解可用的基数 [(数值, 表达式, ⑨个数)]：⑨⑨⑨、⑨⑨、⑨，从大到小。
+        平方构造块可由 DP 连续两次选同一基数得到，不必单列；超大数只用 ⑨⑨⑨，避免状态数爆炸。
+        """
+        radices = [(value, expr_str, expr_str.count('⑨'))
+                   for value, expr_str in sorted(self.base_number_map.items(), reverse=True) if value >= 9]
+        if target > self.decomposition_dp_limit:
+            return radices[:1]
+        return radices
+
+    def _factor_basis(self, target: mpz) -> List[int]:
+        """
+        乘法拆分可用的素数（从小到大）：factor_trial_limit 以内的小素数，
+        加上 Pollard rho 从 target 中分解出的、不超过表上限的素因子（素性测试用 gmpy2.is_prime）。
+        子状态的因子都在其中，只需与它们的乘积求一次最大公因数，不必逐个重新分解。
+        """
+        if self._factor_primes is None:
+            primes = small_primes(self.factor_trial_limit)
+            self._factor_primes = (primes, mpz(math.prod(primes)))
+        primes, _ = self._factor_primes
+        if target > self.decomposition_dp_limit:
+            return primes
+        table = self._get_expression_table()
+        factors, _ = factorize(int(target), primes, self.factor_rho_iterations)
+        return primes + sorted(p for p in factors if primes[-1] < p <= table.limit)
+
+    def _factor_choices(self, target: mpz, factor_basis: List[int]) -> List[Tuple[int, int, mpz, int]]:
+        """
+        乘法拆分 target = d * (target/d)：d 取表中的因子，按每个数量级花费的⑨个数
+        选最省的 factor_choice_count 个，余数为 0，与加法拆分一起按总代价比较。
+        """
+        primes, product = self._factor_primes
+        if len(factor_basis) > len(primes):
+            product *= math.prod(factor_basis[len(primes):])
+        common = gmpy2.gcd(target, product)
+        if common == 1:
             return []
+        table = self._get_expression_table()
+        bound = min(table.limit, int(target) - 1)
+        radices = {int(value) for value, _, _ in self._decomposition_radices(target)}
+        # common 只含各素因子一次，指数另数，只数到 bound 为止
+        factors = {}
+        for p in factorize(int(common), factor_basis, 0)[0]:
+            exponent, power = 0, p
+            while power <= bound and gmpy2.is_divisible(target, power):
+                exponent += 1
+                power *= p
+            factors[p] = exponent
+        divisors = [d for d in divisors_up_to(factors, bound) if d > 1 and d not in radices and d in table]
+        divisors.sort(key=lambda d: (table.cost(d) / math.log(d), d))
+        return [(d, table.cost(d), target // d, 0) for d in divisors[:self.factor_choice_count]]
 
-        # 优先从预计算的构造块中查找
-        for value, expr_str in self.greedy_blocks:
-            if target == value:
-                return [expr_str]
-        
-        # 贪心算法：尝试用最大的构造块去除
-        for value, expr_str in self.greedy_blocks:
-            if value <= target:
-                # 尝试整除
-                quotient, remainder = gmpy2.f_divmod(target, value)
-                if quotient > 0:
-                    # 分解商
-                    quotient_parts = self._decompose_large_number_recursive_parts(quotient)
-                    if not quotient_parts: # 如果商无法分解，此路不通
+    def _plan_decomposition(self, target: mpz, memo: dict) -> Optional[int]:
+        """
+        混合基数的带符号余数分解：target = q*B + r，B 取各构造块，
+        q 取向下或向上取整（即 r >= 0 或 r < 0，包含四舍五入的平衡余数）；
+        有表中的因子 d 时另有乘法拆分 target = d*(target/d)。
+        对 q 和 |r| 做记忆化 DP，返回最少的⑨个数，所选拆分记在 memo[target] 中。
+        叶子为整数复杂度表中的最优解，之前请求规划过的状态直接取自 _decomposition_memo。
+        用显式栈按后序求解（子问题都有结果后再回到当前状态），深度不受递归上限限制。
+        """
+        table = self._get_expression_table()
+        shared = self._decomposition_memo
+        factor_basis = self._factor_basis(target)
+        # 乘法拆分只用于 target 及其经乘法拆分得到的余因子，加法拆分出的一般状态不再分解，避免状态数爆炸
+        cofactors = {target}
+        # 栈元素 (状态, 候选拆分, 是否经加法拆分到达)，候选为 None 表示第一次访问
+        stack = [(target, None, True)]
+        while stack:
+            value, choices, additive = stack.pop()
+            if value in memo:
+                continue
+            if choices is None:
+                if int(value) in table:
+                    memo[value] = (table.cost(int(value)), None, 0, 0)
+                    continue
+                if value in shared:
+                    memo[value] = shared[value]
+                    continue
+                self.cancel_token.raise_if_cancelled()
+                choices = []
+                if value in cofactors:
+                    choices = self._factor_choices(value, factor_basis)
+                    cofactors.update(q for _, _, q, _ in choices)
+                # 只经乘法拆分到达、还能继续分解的余因子不做加法拆分（各余因子都做一遍 DP 代价太大）
+                if additive or not choices:
+                    radix_choices = []
+                    for base, _, block_cost in self._decomposition_radices(value):
+                        quotient, remainder = gmpy2.f_divmod(value, base)
+                        for q, r in ((quotient, remainder), (quotient + 1, remainder - base)):
+                            # q 和 |r| 都必须严格小于 value，保证子问题规模递减
+                            if q >= 1 and abs(r) < value:
+                                radix_choices.append((base, block_cost, q, r))
+                    choices = radix_choices + choices
+                pending = [(part, base in self.base_number_map) for base, _, q, r in choices
+                           for part in (q if q > 1 else 0, abs(r)) if part and part not in memo]
+                if pending:
+                    stack.append((value, choices, additive))
+                    # 与递归版本相同的求解顺序：先 q 后 r，加法拆分的子问题先于乘法拆分的余因子
+                    stack.extend((part, None, from_additive) for part, from_additive in reversed(pending))
+                    continue
+
+            best = None
+            for base, block_cost, q, r in choices:
+                q_cost = memo[q][0] if q > 1 else 0
+                r_cost = memo[abs(r)][0] if r else 0
+                if q_cost is None or r_cost is None:
+                    continue
+                cost = block_cost + q_cost + r_cost
+                if best is None or cost < best[0]:
+                    best = (cost, base, q, r)
+            memo[value] = best if best is not None else (None, None, 0, 0)
+        return memo[target][0]
+
+    def _decomposition_node(self, target: mpz, memo: dict, nodes: Optional[dict] = None) -> ExpressionNode:
+        """
+        按 memo 中的拆分组合表达式树，商为 1 时省略 "1*"。
+        用显式栈自底向上组合，重复出现的子目标共用同一棵子树；传入 nodes 时跨调用共用（批量求解）。
+        """
+        table = self._get_expression_table()
+        shared = self._decomposition_memo
+        nodes = {} if nodes is None else nodes
+        stack = [target]
+        while stack:
+            value = stack[-1]
+            if value in nodes:
+                stack.pop()
+                continue
+            # 复用的状态只带回了自身，其下的拆分仍在共享 memo 中
+            _, base, q, r = memo[value] if value in memo else shared[value]
+            if base is None:
+                nodes[value] = table.tree(int(value))
+                stack.pop()
+                continue
+            pending = [part for part in (q if q > 1 else 0, abs(r)) if part and part not in nodes]
+            if pending:
+                stack.extend(reversed(pending))
+                continue
+
+            stack.pop()
+            # 构造块为 ⑨/⑨⑨/⑨⑨⑨，乘法拆分的因子取表中的表达式
+            node = Leaf(int(base)) if base in self.base_number_map else table.tree(int(base))
+            if q > 1:
+                node = BinOp('*', node, nodes[q])
+            if r > 0:
+                node = BinOp('+', node, nodes[r])
+            elif r < 0:
+                node = BinOp('-', node, nodes[-r])
+            nodes[value] = node
+        return nodes[target]
+
+    def _find_expressions_frontier(self, targets: Set[int], timeout_ms: int = 900) -> Dict[int, str]:
+        """
+        多个目标共用一次从基础数字出发、按⑨个数分层的前沿扩展（一致代价搜索），
+        每个新出层的值都在待求目标的哈希集合中查一次，命中即回溯出以⑨个数计最短的链式表达式。
+        全部命中、状态耗尽或超时时停止，返回已求出的 {目标: 表达式}。
+        """
+        start = time.monotonic()
+        deadline = start + timeout_ms / 1000
+        pending = set(targets)
+        max_allowed = min(max(max(abs(target) for target in pending) * 10, 10 ** 5), self.state_bitmap_limit // 2)
+        bases = sorted((value, cost) for value, (_, cost) in SYMBOL_BASES.items())
+        max_base_cost = max(cost for _, cost in bases)
+
+        nodes = self._new_search_nodes()
+        values, parents, steps, node_bases = nodes
+        # 每个值当前的最小代价（0 表示未到达）；layers[c] 为代价为 c 的节点下标，可能含已被更便宜路径取代的条目
+        best_cost, offset = self._new_state_map(max_allowed)
+        layers = {}
+        for value, cost in bases:
+            best_cost[value + offset] = cost
+            layers.setdefault(cost, []).append(len(values))
+            values.append(value)
+            parents.append(-1)
+            steps.append(0)
+            node_bases.append(value)
+
+        # 热循环中用到的方法提前绑定为局部变量
+        successors = self._chain_successors
+        operators = self.CHAIN_OPERATORS
+        check_interval = self.deadline_check_interval
+        found = {}
+        expansions = 0
+        cost = 0
+        timed_out = False
+        # 最近 max_base_cost 层都为空时不会再有新状态
+        while pending and not timed_out and any(layers.get(cost + c) for c in range(1, max_base_cost + 1)):
+            cost += 1
+            for index in layers.pop(cost, ()):
+                value = values[index]
+                if best_cost[value + offset] != cost:
+                    continue  # 已有更便宜路径，跳过过期条目
+                if value in pending:
+                    pending.discard(value)
+                    found[value] = self._build_path_expression(nodes, index)
+                    if not pending:
+                        break
+
+                expansions += 1
+                if expansions % check_interval == 0 and self._cancellable_clock() > deadline:
+                    timed_out = True
+                    break
+
+                for base, base_cost in bases:
+                    new_cost = cost + base_cost
+                    if new_cost > 255:
                         continue
-                    
-                    # 组合结果
-                    result_parts = []
-                    if len(quotient_parts) == 1 and quotient_parts[0] == '⑨/⑨': # 商为1，则省略 "1*"
-                        result_parts.append(expr_str)
-                    else:
-                        result_parts.extend([expr_str, '*', f"({self._format_decomposed_parts(quotient_parts)})"])
-                    
-                    # 如果有余数，继续分解余数
-                    if remainder > 0:
-                        remainder_parts = self._decompose_large_number_recursive_parts(remainder)
-                        if not remainder_parts: # 余数无法分解
-                            continue
-                        result_parts.append('+')
-                        result_parts.extend(remainder_parts)
-                    
-                    return result_parts
-        
-        # 如果所有尝试都失败
-        return []
+                    for op in operators:
+                        for new_value, step in successors(value, base, op):
+                            if abs(new_value) > max_allowed:
+                                continue
+                            known_cost = best_cost[new_value + offset]
+                            if known_cost == 0 or new_cost < known_cost:
+                                best_cost[new_value + offset] = new_cost
+                                layers.setdefault(new_cost, []).append(len(values))
+                                values.append(new_value)
+                                parents.append(index)
+                                steps.append(step)
+                                node_bases.append(base)
+
+        self._record_search_stats(expansions, start)
+        return found
+
+    def _decompose_batch(self, targets: List[int]) -> Dict[int, Optional[str]]:
+        """
+        批量分解：各目标共用同一份 DP memo 和已组合的子树，前面目标算过的商和余数后面直接复用，
+        最后整体并入跨请求的 _decomposition_memo。位数很多的目标仍用分治的进制转换。
+        """
+        memo, nodes = {}, {}
+        results = {}
+        for target in sorted(targets, key=abs):
+            magnitude = mpz(abs(target))
+            if gmpy2.num_digits(magnitude) > self.divide_and_conquer_digits:
+                tree = self._decompose_divide_and_conquer(magnitude)
+            elif self._plan_decomposition(magnitude, memo) is None:
+                results[target] = None
+                continue
+            else:
+                tree = self._decomposition_node(magnitude, memo, nodes)
+            results[target] = render(Neg(tree) if target < 0 else tree, 'symbols')
+        self._remember_decomposition(memo)
+        return results
+
+    def find_expressions(self, targets: Iterable[int], timeout_ms: int = 900) -> Dict[int, str]:
+        """
+        批量求解许多目标，返回 {目标: 表达式}（按输入顺序，找不到时为空串）。
+        先查表和缓存；不超过 batch_frontier_limit 的目标共用一次前沿扩展，逐个求解时重复的小数搜索只做一次，
+        结果也比逐个的启发式搜索更短；未查表命中的目标都再批量分解，共用商和余数的子结果，每个目标取⑨较少的结果。
+        与 find_expression 一样，output_mode 为 'program' 时输出共享幂程序。
+        """
+        targets = [int(target) for target in targets]
+        table = self._get_expression_table()
+        results = {}
+        pending = set()
+        for target in targets:
+            if target in results or target in pending:
+                continue
+            if target in table:
+                results[target] = table.expression(target)
+            elif target in self.expression_cache:
+                results[target] = self.expression_cache[target]
+            elif self.output_mode == 'program':
+                results[target] = self.find_expression_program(target)
+            else:
+                cached = self.result_cache.get(self._cache_key(target))
+                if cached is not None:
+                    results[target] = cached
+                if cached is None or abs(target) <= self.batch_frontier_limit:
+                    pending.add(target)
+
+        # 与单个求解一样，分解的结果作为上界；缓存中已有的小目标也参加前沿，取⑨最少的结果并写回结果缓存
+        found = {}
+        small = {target for target in pending if abs(target) <= self.batch_frontier_limit}
+        if small:
+            found = self._find_expressions_frontier(small, timeout_ms)
+        decomposed = self._decompose_batch(list(pending)) if pending else {}
+        for target in pending:
+            candidates = [result for result in (found.get(target), decomposed.get(target)) if result]
+            best = min(candidates, key=lambda result: result.count('⑨'), default=None)
+            cached = results.get(target)
+            if best is not None and (cached is None or best.count('⑨') < cached.count('⑨')):
+                self.result_cache.put(self._cache_key(target), best)
+                results[target] = best
+        return {target: results.get(target) or "" for target in targets}
+
+    def _power_ladder(self, target: mpz) -> List[mpz]:
+        """⑨⑨⑨ 的反复平方幂 [999, 999^2, 999^4, ...]，直到超过 target 的平方根，在实例上复用"""
+        ladder = self._power_ladder_cache
+        while ladder[-1] * ladder[-1] <= target:
+            ladder.append(ladder[-1] * ladder[-1])
+        return ladder
+
+    def _base999_digits(self, target: mpz, level: int, count: int, digits: List[int]):
+        """
+        分治进制转换：target = A*999^(2^level) + B，对 A、B 递归，
+        把低位在前的 count 个 999 进制数位追加到 digits（不足补 0）。
+        每层只做一次大数除法，总代价接近一次 gmpy2 乘法，而不是逐位整除的平方复杂度。
+        """
+        if level < 0:
+            digits.append(int(target))
+            return
+        self.cancel_token.raise_if_cancelled()
+        high, low = gmpy2.f_divmod(target, self._power_ladder_cache[level])
+        half = 1 << level
+        self._base999_digits(low, level - 1, half, digits)
+        if high or count > half:
+            self._base999_digits(high, level - 1, count - half, digits)
+
+    def _decompose_divide_and_conquer(self, target: mpz) -> ExpressionNode:
+        """
+        百万位级目标的分解：分治求出 999 进制数位，再转成平衡数位（-499..499），
+        最后按秦九韶（Horner）形式组合出 ⑨⑨⑨*(...)±d 的嵌套表达式树。
+        """
+        ladder = self._power_ladder(target)
+        level = len(ladder) - 1
+        digits: List[int] = []
+        self._base999_digits(target, level, 2 << level, digits)
+        while len(digits) > 1 and digits[-1] == 0:
+            digits.pop()
+
+        # 平衡数位：大于 499 的数位借位成负数，数位越小子表达式越短
+        for i in range(len(digits)):
+            if digits[i] > 499:
+                digits[i] -= 999
+                if i + 1 == len(digits):
+                    digits.append(0)
+                digits[i + 1] += 1
 
-    def _format_decomposed_parts(self, parts: List[str]) -> str:
-        """将分解后的部分列表格式化为最终的字符串表达式。"""
-        # 将部分连接起来，不加多余的空格
-        return "".join(parts)
+        # 由内向外组合，每个 999 进制数位只新建常数个节点；相同数位共享同一个预先序列化的子树
+        table = self._get_expression_table()
+        digit_trees = {}
+
+        def digit_tree(digit: int) -> ExpressionNode:
+            if digit not in digit_trees:
+                digit_trees[digit] = flatten(table.tree(digit))
+            return digit_trees[digit]
+
+        top = len(digits) - 1
+        node = digit_tree(digits[top])
+        for i in range(top - 1, -1, -1):
+            if i == top - 1 and digits[top] == 1:
+                node = Leaf(999)  # 商为 1 时省略 "1*"
+            else:
+                node = BinOp('*', Leaf(999), node)
+            if digits[i] > 0:
+                node = BinOp('+', node, digit_tree(digits[i]))
+            elif digits[i] < 0:
+                node = BinOp('-', node, digit_tree(-digits[i]))
+        return node
+
+    def _cache_key(self, target: int) -> tuple:
+        """结果缓存的键：目标和求解配置（基础数字、搜索目标即搜索模式、运算符集合），配置不同的结果互不混用"""
+        bases = tuple(sorted(int(num) for num in self.base_numbers))
+        return target, bases, self.search_mode, self.CHAIN_OPERATORS
 
     def _find_expression_with_timeout(self, target_int: int, timeout_ms: int = 900) -> Optional[str]:
         target = mpz(target_int) # 将输入转换为gmpy2的mpz类型
 
-        # 1. 检查缓存
+        # 1. 整数复杂度表中已有最优解时直接查表，其次检查手写缓存和结果缓存
+        table = self._get_expression_table()
+        if target_int in table:
+            return table.expression(target_int)
         if target_int in self.expression_cache:
             return self.expression_cache[target_int]
+        cache_key = self._cache_key(target_int)
+        cached = self.result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        # 2. 对于较小的数，优先使用BFS/A*搜索（向量化搜索能直接处理的范围更大）
+        result = None
+        if (self.search_mode == 'vector' and vector_search_available()
+                and abs(target) < self.vector_number_threshold):
+            result = self._find_expression_vector(target_int, timeout_ms)
+        elif abs(target) < self.large_number_threshold and self.search_mode == 'astar':
+            result = self._find_expression_astar(target_int, timeout_ms)
+        elif abs(target) < self.large_number_threshold:
+            result = self._find_expression_best_first(target_int, timeout_ms)
+
+        # 3. 搜索失败或目标数过大时用贪心分解；较大的目标上启发式搜索的链常比分解长，两者取较短者
+        if not result or abs(target) > self.decomposition_bound_threshold:
+            large_number_expr = self._decompose_large_number(target)
+            if large_number_expr and (not result or large_number_expr.count('⑨') < result.count('⑨')):
+                result = large_number_expr
+        if result:
+            self.result_cache.put(cache_key, result)
+            return result
 
-        # 2. 对于较小的数，优先使用BFS/A*搜索
-        if abs(target) < self.large_number_threshold:
-            self._disable_divisions = (target % 9 != 0)
-            start_time = time.time()
-            
-            # (这里的BFS逻辑基本不变，但需要确保它使用mpz类型)
-            queue: List[Tuple[mpz, Expression]] = []
-            visited: Set[mpz] = set()
-
-            for num, expr_str in self.base_number_map.items():
-                exp = Expression(num, expr_str, set(), None)
-                # 估算距离时转为float，因为距离不需要绝对精度
-                distance = abs(float(exp.value - target))
-                queue.append((distance, exp))
-                visited.add(exp.value)
-
-            import heapq
-            heapq.heapify(queue)
-
-            while queue and (time.time() - start_time) * 1000 < timeout_ms:
-                current_priority, current_exp = heapq.heappop(queue)
-
-                if current_exp.value == target:
-                    result = self._simplify_expression(current_exp.expr)
-                    self.expression_cache[target_int] = result
-                    return result
-
-                operators = self._get_operators(target_int)
-                random.shuffle(operators)
-
-                for base_num, base_expr_str in self.base_number_map.items():
-                    base_exp = Expression(base_num, base_expr_str, set(), None)
-                    for op in operators:
-                        # 正向计算
-                        result = self._evaluate(current_exp, base_exp, op)
-                        if result and result.value not in visited and self._is_worth_exploring(result.value, target, visited):
-                            distance = abs(float(result.value - target))
-                            heapq.heappush(queue, (distance, result))
-                            visited.add(result.value)
-                        
-                        # 反向计算
-                        if op in {'-', '/'}:
-                            reverse_result = self._evaluate(base_exp, current_exp, op)
-                            if reverse_result and reverse_result.value not in visited and self._is_worth_exploring(reverse_result.value, target, visited):
-                                distance = abs(float(reverse_result.value - target))
-                                heapq.heappush(queue, (distance, reverse_result))
-                                visited.add(reverse_result.value)
-
-        # 3. 如果BFS超时或目标数过大，则使用新的贪心分解算法
-        large_number_expr = self._decompose_large_number(target)
-        if large_number_expr:
-            self.expression_cache[target_int] = large_number_expr
-            return large_number_expr
-        
         # 所有方法都失败
         return None
 
@@ -428,8 +1033,196 @@ class ImprovedNineExpressionFinder:
                 wrapped += '\n    ' + line.lstrip()
         return wrapped
 
+    def _shared_powers_node(self, target: mpz, level: int, used: Set[int]) -> ExpressionNode:
+        """
+        按 target = A*P_level + B（B 取平衡余数）递归展开，P_j = 999^(2^j) 以名字引用，
+        用到的 j 记入 used。999^k 这类数只需 O(log k) 个符号。
+        """
+        table = self._get_expression_table()
+        if int(target) in table:
+            return table.tree(int(target))
+        self.cancel_token.raise_if_cancelled()
+        ladder = self._power_ladder_cache
+        while ladder[level] > target:
+            level -= 1
+        power = ladder[level]
+        high, low = gmpy2.f_divmod(target, power)
+        if low * 2 > power:
+            high, low = high + 1, low - power
+        used.add(level)
+
+        name = Leaf(999) if level == 0 else Name(f"P{level}")
+        if high == 1:
+            node = name
+        else:
+            node = BinOp('*', self._shared_powers_node(high, level, used), name)
+        if low > 0:
+            node = BinOp('+', node, self._shared_powers_node(low, level, used))
+        elif low < 0:
+            node = BinOp('-', node, self._shared_powers_node(-low, level, used))
+        return node
+
+    def _portfolio_strategies(self, target: int) -> List[str]:
+        """组合求解中适用于 target 的策略：各搜索只在其能处理的范围内参加，分解总是参加"""
+        size = abs(target)
+        strategies = []
+        if size < self.large_number_threshold:
+            strategies += ['best_first', 'astar']
+        if size < self.vector_number_threshold and vector_search_available():
+            strategies.append('vector')
+        strategies.append('decomposition')
+        return strategies
+
+    def _solve_with_strategy(self, strategy: str, target: int, timeout_ms: int) -> Optional[str]:
+        """只用一种策略求解，供组合求解的工作进程调用；'best_first@seed' 为指定 seed 的启发式搜索"""
+        strategy, _, seed = strategy.partition('@')
+        if strategy == 'decomposition':
+            return self._decompose_large_number(mpz(target))
+        if strategy == 'vector':
+            return self._find_expression_vector(target, timeout_ms)
+        if strategy == 'astar':
+            return self._find_expression_astar(target, timeout_ms)
+        return self._find_expression_best_first(target, timeout_ms, int(seed) if seed else None)
+
+    def find_expression_portfolio(self, target: int, timeout_ms: int = 900, objective: str = 'best') -> str:
+        """
+        各策略（启发式、A*、向量化搜索和 ⑨⑨⑨/⑨⑨/⑨ 分解）在进程池中同时求解，共用 timeout_ms 的截止时间。
+        objective 为 'best' 时返回截止前⑨最少的结果，为 'first' 时返回最先得到的结果；
+        各策略在每个规模档的胜率见 self.portfolio.stats，长期不胜的策略会被自动跳过。
+        """
+        table = self._get_expression_table()
+        if int(target) in table:
+            return table.expression(int(target))
+        result = self.portfolio.run(int(target), self._portfolio_strategies(int(target)), timeout_ms, objective,
+                                    cancel_token=self.cancel_token)
+        return result.expression or ""
+
+    def find_expression_restarts(self, target: int, restarts: Optional[int] = None, timeout_ms: int = 900,
+                                 objective: str = 'best', seeds: Optional[List[int]] = None) -> Tuple[str, Optional[int]]:
+        """
+        多次重启：restarts 个（默认与进程数相同）不同 seed 的启发式搜索在进程池中同时运行，
+        objective 为 'best' 时取⑨最少的结果，为 'first' 时取最先得到的结果。
+        返回 (表达式, 胜出的 seed)，用 seeds=[seed] 可复现该结果；查表命中或超出直接搜索范围时按常规求解，seed 为 None。
+        """
+        table = self._get_expression_table()
+        if int(target) in table or abs(target) >= self.large_number_threshold:
+            return self.find_expression(target), None
+        if seeds is None:
+            seeds = [random.getrandbits(32) for _ in range(restarts or self.portfolio.workers)]
+        result = self.portfolio.run(int(target), [f'best_first@{seed}' for seed in seeds], timeout_ms, objective,
+                                    adaptive=False, cancel_token=self.cancel_token)
+        if result.expression is None:
+            return "", None
+        return result.expression, int(result.strategy.partition('@')[2])
+
+    def find_expression_program(self, target: int) -> str:
+        """
+        共享幂的 let 绑定输出：P1=⑨⑨⑨*⑨⑨⑨; P2=P1*P1; ...; N=...
+        P_j 由反复平方得到，只在定义处展开一次，正文按 Horner 形式引用。
+        """
+        target = mpz(target)
+        magnitude = abs(target)
+        used: Set[int] = set()
+        ladder = self._power_ladder(magnitude)
+        body = self._shared_powers_node(magnitude, len(ladder) - 1, used)
+        if target < 0:
+            body = Neg(body)
+        # 用到 P_j 就需要它之前的所有平方
+        top = max(used, default=0)
+        bindings = ['P1=⑨⑨⑨*⑨⑨⑨'] if top >= 1 else []
+        bindings.extend(f"P{j}=P{j - 1}*P{j - 1}" for j in range(2, top + 1))
+        return '; '.join(bindings + [f"N={render(body, 'symbols')}"])
+
+    def find_expression_tree(self, target: int, timeout_ms: int = 900) -> Optional[ExpressionNode]:
+        """与 find_expression 相同的求解，但返回表达式树，调用方可自选输出形式（见 expression_tree.RENDERINGS）"""
+        table = self._get_expression_table()
+        if int(target) in table:
+            return table.tree(int(target))
+        result = self._find_expression_with_timeout(target, timeout_ms)
+        return Raw(to_digits(result)) if result else None
+
+    def _chain_cost_lower_bound(self, target: int, deadline: float) -> int:
+        """链式表达式（启发式搜索和 A* 的结果）的⑨个数下界：各基础数字的代价加上 A* 周界给出的剩余代价下界"""
+        bases = sorted((value, cost) for value, (_, cost) in SYMBOL_BASES.items())
+        exact, radius = self._astar_perimeter(target, bases, self._chain_value_bound(target), deadline)
+        return min(cost + exact.get(value, radius + 1) for value, cost in bases)
+
+    def _restart_candidates(self, target: int, best_cost: int, deadline: float) -> Iterator[Optional[str]]:
+        """
+        已有⑨个数为 best_cost 的结果后的改进轮次（可能为 None）：A* 在时限内搜完时给出最短的链式表达式，
+        其⑨个数即启发式搜索所能达到的下界，超时则用周界估计下界；余下的时间用不同 seed 的启发式搜索
+        继续找更短的（见 _find_expression_best_first），当前结果已不多于下界时重启不可能再改进。
+        """
+        if abs(target) >= self.large_number_threshold:
+            return
+
+        def remaining_ms() -> int:
+            return max(0, int((deadline - time.monotonic()) * 1000))
+
+        target = int(target)
+        result = self._find_expression_astar(target, remaining_ms())
+        if result:
+            best_cost = min(best_cost, result.count('⑨'))
+        yield result
+        lower_bound = result.count('⑨') if result else self._chain_cost_lower_bound(target, deadline)
+        while remaining_ms() > 0 and best_cost > lower_bound:
+            result = self._find_expression_best_first(target, remaining_ms(), random.getrandbits(32))
+            if result:
+                best_cost = min(best_cost, result.count('⑨'))
+            yield result
+
+    def _anytime_candidates(self, target: int, deadline: float) -> Iterator[Optional[str]]:
+        """iter_improvements 的候选结果（可能为 None），由快到慢"""
+        table = self._get_expression_table()
+        if int(target) in table:
+            yield table.expression(int(target))
+            return
+        if self.output_mode == 'program':
+            yield self.find_expression_program(target)
+            return
+
+        # 999 进制的 Horner 形式不做任何搜索，毫秒级给出第一个结果
+        node = self._decompose_divide_and_conquer(mpz(abs(target)))
+        first = render(Neg(node) if target < 0 else node, 'symbols')
+        yield first
+        result = self._find_expression_with_timeout(target, max(0, int((deadline - time.monotonic()) * 1000)))
+        yield result
+        best_cost = min(first.count('⑨'), result.count('⑨') if result else first.count('⑨'))
+        yield from self._restart_candidates(target, best_cost, deadline)
+
+    def iter_improvements(self, target: int, timeout_ms: Optional[int] = None) -> Iterator[str]:
+        """
+        随时可用的求解：先产出 999 进制分解的结果（毫秒级），之后在截止前（默认 self.anytime_timeout_ms）
+        依次尝试完整求解、A* 和多次重启，每找到⑨严格更少的表达式就产出一次。
+        调用方可随时停止迭代，最后产出的即当前最优。
+        """
+        if timeout_ms is None:
+            timeout_ms = self.anytime_timeout_ms
+        deadline = time.monotonic() + timeout_ms / 1000
+        best_cost = None
+        for result in self._anytime_candidates(target, deadline):
+            if result and (best_cost is None or result.count('⑨') < best_cost):
+                best_cost = result.count('⑨')
+                yield result
+
     def find_expression(self, target: int) -> str:
+        # 'program' 模式输出共享幂程序，默认的 'infix' 总是输出普通中缀表达式
+        if self.output_mode == 'program':
+            return self.find_expression_program(target)
+        if self.use_portfolio:
+            return self.find_expression_portfolio(target)
         result = self._find_expression_with_timeout(target)
         if result:
             return result
-        return ""
\ No newline at end of file
+        return ""
+
+
+_portfolio_finder = None
+
+
+def _solve_portfolio_strategy(strategy: str, target: int, timeout_ms: int) -> Optional[str]:
+    """组合求解的工作进程入口：每个进程只建一个求解器，复用其表和分解 memo"""
+    global _portfolio_finder
+    if _portfolio_finder is None:
+        _portfolio_finder = ImprovedNineExpressionFinder()
+    return _portfolio_finder._solve_with_strategy(strategy, target, timeout_ms)
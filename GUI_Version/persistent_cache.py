@@ -0,0 +1,164 @@
+# persistent_cache.py
+# 跨进程、跨重启的磁盘结果缓存（SQLite WAL 模式），命令行版、GUI 版和 Electron 后端共用同一个文件
+import os
+import sqlite3
+import threading
+from typing import Any, Hashable, Optional
+
+from result_cache import CacheStats
+
+SCHEMA_VERSION = 1
+DEFAULT_CACHE_FILE = 'results.sqlite3'
+
+
+def default_cache_path() -> str:
+    """环境变量 NINE_SOLVER_CACHE 指定的文件，否则为用户缓存目录下的 9solver/results.sqlite3"""
+    path = os.environ.get('NINE_SOLVER_CACHE')
+    if path:
+        return path
+    base = (os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache'))
+    return os.path.join(base, '9solver', DEFAULT_CACHE_FILE)
+
+
+def _row_key(key: Hashable) -> tuple:
+    """(目标, *配置) -> (配置文本, 目标的十六进制文本)；十六进制不受 int 转字符串的位数上限影响"""
+    target, *config = key
+    return repr(tuple(config)), format(target, 'x')
+
+
+def _nines(column: str) -> str:
+    """SQL 表达式：column 中⑨的个数（⑨ 符号形式或数字形式均可）"""
+    return f"(length({column}) - length(replace(replace({column}, '9', ''), '⑨', '')))"
+
+
+class PersistentCache:
+    """
+    键为 (目标, *配置)，与 ImprovedNineExpressionFinder._cache_key 相同。
+    结果按引擎版本和配置分区，打开时删除其它引擎版本的旧结果；
+    启发式搜索等的结果随运行而不同，同一目标只在新结果的⑨更少时替换已有结果。
+    多个进程可同时读写（WAL + 忙等待），写入失败时只是少缓存一条。
+    """
+
+    def __init__(self, path: str, engine_version: int, max_value_length: int = 1 << 20):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.engine_version = engine_version
+        self.max_value_length = max_value_length
+        self.hits = 0
+        self.misses = 0
+        # GUI 的各个 WorkerThread 共用一个连接，由锁串行化
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, timeout=5, isolation_level=None, check_same_thread=False)
+        self._setup()
+
+    def _setup(self):
+        connection = self._connection
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        schema = connection.execute('PRAGMA user_version').fetchone()[0]
+        if schema not in (0, SCHEMA_VERSION):
+            connection.execute('DROP TABLE IF EXISTS results')
+        connection.execute('CREATE TABLE IF NOT EXISTS results ('
+                           'engine INTEGER NOT NULL, config TEXT NOT NULL, target TEXT NOT NULL, '
+                           'expression TEXT NOT NULL, PRIMARY KEY (engine, config, target)) WITHOUT ROWID')
+        connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        connection.execute('DELETE FROM results WHERE engine != ?', (self.engine_version,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._connection.execute('SELECT COUNT(*) FROM results WHERE engine = ?',
+                                            (self.engine_version,)).fetchone()[0]
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self._lookup(key) is not None
+
+    def _lookup(self, key: Hashable) -> Optional[str]:
+        config, target = _row_key(key)
+        try:
+            with self._lock:
+                row = self._connection.execute(
+                    'SELECT expression FROM results WHERE engine = ? AND config = ? AND target = ?',
+                    (self.engine_version, config, target)).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._lookup(key)
+        if value is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    def put(self, key: Hashable, value: str):
+        if len(value) > self.max_value_length:
+            return
+        config, target = _row_key(key)
+        try:
+            with self._lock:
+                self._connection.execute('INSERT INTO results VALUES (?, ?, ?, ?) '
+                                         'ON CONFLICT (engine, config, target) DO UPDATE SET expression = excluded.expression '
+                                         f'WHERE {_nines("excluded.expression")} < {_nines("results.expression")}',
+                                         (self.engine_version, config, target, value))
+        except sqlite3.Error:
+            pass
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute('DELETE FROM results WHERE engine = ?', (self.engine_version,))
+
+    def stats(self) -> CacheStats:
+        return CacheStats(self.hits, self.misses, 0, len(self), os.path.getsize(self.path))
+
+    def close(self):
+        self._connection.close()
+
+
+class TieredCache:
+    """内存缓存在前、磁盘缓存在后：内存未命中时查磁盘并回填内存，写入时两层都写"""
+
+    def __init__(self, memory, disk: PersistentCache):
+        self.memory = memory
+        self.disk = disk
+
+    def __len__(self) -> int:
+        return len(self.memory)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self.memory or key in self.disk
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self.memory.get(key)
+        if value is None:
+            value = self.disk.get(key)
+            if value is None:
+                return default
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key: Hashable, value: str):
+        # 磁盘上已有⑨更少的结果时保留它，内存层回填同一个结果
+        self.disk.put(key, value)
+        self.memory.put(key, self.disk._lookup(key) or value)
+
+    def clear(self):
+        self.memory.clear()
+        self.disk.clear()
+
+    def stats(self) -> CacheStats:
+        """命中数含磁盘命中，未命中数为两层都未命中的次数，其余为内存层的数据"""
+        memory = self.memory.stats()
+        return CacheStats(memory.hits + self.disk.hits, self.disk.misses, memory.evictions, memory.entries, memory.bytes)
+
+
+def open_persistent_cache(path: str, engine_version: int) -> Optional[PersistentCache]:
+    """打不开（只读目录、文件损坏等）时返回 None，调用方只用内存缓存"""
+    try:
+        return PersistentCache(path, engine_version)
+    except (OSError, sqlite3.Error) as e:
+        print(f" [提示] 持久缓存不可用，只使用内存缓存: {e}")
+        return None
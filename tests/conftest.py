@@ -0,0 +1,119 @@
+# conftest.py
+# 三个版本的 main.py 同名，按文件路径以不同模块名（<版本>_version_main，不与 GUI_Version/gui_main.py 等真实模块重名）加载；其余共用模块三处逐字节相同，从 Console_version 导入。
+# main 依赖 PyQt6 和 PyAudio（GUI 版另需 gmpy2），缺失时用到求解器的测试跳过。evaluate 和 expression_cost 独立于被测代码，用来核对求解结果。
+import importlib.util
+import os
+import re
+import sys
+from fractions import Fraction
+from typing import Optional
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VARIANTS = {
+    'console': 'Console_version',
+    'electron': os.path.join('GUI_Electron', 'backend'),
+    'gui': 'GUI_Version',
+}
+
+sys.path.insert(0, os.path.join(ROOT, 'Console_version'))
+
+_TOKEN = re.compile(r'[0-9]+|[()+\-*/]')
+_PRECEDENCE = {'+': 1, '-': 1, '*': 2, '/': 2, 'neg': 3}
+
+
+def _apply(values: list, op: str):
+    if op == 'neg':
+        values.append(-values.pop())
+        return
+    right, left = values.pop(), values.pop()
+    if op == '+':
+        values.append(left + right)
+    elif op == '-':
+        values.append(left - right)
+    elif op == '*':
+        values.append(left * right)
+    else:
+        values.append(left / right)
+
+
+def evaluate(expression: str) -> Optional[Fraction]:
+    """按分数精确求值（⑨ 记为 9，√⑨ 记为 3，忽略空白），无法完整解析或除以零时返回 None"""
+    text = re.sub(r'\s', '', expression).replace('√⑨', '3').replace('√9', '3').replace('⑨', '9')
+    tokens = _TOKEN.findall(text)
+    if not tokens or ''.join(tokens) != text:
+        return None
+    values, ops = [], []
+    expect_operand = True
+    try:
+        for token in tokens:
+            if expect_operand:
+                if token == '-':
+                    ops.append('neg')
+                elif token == '(':
+                    ops.append(token)
+                elif token.isdigit():
+                    values.append(Fraction(int(token)))
+                    expect_operand = False
+                else:
+                    return None
+            elif token == ')':
+                while ops and ops[-1] != '(':
+                    _apply(values, ops.pop())
+                if not ops:
+                    return None
+                ops.pop()
+            elif token in _PRECEDENCE:
+                while ops and ops[-1] != '(' and _PRECEDENCE[ops[-1]] >= _PRECEDENCE[token]:
+                    _apply(values, ops.pop())
+                ops.append(token)
+                expect_operand = True
+            else:
+                return None
+        if expect_operand:
+            return None
+        while ops:
+            op = ops.pop()
+            if op == '(':
+                return None
+            _apply(values, op)
+    except ZeroDivisionError:
+        return None
+    return values[0]
+
+
+def expression_cost(expression: str) -> int:
+    """表达式中⑨（含 √⑨）的个数，数字形式按字符 9 计"""
+    return expression.count('9') + expression.count('⑨')
+
+
+def load_main(variant: str):
+    """加载某个版本的 main.py（模块名 <版本>_version_main），只用内存结果缓存"""
+    name = f"{variant}_version_main"
+    if name in sys.modules:
+        return sys.modules[name]
+    pytest.importorskip('pyaudio')
+    pytest.importorskip('PyQt6')
+    if variant == 'gui':
+        pytest.importorskip('gmpy2')
+    directory = os.path.join(ROOT, VARIANTS[variant])
+    # 各版本独有的模块（如 baka_sound、audio_data）放在共用模块之后查找
+    if directory not in sys.path:
+        sys.path.append(directory)
+    spec = importlib.util.spec_from_file_location(name, os.path.join(directory, 'main.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    module.ImprovedNineExpressionFinder.persistent_cache_path = None
+    return module
+
+
+@pytest.fixture
+def make_finder():
+    """make_finder(版本) 返回一个新求解器，进程内共享的结果缓存先清空，各测试互不影响"""
+    def make(variant: str):
+        finder = load_main(variant).ImprovedNineExpressionFinder()
+        finder.result_cache.clear()
+        return finder
+    return make
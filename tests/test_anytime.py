@@ -0,0 +1,42 @@
+# 随时可用的求解（user-023）：结果逐个变短且都精确等于目标，达到链式表达式的下界后不再重启
+import time
+
+import pytest
+
+from conftest import evaluate, expression_cost
+
+# 2007 和 2997 命中手写缓存（⑨形式），与其它候选须按同一口径比较
+TARGETS = [2345, -4871, 123456, 2007, 2997]
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_improvements_get_shorter(make_finder, variant):
+    finder = make_finder(variant)
+    for target in TARGETS:
+        costs = []
+        for result in finder.iter_improvements(target):
+            assert evaluate(result) == target
+            costs.append(expression_cost(result))
+        assert costs and costs == sorted(set(costs), reverse=True), target
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_restarts_stop_at_lower_bound(make_finder, variant):
+    finder = make_finder(variant)
+    finder.anytime_timeout_ms = 20000
+    start = time.monotonic()
+    results = list(finder.iter_improvements(2345))
+    assert time.monotonic() - start < 10
+    assert expression_cost(results[-1]) <= (9 if variant == 'gui' else 11)
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_first_result_needs_no_search(make_finder, variant):
+    finder = make_finder(variant)
+
+    def no_search(*args, **kwargs):
+        raise AssertionError("第一个结果不应等待完整求解")
+
+    finder._find_expression_with_timeout = no_search
+    first = next(finder.iter_improvements(123456))
+    assert evaluate(first) == 123456
@@ -0,0 +1,30 @@
+# A* 模式（user-003）：默认时限内搜完，结果为以⑨个数计最短的链式表达式
+import pytest
+
+from conftest import evaluate, expression_cost
+
+# 链式表达式的最少⑨个数（一致代价搜索穷举得到），GUI 版多一个 √⑨
+OPTIMUM = {
+    'console': {2345: 12, 4321: 13, 4999: 13, -9999: 8, 81: 2},
+    'gui': {2345: 9, 4321: 9, 4999: 9, -9999: 7, 81: 2},
+}
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_astar_finds_minimal_chain(make_finder, variant):
+    finder = make_finder(variant)
+    for target, optimum in OPTIMUM['gui' if variant == 'gui' else 'console'].items():
+        result = finder._find_expression_astar(target, 1000)
+        assert result is not None, target
+        assert evaluate(result) == target
+        assert expression_cost(result) == optimum, target
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_astar_mode_returns_search_result(make_finder, variant):
+    finder = make_finder(variant)
+    finder.search_mode = 'astar'
+    bound = OPTIMUM['gui' if variant == 'gui' else 'console'][4321]
+    result = finder.find_expression(4321)
+    assert evaluate(result) == 4321
+    assert expression_cost(result) <= bound
@@ -0,0 +1,60 @@
+# 批量求解（user-025）：结果精确等于目标，不长于逐个求解，整批共用一个时限，结果写入结果缓存
+import random
+import time
+
+import pytest
+
+from conftest import evaluate, expression_cost
+
+VARIANTS = ['console', 'electron', 'gui']
+
+
+def long_form(finder, expression: str) -> str:
+    """结果缓存中的形式：命令行版和 Electron 后端为数字形式"""
+    return expression if finder.__class__.__module__ == 'gui_version_main' else expression.replace('⑨', '9')
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_batch_results_are_exact_and_not_longer(make_finder, variant):
+    finder = make_finder(variant)
+    rng = random.Random(25)
+    targets = [rng.randrange(-5000, 5000) for _ in range(40)] + [2345, 4321, 10 ** 6 + 1, -(10 ** 30 + 7), 0, 81]
+    results = finder.find_expressions(targets)
+    assert list(results) == list(dict.fromkeys(targets))
+    for target in targets:
+        assert evaluate(results[target]) == target
+    single = make_finder(variant)
+    for target in (2345, 4321):
+        assert expression_cost(results[target]) <= expression_cost(single.find_expression(target))
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_shorter_result_replaces_cached_one(make_finder, variant):
+    finder = make_finder(variant)
+    key = finder._cache_key(2345)
+    finder.result_cache.put(key, long_form(finder, '+'.join(['⑨/⑨'] * 2345)))
+    result = finder.find_expressions([2345])[2345]
+    assert evaluate(result) == 2345
+    assert expression_cost(result) <= 12
+    assert expression_cost(finder.result_cache.get(key)) == expression_cost(result)
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_decomposed_results_are_cached(make_finder, variant):
+    finder = make_finder(variant)
+    targets = [10 ** 30 + k for k in range(5)]
+    results = finder.find_expressions(targets)
+    for target in targets:
+        assert evaluate(finder.result_cache.get(finder._cache_key(target))) == target
+        assert expression_cost(finder.result_cache.get(finder._cache_key(target))) == expression_cost(results[target])
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_batch_shares_one_budget(make_finder, variant):
+    finder = make_finder(variant)
+    rng = random.Random(7)
+    targets = [rng.randrange(10 ** 5, 10 ** 7) for _ in range(200)]
+    start = time.monotonic()
+    results = finder.find_expressions(targets, 300)
+    assert time.monotonic() - start < 3
+    assert all(evaluate(results[target]) == target for target in targets)
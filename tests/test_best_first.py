@@ -0,0 +1,29 @@
+# 启发式搜索（user-004）：搜索给出的链比大数分解长时，返回分解的结果
+import pytest
+
+from conftest import evaluate, expression_cost
+
+# 分解给出的上界（2345 = 2*999 + 347 等），启发式搜索的首条链可能长得多
+UPPER_BOUND = {2345: 15, 4321: 15, 4999: 15, -9999: 8}
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_best_first_keeps_decomposition_bound(make_finder, variant):
+    finder = make_finder(variant)
+    finder.search_mode = 'best_first'
+    for target, bound in UPPER_BOUND.items():
+        result = finder.find_expression(target)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= bound, target
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_no_decomposition_below_threshold(make_finder, variant):
+    finder = make_finder(variant)
+    finder.decomposition_bound_threshold = 10 ** 4
+
+    def no_decomposition(*args, **kwargs):
+        raise AssertionError("搜索已给出结果且目标不超过阈值时不应再分解")
+
+    finder._decompose_large_number = no_decomposition
+    assert evaluate(finder.find_expression(2345)) == 2345
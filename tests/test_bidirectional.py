@@ -0,0 +1,16 @@
+# 双向搜索（user-008）：中等大小的目标从两端相遇，结果精确等于目标
+import pytest
+
+from conftest import evaluate, expression_cost
+
+# 当前实现给出的⑨个数，作为回归上界
+BOUND = {2345: 13, -9999: 8, 123457: 22, 10 ** 6 + 1: 14, 7777777: 23}
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_bidirectional_meets_in_the_middle(make_finder, variant):
+    finder = make_finder(variant)
+    for target, bound in BOUND.items():
+        result = finder._find_expression_bidirectional(target, 3000)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= bound, target
@@ -0,0 +1,60 @@
+# 协作式取消（user-024）：被取消的请求尽快抛出 SolveCancelled，换新令牌后求解器照常可用
+import threading
+
+import pytest
+
+from conftest import evaluate
+from cancellation import CancellationToken, SolveCancelled
+
+VARIANTS = ['console', 'electron', 'gui']
+
+
+def test_token_cancels_once():
+    token = CancellationToken()
+    assert not token.cancelled
+    token.raise_if_cancelled()
+    token.cancel()
+    assert token.cancelled
+    with pytest.raises(SolveCancelled):
+        token.raise_if_cancelled()
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_cancelled_request_raises(make_finder, variant):
+    finder = make_finder(variant)
+    finder.cancel_token.cancel()
+    with pytest.raises(SolveCancelled):
+        finder.find_expression(123457)
+    # 被取消的请求不写入结果缓存，新请求换新令牌后正常求解
+    finder.cancel_token = CancellationToken()
+    assert evaluate(finder.find_expression(123457)) == 123457
+
+
+@pytest.mark.parametrize('variant', VARIANTS)
+def test_cancel_from_another_thread(make_finder, variant):
+    finder = make_finder(variant)
+    started = threading.Event()
+    clock = finder._cancellable_clock
+
+    def watched_clock():
+        started.set()
+        return clock()
+
+    # 搜索第一次检查超时后再取消，不依赖 sleep 的时长
+    finder._cancellable_clock = watched_clock
+    outcome = []
+
+    def solve():
+        try:
+            outcome.append(finder._find_expression_best_first(98765431, 120000))
+        except SolveCancelled:
+            outcome.append(SolveCancelled)
+
+    worker = threading.Thread(target=solve)
+    worker.start()
+    assert started.wait(60)
+    finder.cancel_token.cancel()
+    # 时限给得很宽，只确认搜索因取消而停止，而不是跑满 120 秒后自然结束
+    worker.join(60)
+    assert not worker.is_alive()
+    assert outcome == [SolveCancelled]
@@ -0,0 +1,51 @@
+# 大数分解：超出直接搜索范围的目标按代价最优的带符号余数分解，结果精确等于目标
+import inspect
+import sys
+import time
+
+import pytest
+
+from conftest import evaluate, expression_cost, load_main
+
+# 分解 DP 能给出的⑨个数（-9999 = -(10*999 + 9)，双向搜索的链要 8 个）
+BOUND = {-9999: 7, 9999: 7, 10 ** 6 + 1: 12}
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_decomposition_part_keeps_shorter(make_finder, variant):
+    # 中等大小的目标（user-009）：取双向搜索与分解 DP 中较短者
+    finder = make_finder(variant)
+    for target, bound in BOUND.items():
+        result = finder.find_expression(target)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= bound, target
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_decomposition_respects_budget(make_finder, variant):
+    # 请求预算（user-010）：预算为 0 时退化为贪心拆分，有预算时不长于贪心，且总耗时受预算约束
+    finder = make_finder(variant)
+    budget_type = load_main(variant).SearchBudget
+    for target in (987654321, -(3 ** 100), 10 ** 150 + 12345):
+        greedy = finder._decompose_large_number(target, budget_type(0))
+        finder._decomposition_memo.clear()
+        start = time.monotonic()
+        planned = finder._decompose_large_number(target, budget_type(300, finder.max_search_nodes))
+        assert time.monotonic() - start < 1.5
+        assert evaluate(greedy) == target and evaluate(planned) == target
+        assert expression_cost(planned) <= expression_cost(greedy)
+    assert expression_cost(finder._decompose_large_number(-(3 ** 100))) <= 50
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_decomposition_does_not_recurse(make_finder, variant):
+    # 显式栈（user-015）：900 位的目标走 DP 分解，调用栈只比当前深几十层也不会 RecursionError
+    finder = make_finder(variant)
+    target = 7 * (10 ** 900 - 1) // 9 + 12345
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(len(inspect.stack()) + 80)
+    try:
+        result = finder.find_expression(target)
+    finally:
+        sys.setrecursionlimit(limit)
+    assert evaluate(result) == target
@@ -0,0 +1,38 @@
+# 表达式精确求值（user-021）：组合求解用它校验各策略的结果，无法完整解析的输入一律返回 None
+from fractions import Fraction
+
+import pytest
+
+from portfolio import evaluate, expression_cost
+
+
+@pytest.mark.parametrize('expression, value', [
+    ('9+9', 18),
+    ('999*(9+9)/9', 1998),
+    ('⑨ ⑨ ⑨ *(⑨ +⑨ /⑨ )+⑨ ', 9999),
+    ('⑨⑨-√⑨', 96),
+    ('-(⑨⑨⑨*(⑨+⑨/⑨)+⑨)', -9999),
+    ('9-9-9', -9),
+    ('9/9/9', Fraction(1, 9)),
+    ('--9', 9),
+    ('9*9\n    +9', 90),
+])
+def test_valid(expression, value):
+    assert evaluate(expression) == value
+
+
+@pytest.mark.parametrize('expression', [
+    '9x+9', '9+9?', '9.9', '٣+9', '√', '', '9+', '+', '(9', '9)', '9+*9', '()', 'P1*9',
+])
+def test_malformed(expression):
+    assert evaluate(expression) is None
+
+
+@pytest.mark.parametrize('expression', ['9/(9-9)', '9/(9/9-9/9)', '(9+9)/(99-99)*9'])
+def test_division_by_zero(expression):
+    assert evaluate(expression) is None
+
+
+def test_expression_cost():
+    assert expression_cost('⑨ ⑨ ⑨ *(⑨ +⑨ /⑨ )+⑨ ') == 7
+    assert expression_cost('⑨⑨-√⑨') == 3
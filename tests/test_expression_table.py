@@ -0,0 +1,91 @@
+# 整数复杂度表：表项精确且最短，表文件可保存后 mmap 加载，范围不足或损坏的表文件改为现场构建
+import pytest
+
+from conftest import evaluate, expression_cost
+from expression_table import (DEFAULT_TABLE_FILE, DIGIT_BASES, MIN_TABLE_LIMIT, ExpressionTable,
+                              ExpressionTableBuilder, load_or_build)
+
+
+def brute_force_costs(limit: int, max_cost: int) -> dict:
+    """逐层枚举所有中间结果为区间内整数的表达式，得到 {值: 最小⑨个数}"""
+    best = {}
+    levels = {cost: set() for cost in range(max_cost + 1)}
+    for value, (_, cost) in DIGIT_BASES.items():
+        levels[cost].add(value)
+    for cost in range(1, max_cost + 1):
+        for left_cost in range(1, cost):
+            for x in levels[left_cost]:
+                for y in levels[cost - left_cost]:
+                    candidates = [x + y, x - y, x * y]
+                    if y and x % y == 0:
+                        candidates.append(x // y)
+                    levels[cost].update(v for v in candidates if -limit <= v <= limit)
+        for value in levels[cost]:
+            best.setdefault(value, cost)
+    return best
+
+
+def test_table_is_exact_and_minimal():
+    # 整数复杂度表（user-001）：每个表项精确等于其值，⑨个数不多于穷举得到的最少个数
+    table = ExpressionTableBuilder(limit=2000, base_map=DIGIT_BASES).build()
+    for value in range(-2000, 2001):
+        assert value in table
+        expression = table.expression(value)
+        assert evaluate(expression) == value
+        assert expression_cost(expression) == table.cost(value)
+    for value, cost in brute_force_costs(2000, 5).items():
+        assert table.cost(value) <= cost, value
+    assert table.cost(81) == 2 and table.cost(0) == 2 and table.cost(1998) == 6
+
+
+def test_saved_table_maps_back(tmp_path):
+    # 表文件（user-002）：保存后 mmap 加载得到同样的表，目录下有足够大的表文件时直接使用
+    path = str(tmp_path / DEFAULT_TABLE_FILE)
+    built = ExpressionTableBuilder(limit=1500, base_map=DIGIT_BASES).build()
+    built.save(path)
+    loaded = load_or_build(str(tmp_path), DIGIT_BASES, 1200)
+    assert loaded.limit == 1500
+    for value in range(-1500, 1501, 7):
+        assert loaded.cost(value) == built.cost(value)
+        assert loaded.expression(value) == built.expression(value)
+
+
+def test_corrupt_table_file_is_rejected(tmp_path):
+    path = tmp_path / DEFAULT_TABLE_FILE
+    ExpressionTableBuilder(limit=1000, base_map=DIGIT_BASES).build().save(str(path))
+    path.write_bytes(path.read_bytes()[:-1])
+    with pytest.raises(ValueError):
+        ExpressionTable.load(str(path), DIGIT_BASES)
+    assert load_or_build(str(tmp_path), DIGIT_BASES, 1000).limit == 1000
+
+
+def test_small_table_file_is_rebuilt(tmp_path):
+    # 范围不足的表文件（user-018）：999 进制的每一位都要能查到
+    ExpressionTableBuilder(limit=100, base_map=DIGIT_BASES).build().save(str(tmp_path / DEFAULT_TABLE_FILE))
+    assert ExpressionTable.load(str(tmp_path / DEFAULT_TABLE_FILE), DIGIT_BASES).limit == 100
+    table = load_or_build(str(tmp_path), DIGIT_BASES, 2000)
+    assert table.limit == 2000
+    for value in (-998, 500, 998):
+        assert evaluate(table.expression(value)) == value
+
+
+def test_requested_limit_has_a_floor(tmp_path):
+    table = load_or_build(str(tmp_path), DIGIT_BASES, 10)
+    assert table.limit == MIN_TABLE_LIMIT
+    assert all(value in table for value in range(-998, 999))
+
+
+def table_bytes(table) -> tuple:
+    return tuple(bytes(part) for part in (table.costs, table.ops, table.lefts, table.rights))
+
+
+def test_vectorized_builder_matches_python(monkeypatch):
+    # 向量化与多进程构建（user-019）：与纯 Python 循环逐字节相同
+    import expression_table
+    pytest.importorskip('numpy')
+    vectorized = ExpressionTableBuilder(limit=1500, base_map=DIGIT_BASES).build()
+    monkeypatch.setattr(expression_table, 'PARALLEL_LAYER_PAIRS', 1000)
+    parallel = ExpressionTableBuilder(limit=1500, base_map=DIGIT_BASES, workers=2).build()
+    monkeypatch.setattr(expression_table, 'np', None)
+    python = ExpressionTableBuilder(limit=1500, base_map=DIGIT_BASES).build()
+    assert table_bytes(vectorized) == table_bytes(python) == table_bytes(parallel)
@@ -0,0 +1,38 @@
+# 表达式树（user-014）：组合只建节点，序列化时按优先级加括号，任意深的树都不递归
+from fractions import Fraction
+
+import pytest
+
+from conftest import evaluate, expression_cost
+from expression_tree import BinOp, Leaf, Neg, Raw, flatten, iter_chunks, render, to_digits
+
+
+@pytest.mark.parametrize('node, text', [
+    (BinOp('-', Leaf(99), BinOp('-', Leaf(9), Leaf(9))), '99-(9-9)'),
+    (BinOp('-', BinOp('-', Leaf(99), Leaf(9)), Leaf(9)), '99-9-9'),
+    (BinOp('/', Leaf(999), BinOp('*', Leaf(9), Leaf(9))), '999/(9*9)'),
+    (BinOp('*', BinOp('+', Leaf(9), Leaf(9)), Leaf(999)), '(9+9)*999'),
+    (BinOp('*', Raw('99-9'), Leaf(9)), '(99-9)*9'),
+    (Neg(BinOp('+', Leaf(999), Leaf(3))), '-(999+√9)'),
+])
+def test_parentheses(node, text):
+    assert render(node, 'digits') == text
+    assert evaluate(text) == evaluate(render(node, 'symbols'))
+
+
+def test_renderings_agree():
+    node = BinOp('+', BinOp('*', Leaf(999), flatten(BinOp('-', Leaf(99), Leaf(9)))), Neg(Leaf(9)))
+    digits = render(node, 'digits')
+    assert evaluate(digits) == 999 * 90 - 9
+    for rendering in ('symbols', 'spaced'):
+        assert to_digits(render(node, rendering)) == digits
+    assert expression_cost(render(node, 'spaced')) == 7
+
+
+def test_deep_tree_is_not_recursive():
+    node = Leaf(9)
+    for _ in range(100000):
+        node = BinOp('-', Leaf(99), node)
+    text = ''.join(iter_chunks(node, 'digits', chunk_size=1 << 12))
+    assert text == render(node, 'digits')
+    assert evaluate(text) == Fraction(9)
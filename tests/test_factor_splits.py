@@ -0,0 +1,54 @@
+# 因子拆分（user-020）：因式分解工具的正确性，以及高合数目标借助因子拆分得到的表达式
+import pytest
+
+from conftest import evaluate, expression_cost
+from factorization import divisors_up_to, factorize, is_probable_prime, pollard_rho, small_primes
+
+# 开启因子拆分时实测的⑨个数，回归上界
+BOUND = {
+    'console': {720720 ** 4: 40, 2 ** 100: 82, 3 ** 80 * 7: 43, 10 ** 20 * 13: 39},
+    'gui': {720720 ** 4: 39, 2 ** 100: 69, 3 ** 80 * 7: 43, 10 ** 20 * 13: 38},
+}
+
+
+def test_small_primes_and_primality():
+    primes = small_primes(100)
+    assert primes[:10] == [2, 3, 5, 7, 11, 13, 17, 19, 23, 29]
+    assert all(is_probable_prime(p) for p in primes)
+    assert is_probable_prime(2 ** 61 - 1)
+    assert not is_probable_prime(2 ** 61 + 1)
+    assert not is_probable_prime(561)   # Carmichael 数
+
+
+def test_pollard_rho_splits_semiprime():
+    n = 1000003 * 1000033
+    divisor = pollard_rho(n, 20000)
+    assert divisor in (1000003, 1000033)
+
+
+def test_factorize_and_divisors():
+    factors, unfactored = factorize(-(720720 ** 2) * 1000003, small_primes(1000))
+    assert unfactored == 1
+    assert factors == {2: 8, 3: 4, 5: 2, 7: 2, 11: 2, 13: 2, 1000003: 1}
+    divisors = divisors_up_to({2: 2, 3: 1}, 6)
+    assert divisors == [1, 2, 3, 4, 6]
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_factor_splits_on_composite_targets(make_finder, variant):
+    finder = make_finder(variant)
+    for target, bound in BOUND['gui' if variant == 'gui' else 'console'].items():
+        result = finder.find_expression(target)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= bound, target
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_factor_splits_shorten_result(make_finder, variant):
+    target = 720720 ** 4
+    finder = make_finder(variant)
+    with_factors = expression_cost(finder.find_expression(target))
+    finder = make_finder(variant)
+    finder.factor_choice_count = 0
+    without_factors = expression_cost(finder.find_expression(target))
+    assert with_factors < without_factors
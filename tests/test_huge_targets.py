@@ -0,0 +1,27 @@
+# 超长目标（user-011）：分治进制转换代替逐块整除，几千位的目标也能毫秒级分解且结果精确
+import time
+
+import pytest
+
+from conftest import evaluate
+
+# 直接构造，不经过 int 与十进制字符串的转换（Python 3.11+ 默认限制 4300 位）
+HUGE = 7 * (10 ** 5000 - 1) // 9 + 123456789
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_balanced_digits(make_finder, variant):
+    finder = make_finder(variant)
+    digits = finder._balanced_digits(HUGE)
+    assert all(-499 <= digit <= 499 for digit in digits)
+    assert sum(digit * 999 ** i for i, digit in enumerate(digits)) == HUGE
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_huge_target_is_exact(make_finder, variant):
+    finder = make_finder(variant)
+    for target in (HUGE, -HUGE, 999 ** 1700):
+        start = time.monotonic()
+        result = finder.find_expression(target)
+        assert time.monotonic() - start < 5
+        assert evaluate(result) == target
@@ -0,0 +1,32 @@
+# GUI 版输出形式（user-012）：默认输出中缀表达式，output_mode='program' 时输出共享幂 let 绑定程序
+import re
+
+from conftest import evaluate
+
+TARGET = int('7' * 1001)
+
+
+def run_program(program: str):
+    """依次求值 P1=...; P2=...; N=...，名字代入已求出的值，返回 N"""
+    env = {}
+    for binding in program.split('; '):
+        name, _, expression = binding.partition('=')
+        env[name] = evaluate(re.sub(r'P\d+', lambda m: f"({env[m.group()]})", expression))
+    return env['N']
+
+
+def test_default_output_is_infix(make_finder):
+    finder = make_finder('gui')
+    assert finder.output_mode == 'infix'
+    result = finder.find_expression(TARGET)
+    assert '=' not in result
+    assert evaluate(result) == TARGET
+
+
+def test_program_output(make_finder):
+    finder = make_finder('gui')
+    finder.output_mode = 'program'
+    for target in (TARGET, -TARGET):
+        program = finder.find_expression(target)
+        assert program.startswith('P1=')
+        assert run_program(program) == target
@@ -0,0 +1,43 @@
+# 持久缓存（user-017）：结果跨进程保留，按引擎版本失效；同一目标只在新结果的⑨更少时替换已有结果
+from persistent_cache import PersistentCache, TieredCache
+from result_cache import make_cache
+
+
+def test_shorter_result_wins(tmp_path):
+    cache = PersistentCache(str(tmp_path / 'results.sqlite3'), engine_version=1)
+    key = (2345, 'best_first')
+    cache.put(key, '999*(9+9)/9+99*(9+9/9)/9*9+9+9+9/9')
+    cache.put(key, '999*(9+9)/9+9*(9*9-9-9)+9-9/9')
+    assert cache.get(key) == '999*(9+9)/9+9*(9*9-9-9)+9-9/9'
+    # 更长的结果不替换
+    cache.put(key, '(9+9)*(9+9)*9*9*9/9/9+9+9+9+9+9+9+9+9+9')
+    assert cache.get(key) == '999*(9+9)/9+9*(9*9-9-9)+9-9/9'
+    # ⑨ 符号形式按同样的个数比较
+    cache.put(key, '⑨⑨⑨*(⑨+⑨)/⑨+√⑨')
+    assert cache.get(key) == '⑨⑨⑨*(⑨+⑨)/⑨+√⑨'
+    cache.close()
+
+
+def test_tiered_cache_keeps_disk_result_in_memory(tmp_path):
+    disk = PersistentCache(str(tmp_path / 'results.sqlite3'), engine_version=1)
+    tiered = TieredCache(make_cache(), disk)
+    tiered.put((81,), '9*9')
+    tiered.put((81,), '99-9-9')
+    assert tiered.memory.get((81,)) == '9*9'
+    assert tiered.get((81,)) == '9*9'
+    disk.close()
+
+
+def test_results_survive_reopening(tmp_path):
+    path = str(tmp_path / 'results.sqlite3')
+    cache = PersistentCache(path, engine_version=2)
+    cache.put((4321, 'best_first'), '9*(9*9-9/9)*(9-(9+9+9)/9)+9/9')
+    cache.close()
+    reopened = PersistentCache(path, engine_version=2)
+    assert reopened.get((4321, 'best_first')) == '9*(9*9-9/9)*(9-(9+9+9)/9)+9/9'
+    assert reopened.get((4321, 'astar')) is None
+    reopened.close()
+    # 引擎版本变化后旧结果失效
+    upgraded = PersistentCache(path, engine_version=3)
+    assert upgraded.get((4321, 'best_first')) is None
+    upgraded.close()
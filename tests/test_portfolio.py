@@ -0,0 +1,65 @@
+# 组合求解（user-021）：结果经 evaluate 核对后取⑨最少的一个，长期不胜的策略被跳过
+import pytest
+
+from portfolio import PortfolioSolver, PortfolioStats, evaluate, expression_cost
+
+# 各策略对目标 81 的固定回答：'wrong' 的值不对，'none' 没有结果
+ANSWERS = {'short': '9*9', 'long': '9*9+9-9', 'wrong': '9+9', 'none': None}
+
+# 链式表达式的最少⑨个数（见 test_astar.py），组合求解不应比它差
+OPTIMUM = {
+    'console': {2345: 12, 4321: 13, -9999: 8},
+    'gui': {2345: 9, 4321: 9, -9999: 7},
+}
+# 超出表范围、真正在进程池中求解的目标：⑨个数不超过单独用向量化搜索的结果（见 test_vector.py）
+POOL_BOUND = {'console': {123457: 18}, 'gui': {123457: 14}}
+
+
+def _answer(strategy: str, target: int, timeout_ms: int):
+    return ANSWERS[strategy]
+
+
+@pytest.fixture
+def solver():
+    solver = PortfolioSolver(_answer, 2)
+    yield solver
+    solver.close()
+
+
+def test_best_valid_result_wins(solver):
+    result = solver.run(81, ['wrong', 'long', 'short', 'none'], 2000)
+    assert result.expression == '9*9'
+    assert result.strategy == 'short'
+    assert result.cost == 2
+    assert result.first_strategy in ('long', 'short')
+
+
+def test_no_valid_result(solver):
+    result = solver.run(81, ['wrong', 'none'], 2000)
+    assert result.expression is None and result.strategy is None
+
+
+def test_unknown_objective_rejected(solver):
+    with pytest.raises(ValueError):
+        solver.run(81, ['short'], 100, objective='fastest')
+
+
+def test_losing_strategy_is_skipped():
+    stats = PortfolioStats(min_runs=3, min_win_rate=0.5, explore_interval=100)
+    for _ in range(3):
+        stats.record(0, 'winner', True, 1.0)
+        stats.record(0, 'loser', False, 1.0)
+    assert stats.select(0, ['winner', 'loser']) == ['winner', 'loser']  # 每档第一个请求全部运行
+    assert stats.select(0, ['winner', 'loser']) == ['winner']
+    # 全部都不胜时仍保留胜率最高的一个
+    assert stats.select(0, ['loser']) == ['loser']
+    assert stats.snapshot()[0]['winner'].win_rate == 1.0
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_portfolio_within_optimum(make_finder, variant):
+    finder = make_finder(variant)
+    for target, optimum in {**OPTIMUM[variant], **POOL_BOUND[variant]}.items():
+        result = finder.find_expression_portfolio(target, 2000)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= optimum, target
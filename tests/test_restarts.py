@@ -0,0 +1,35 @@
+# 多次重启（user-022）：同一 seed 的启发式搜索给出同一结果，重启取各 seed 中⑨最少的一个
+import pytest
+
+from conftest import evaluate, expression_cost
+
+SEEDS = [1, 2, 3]
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_same_seed_same_result(make_finder, variant):
+    finder = make_finder(variant)
+    for target in (4321, -7777):
+        first = finder._find_expression_best_first(target, 3000, 12345)
+        assert first is not None
+        assert finder._find_expression_best_first(target, 3000, 12345) == first
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_restarts_return_reproducible_seed(make_finder, variant):
+    finder = make_finder(variant)
+    target = 4321
+    expression, seed = finder.find_expression_restarts(target, timeout_ms=3000, seeds=SEEDS)
+    assert seed in SEEDS
+    assert evaluate(expression) == target
+    costs = [expression_cost(finder.find_expression_restarts(target, timeout_ms=3000, seeds=[s])[0]) for s in SEEDS]
+    assert expression_cost(expression) == min(costs)
+    assert finder.find_expression_restarts(target, timeout_ms=3000, seeds=[seed]) == (expression, seed)
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_restarts_table_hit_has_no_seed(make_finder, variant):
+    finder = make_finder(variant)
+    expression, seed = finder.find_expression_restarts(81, seeds=SEEDS)
+    assert evaluate(expression) == 81
+    assert seed is None
@@ -0,0 +1,59 @@
+# 有界结果缓存（user-016）：条目数和字节数双重上限，LRU/LFU 淘汰，统计命中率
+import sys
+
+import pytest
+
+from result_cache import LFUCache, LRUCache, make_cache
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_entries=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    assert cache.get(1) == 'a'
+    cache.put(3, 'c')
+    assert 2 not in cache and 1 in cache and 3 in cache
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.entries) == (1, 0, 1, 2)
+
+
+def test_lfu_keeps_frequent_entries():
+    cache = LFUCache(max_entries=2)
+    cache.put(1, 'a')
+    cache.put(2, 'b')
+    for _ in range(3):
+        cache.get(1)
+    cache.get(2)
+    cache.put(3, 'c')
+    assert 2 not in cache and 1 in cache
+    cache.put(4, 'd')
+    assert 3 not in cache and 1 in cache
+
+
+def test_byte_limit():
+    value = 'x' * 1000
+    cache = LRUCache(max_entries=100, max_bytes=3 * sys.getsizeof(value))
+    for key in range(5):
+        cache.put(key, value)
+    assert len(cache) == 3
+    assert cache.bytes <= cache.max_bytes
+    cache.put('big', 'y' * 10 ** 5)
+    assert 'big' not in cache
+    assert cache.get('missing') is None
+    assert cache.stats().hit_rate == 0.0
+
+
+def test_make_cache():
+    assert isinstance(make_cache('lfu'), LFUCache)
+    assert type(make_cache('lru')) is LRUCache
+    with pytest.raises(ValueError):
+        make_cache('fifo')
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_finder_reuses_results(make_finder, variant):
+    finder = make_finder(variant)
+    first = finder.find_expression(4321)
+    hits = finder.result_cache.stats().hits
+    assert finder.find_expression(4321) == first
+    assert finder.result_cache.stats().hits == hits + 1
@@ -0,0 +1,34 @@
+# 搜索节点和状态表：搜索只存紧凑的并行数组和按值下标的状态表，解路径回溯后才生成表达式
+import pytest
+
+from conftest import evaluate, expression_cost
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_path_is_rendered_from_nodes(make_finder, variant):
+    # 解路径（user-005）
+    finder = make_finder(variant)
+    values, parents, steps, bases = finder._new_search_nodes()
+    # 9 -> 9*9 = 81 -> 999-81 = 918（基础数字在左侧）-> 918/9 = 102
+    for value, parent, step, base in [(9, -1, 0, 9), (81, 0, 4, 9), (918, 1, 3, 999), (102, 2, 6, 9)]:
+        values.append(value)
+        parents.append(parent)
+        steps.append(step)
+        bases.append(base)
+    expression = finder._build_path_expression((values, parents, steps, bases), 3)
+    assert evaluate(expression) == 102
+    assert expression_cost(expression) == 6
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_sparse_state_map_matches_bitmap(make_finder, variant):
+    # 状态表（user-006）：范围可控时为 bytearray，超出 state_bitmap_limit 时退化为 SparseFlags，搜索结果相同
+    finder = make_finder(variant)
+    assert isinstance(finder._new_state_map(1000)[0], bytearray)
+    bitmap = {target: finder._find_expression_astar(target, 2000) for target in (2345, -4871)}
+    finder.state_bitmap_limit = 0
+    assert not isinstance(finder._new_state_map(1000)[0], bytearray)
+    for target, expected in bitmap.items():
+        result = finder._find_expression_astar(target, 2000)
+        assert evaluate(result) == target
+        assert expression_cost(result) == expression_cost(expected)
@@ -0,0 +1,29 @@
+# 流式输出（user-013）：超长目标边分解边按块产出，拼接后与一次性求解相同
+import io
+
+import pytest
+
+from conftest import evaluate
+
+HUGE = 7 * (10 ** 5000 - 1) // 9 + 123456789
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_chunks_join_to_the_expression(make_finder, variant):
+    finder = make_finder(variant)
+    for target in (HUGE, -HUGE):
+        chunks = list(finder.iter_expression(target, chunk_size=4096))
+        assert len(chunks) > 1
+        assert all(len(chunk) <= 2 * 4096 for chunk in chunks[:-1])
+        expression = ''.join(chunks)
+        assert expression == finder.find_expression(target)
+        assert evaluate(expression) == target
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron'])
+def test_write_expression(make_finder, variant):
+    finder = make_finder(variant)
+    for target in (HUGE, 2345):
+        stream = io.StringIO()
+        assert finder.write_expression(target, stream)
+        assert evaluate(stream.getvalue()) == target
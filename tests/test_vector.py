@@ -0,0 +1,30 @@
+# NumPy 向量化搜索（user-007）：逐层同步扩展，结果为以⑨个数计最短的链式表达式
+import pytest
+
+from conftest import evaluate, expression_cost
+
+pytest.importorskip('numpy')
+
+# 链式表达式的最少⑨个数（与 test_astar.py 相同），GUI 版多一个 √⑨
+OPTIMUM = {
+    'console': {2345: 12, 4321: 13, 4999: 13, -9999: 8, 81: 2, 99999: 9},
+    'gui': {2345: 9, 4321: 9, 4999: 9, -9999: 7, 81: 2, 99999: 9},
+}
+
+
+@pytest.mark.parametrize('variant', ['console', 'electron', 'gui'])
+def test_vector_finds_minimal_chain(make_finder, variant):
+    finder = make_finder(variant)
+    for target, optimum in OPTIMUM['gui' if variant == 'gui' else 'console'].items():
+        result = finder._find_expression_vector(target, 3000)
+        assert evaluate(result) == target
+        assert expression_cost(result) <= optimum, target
+
+
+@pytest.mark.parametrize('variant', ['console', 'gui'])
+def test_vector_mode(make_finder, variant):
+    finder = make_finder(variant)
+    finder.search_mode = 'vector'
+    result = finder.find_expression(123457)
+    assert evaluate(result) == 123457
+    assert expression_cost(result) <= (14 if variant == 'gui' else 18)